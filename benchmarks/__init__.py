@@ -0,0 +1 @@
+"""Benchmarks sobre datos sintéticos y un Supabase en memoria; ver benchmarks/run.py."""
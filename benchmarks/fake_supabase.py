@@ -0,0 +1,213 @@
+"""Cliente de Supabase en memoria para medir sin un proyecto real.
+
+Implementa el subconjunto del query builder de postgrest que usa la app:
+select (con alias y rutas JSON `a->b` / `a->>b`), eq, gt, gte, lt, lte, in_,
+or_ con ilike, order, range, insert, update, delete y execute. `rpc` y las tablas
+inexistentes fallan, como una base sin lo que instala sql/, así se miden los
+respaldos en Python. Las filas se copian al leerlas, igual que al deserializar JSON.
+"""
+import copy
+import functools
+import itertools
+import re
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class MissingObject(Exception):
+    pass
+
+
+def _parse_select(columns):
+    """[(alias, columna, [claves JSON], último paso como texto)] o None para '*'."""
+    if columns.strip() == "*":
+        return None
+    fields = []
+    for part in columns.split(","):
+        part = part.strip()
+        alias, _, expr = part.rpartition(":")
+        steps = expr.replace("->>", "->").split("->")
+        fields.append((alias or steps[-1], steps[0], steps[1:], "->>" in expr))
+    return fields
+
+
+def _project(row, fields):
+    if fields is None:
+        return copy.deepcopy(row)
+    out = {}
+    for alias, column, path, as_text in fields:
+        value = row.get(column)
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if as_text and value is not None and not isinstance(value, str):
+            value = str(value)
+        out[alias] = copy.deepcopy(value)
+    return out
+
+
+@functools.lru_cache(maxsize=256)
+def _like_regex(pattern):
+    """LIKE de Postgres como regex: `*` vale `%` (como en PostgREST) y `\\` escapa el siguiente."""
+    out = []
+    chars = iter(pattern.replace("*", "%"))
+    for c in chars:
+        if c == "\\":
+            out.append(re.escape(next(chars, "\\")))
+        elif c == "%":
+            out.append(".*")
+        elif c == "_":
+            out.append(".")
+        else:
+            out.append(re.escape(c))
+    return re.compile("".join(out), re.S | re.I)
+
+
+def _ilike(value, pattern):
+    return value is not None and _like_regex(pattern).fullmatch(str(value)) is not None
+
+
+class Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.fields = None
+        self.filters = []
+        self.ordering = []
+        self.window = None
+        self.action = "select"
+        self.payload = None
+
+    # --- lectura ---
+    def select(self, columns="*", count=None):
+        self.fields = _parse_select(columns)
+        return self
+
+    def _filter(self, column, test):
+        self.filters.append(lambda r: test(r.get(column)))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v == value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v <= value)
+
+    def in_(self, column, values):
+        wanted = {str(v) for v in values}
+        return self._filter(column, lambda v: str(v) in wanted)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, lambda v: _ilike(v, pattern))
+
+    def or_(self, expression):
+        tests = []
+        for clause in expression.split(","):
+            column, op, pattern = clause.split(".", 2)
+            if op != "ilike":
+                raise NotImplementedError(f"or_ solo soporta ilike, no {op}")
+            tests.append((column, pattern))
+        self.filters.append(lambda r: any(_ilike(r.get(c), p) for c, p in tests))
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def limit(self, n):
+        self.window = (0, n - 1)
+        return self
+
+    # --- escritura ---
+    def insert(self, data):
+        self.action, self.payload = "insert", data
+        return self
+
+    def update(self, data):
+        self.action, self.payload = "update", data
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def _matching(self):
+        rows = self.client.tables.setdefault(self.table, [])
+        return [r for r in rows if all(f(r) for f in self.filters)]
+
+    def execute(self):
+        self.client.calls += 1
+        if self.action == "insert":
+            return Response(self.client._insert(self.table, self.payload))
+        if self.action == "update":
+            rows = self._matching()
+            for r in rows:
+                r.update(copy.deepcopy(self.payload))
+            return Response(copy.deepcopy(rows))
+        if self.action == "delete":
+            rows = self._matching()
+            ids = {id(r) for r in rows}
+            self.client.tables[self.table] = [r for r in self.client.tables[self.table] if id(r) not in ids]
+            return Response(rows)
+
+        if self.table not in self.client.tables:
+            raise MissingObject(f'relation "{self.table}" does not exist')
+        rows = self._matching()
+        for column, desc in reversed(self.ordering):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        if self.window:
+            rows = rows[self.window[0]:self.window[1] + 1]
+        self.client.rows_read += len(rows)
+        return Response([_project(r, self.fields) for r in rows])
+
+
+class _FailingCall:
+    def __init__(self, name):
+        self.name = name
+
+    def execute(self):
+        raise MissingObject(f"function {self.name} does not exist")
+
+
+class FakeSupabaseClient:
+    """Tablas como listas de dicts; cuenta consultas y filas devueltas."""
+
+    def __init__(self, tables=None):
+        self.tables = copy.deepcopy(tables or {})
+        self._ids = {
+            name: itertools.count(max((r.get("id", 0) for r in rows), default=0) + 1)
+            for name, rows in self.tables.items()
+        }
+        self.calls = 0
+        self.rows_read = 0
+
+    def table(self, name):
+        return Query(self, name)
+
+    from_ = table
+
+    def rpc(self, name, params=None):
+        return _FailingCall(name)
+
+    def _insert(self, table, data):
+        counter = self._ids.setdefault(table, itertools.count(1))
+        rows = [dict(copy.deepcopy(r)) for r in (data if isinstance(data, list) else [data])]
+        for r in rows:
+            r.setdefault("id", next(counter))
+        self.tables.setdefault(table, []).extend(rows)
+        return copy.deepcopy(rows)
@@ -0,0 +1,248 @@
+"""Benchmarks reproducibles de las rutas de datos de cada página, el optimizador,
+la decodificación de polilíneas, la red vial local y los PDF, sobre datos sintéticos en memoria.
+
+    python -m benchmarks.run --deliveries 10000 100000 --out bench.json
+    python -m benchmarks.run --deliveries 10000 --baseline bench_anterior.json
+
+Cada medición se repite `--repeat` veces con la caché de tablas vacía y se
+guardan mínimo y mediana. Con `--baseline` se comparan las medianas contra un
+resultado anterior y se marcan las que empeoraron más que `--tolerance`.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+warnings.filterwarnings("ignore")
+
+from benchmarks.fake_supabase import FakeSupabaseClient  # noqa: E402
+from benchmarks.synthetic import generate, generate_road_grid  # noqa: E402
+from core import (  # noqa: E402
+    DELIVERY_LIST_COLUMNS, ROUTE_SCALAR_COLUMNS, SupabaseManager, TableCache, get_route_rollups,
+)
+from geometry import GeometryCache, decode_polyline_array  # noqa: E402
+from road_network import RoadGraph  # noqa: E402
+from rollups import day_bounds, summarize_rollups  # noqa: E402
+from route_optimizer import optimize_route, plan_fleet  # noqa: E402
+
+# Sin servidor de Streamlit, cache_resource avisa en cada llamada
+for _name in list(logging.root.manager.loggerDict):
+    if _name.startswith("streamlit"):
+        logging.getLogger(_name).setLevel(logging.ERROR)
+
+REPORT_START, REPORT_END = date(2024, 10, 3), date(2024, 12, 31)
+
+
+def timed(fn, repeat):
+    """Segundos (mínimo y mediana) de `repeat` ejecuciones de fn()."""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - started)
+    return {"min_s": min(runs), "median_s": statistics.median(runs), "runs": repeat}
+
+
+def manager(client):
+    """SupabaseManager sobre el cliente falso, con caché vacía y sin espejos."""
+    return SupabaseManager(cache=TableCache(ttl=0), mirrors={}, client=client)
+
+
+def page_benchmarks(client, repeat):
+    """Las mismas lecturas que hace cada página al dibujarse."""
+    sb = manager(client)
+    get_route_rollups.clear()  # los agregados incrementales empiezan vacíos en cada escala
+    between = ("created_at", *day_bounds(REPORT_START, REPORT_END))
+
+    def deliveries_page():
+        rows, _ = sb.query_deliveries(DELIVERY_LIST_COLUMNS, status="pending", limit=50)
+        sb.query_deliveries(DELIVERY_LIST_COLUMNS, status="pending", after=rows[-1]["tracking_number"], limit=50)
+        sb.query_deliveries(DELIVERY_LIST_COLUMNS, search="Quispe", limit=50)
+
+    def routing_page():
+        sb.get_synced("deliveries")
+        sb.get("depots")
+        sb.get("vehicles")
+
+    def reports_page():
+        rollups = sb.get_route_rollups(REPORT_START, REPORT_END)
+        summarize_rollups(rollups, by="day")
+        sb.get_columns("optimized_routes", ROUTE_SCALAR_COLUMNS, between=between)
+
+    def saved_route():
+        route = sb.get_route_geometry(1)
+        sb.get_delivery_labels(route["optimized_sequence"]["waypoint_ids"])
+
+    return {
+        "dashboard.summary": timed(sb.get_dashboard_summary, repeat),
+        "dashboard.map_bins": timed(lambda: sb.get_delivery_bins(0.002), repeat),
+        "dashboard.points": timed(
+            lambda: sb.get_columns("deliveries", ["customer_coordinates", "status", "customer_name"]), repeat
+        ),
+        "deliveries.pages": timed(deliveries_page, repeat),
+        "routing.inputs": timed(routing_page, repeat),
+        "reports.rollups_and_routes": timed(reports_page, repeat),
+        "reports.saved_route": timed(saved_route, repeat),
+    }
+
+
+def optimizer_benchmarks(data, repeat, sizes=(25, 100, 300)):
+    """Tiempo hasta converger (presupuesto amplio) para selecciones de distinto tamaño."""
+    depot = data["depots"][0]["coordinates"]
+    pending = [d for d in data["deliveries"] if d["status"] == "pending"]
+    results = {}
+    for n in sizes:
+        if len(pending) >= n:
+            chosen = pending[:n]
+            results[f"optimize_route.{n}"] = timed(lambda: optimize_route(chosen, depot, time_budget=30), repeat)
+    vehicles = [{**v, "status": "available"} for v in data["vehicles"]]
+    located = pending[:400]
+    results["plan_fleet.400"] = timed(lambda: plan_fleet(located, vehicles, depot, time_budget=2), repeat)
+    return results
+
+
+def polyline_benchmarks(data, repeat):
+    encoded = [r["optimized_sequence"]["encodedPolyline"] for r in data["optimized_routes"][:200]]
+
+    def decode_all():
+        for e in encoded:
+            decode_polyline_array(e)
+
+    def simplify_all():
+        cache = GeometryCache(max_entries=len(encoded))
+        for i, e in enumerate(encoded):
+            cache.get(e, zoom=14, route_id=i)
+
+    return {
+        f"polyline.decode.{len(encoded)}": timed(decode_all, repeat),
+        f"polyline.decode_simplify_z14.{len(encoded)}": timed(simplify_all, repeat),
+    }
+
+
+def road_benchmarks(data, repeat, size=80, stops=100):
+    """Red vial sintética: construcción del CSR, matriz de costos, ruta por calles y geometría."""
+    edges = generate_road_grid(size=size)
+    graph = RoadGraph.from_edges(*edges)
+    depot = data["depots"][0]["coordinates"]
+    pending = [d for d in data["deliveries"] if d["status"] == "pending"][:stops]
+    points = [(depot["lat"], depot["lng"])] + [
+        (d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in pending
+    ]
+    return {
+        f"road.build_csr.{size}x{size}": timed(lambda: RoadGraph.from_edges(*edges), repeat),
+        f"road.costs.{len(points)}x{len(points)}": timed(lambda: graph.costs(points, points), repeat),
+        f"road.optimize_route.{len(pending)}": timed(
+            lambda: optimize_route(pending, depot, time_budget=30, road_graph=graph), repeat
+        ),
+        f"road.geometry.{len(points)}": timed(lambda: graph.route_geometry(points), repeat),
+    }
+
+
+def pdf_benchmarks(client, repeat):
+    from views.reporting import build_route_report
+    from views.vehicles import build_vehicle_report
+
+    sb = manager(client)
+    between = ("created_at", *day_bounds(REPORT_START, REPORT_END))
+    daily = summarize_rollups(sb.get_route_rollups(REPORT_START, REPORT_END), by="day")
+    return {
+        "pdf.routes": timed(lambda: build_route_report(sb, "Benchmark", daily, between), repeat),
+        "pdf.vehicles": timed(lambda: build_vehicle_report(sb), repeat),
+    }
+
+
+def run_scale(deliveries, seed, repeat):
+    started = time.perf_counter()
+    data = generate(deliveries=deliveries, seed=seed)
+    generated = time.perf_counter() - started
+    client = FakeSupabaseClient(data)
+    results = {}
+    results.update(page_benchmarks(client, repeat))
+    results.update(optimizer_benchmarks(data, repeat))
+    results.update(polyline_benchmarks(data, repeat))
+    results.update(road_benchmarks(data, repeat))
+    results.update(pdf_benchmarks(client, repeat))
+    return {
+        "rows": {table: len(rows) for table, rows in data.items()},
+        "generation_s": generated,
+        "benchmarks": results,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance):
+    """Líneas 'escala/benchmark: antes -> ahora (x)' y cuántas empeoraron más que la tolerancia."""
+    lines, regressions = [], 0
+    for scale, result in current["scales"].items():
+        previous = baseline.get("scales", {}).get(scale, {}).get("benchmarks", {})
+        for name, stats in result["benchmarks"].items():
+            if name not in previous:
+                continue
+            ratio = stats["median_s"] / previous[name]["median_s"] if previous[name]["median_s"] else float("inf")
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag = "  <-- más lento"
+                regressions += 1
+            lines.append(
+                f"{scale:>8} {name:<40} {previous[name]['median_s'] * 1000:9.1f} ms -> "
+                f"{stats['median_s'] * 1000:9.1f} ms ({ratio:.2f}x){flag}"
+            )
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--deliveries", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_output.json")
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="empeoramiento aceptado (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    output = {
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "scales": {},
+    }
+    for n in args.deliveries:
+        print(f"== {n} entregas", file=sys.stderr)
+        output["scales"][str(n)] = run_scale(n, args.seed, args.repeat)
+        for name, stats in output["scales"][str(n)]["benchmarks"].items():
+            print(f"{name:<44} {stats['median_s'] * 1000:9.1f} ms", file=sys.stderr)
+
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+    print(f"Resultados en {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            lines, regressions = compare(output, json.load(f), args.tolerance)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""Datos sintéticos reproducibles alrededor de Pacasmayo.
+
+`generate(...)` devuelve {tabla: filas} con la misma forma que las tablas de
+Supabase: deliveries, vehicles, depots y optimized_routes (secuencias
+compact-v1 con polilíneas densas, como las de Google). `generate_road_grid`
+arma una cuadrícula de calles para la red vial local.
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import polyline
+
+from core import PACASMAYO_COORDS
+from road_network import edge_km
+from route_optimizer import COMPACT_FORMAT, haversine_pairs
+
+STATUSES = ["pending", "in_progress", "delivered"]
+STATUS_WEIGHTS = [0.5, 0.2, 0.3]
+VEHICLE_TYPES = ["Camión Pequeño", "Camión Mediano", "Camión Grande", "Motocicleta"]
+STREETS = ["Jr. Dos de Mayo", "Av. 28 de Julio", "Jr. Ayacucho", "Jr. Junín", "Av. Gonzalo Ugaz", "Jr. Lima"]
+NAMES = ["Ana", "Luis", "María", "José", "Rosa", "Carlos", "Lucía", "Jorge", "Elena", "Miguel"]
+SURNAMES = ["Quispe", "Flores", "Sánchez", "Rojas", "Vásquez", "Díaz", "Castillo", "Chávez"]
+ROAD_POINTS_PER_LEG = 20  # puntos intermedios por tramo, para polilíneas de tamaño realista
+
+
+def _iso(moment):
+    return moment.isoformat(timespec="seconds")
+
+
+def _coords(rng, n, spread_deg):
+    lat = PACASMAYO_COORDS["lat"] + rng.normal(0, spread_deg, n)
+    lng = PACASMAYO_COORDS["lng"] + rng.normal(0, spread_deg, n)
+    return np.round(lat, 6), np.round(lng, 6)
+
+
+def generate_depots(rng, n):
+    lat, lng = _coords(rng, n, 0.004)
+    return [{
+        "id": i + 1,
+        "name": f"Almacén {i + 1}",
+        "address": f"{STREETS[i % len(STREETS)]} {100 + i}, Pacasmayo",
+        "coordinates": {"lat": float(lat[i]), "lng": float(lng[i])},
+        "is_default": i == 0,
+    } for i in range(n)]
+
+
+def generate_vehicles(rng, n, now):
+    types = rng.integers(0, len(VEHICLE_TYPES), n)
+    return [{
+        "id": i + 1,
+        "license_plate": f"T{i // 1000:01d}{chr(65 + i % 26)}-{i % 1000:03d}",
+        "vehicle_type": VEHICLE_TYPES[types[i]],
+        "capacity_kg": float(rng.choice([150, 500, 1500, 3000])),
+        "status": str(rng.choice(["available", "in_use", "maintenance"], p=[0.7, 0.2, 0.1])),
+        "created_at": _iso(now - timedelta(days=int(rng.integers(0, 365)))),
+    } for i in range(n)]
+
+
+def generate_deliveries(rng, n, now, days):
+    lat, lng = _coords(rng, n, 0.01)
+    status = rng.choice(STATUSES, n, p=STATUS_WEIGHTS)
+    weight = np.round(rng.gamma(2.0, 4.0, n), 1)
+    age = rng.integers(0, days * 24 * 3600, n)
+    rows = []
+    for i in range(n):
+        created = now - timedelta(seconds=int(age[i]))
+        rows.append({
+            "id": i + 1,
+            "tracking_number": f"PCM-{i + 1:07d}",
+            "customer_name": f"{NAMES[i % len(NAMES)]} {SURNAMES[(i // len(NAMES)) % len(SURNAMES)]} {i + 1}",
+            "customer_phone": f"9{i % 100000000:08d}",
+            "customer_address": f"{STREETS[i % len(STREETS)]} {1 + i % 900}, Pacasmayo",
+            "customer_coordinates": {"lat": float(lat[i]), "lng": float(lng[i])},
+            "package_description": "Paquete",
+            "package_weight": float(weight[i]),
+            "status": str(status[i]),
+            "estimated_delivery_time": _iso(created + timedelta(days=2)),
+            "created_at": _iso(created),
+            "updated_at": _iso(created),
+        })
+    return rows
+
+
+def _road_path(points, rng):
+    """Interpola cada tramo con un poco de ruido, como una geometría de calles."""
+    path = []
+    for a, b in zip(points[:-1], points[1:]):
+        t = np.linspace(0, 1, ROAD_POINTS_PER_LEG, endpoint=False)
+        lat = a[0] + (b[0] - a[0]) * t + rng.normal(0, 0.00005, len(t))
+        lng = a[1] + (b[1] - a[1]) * t + rng.normal(0, 0.00005, len(t))
+        path.extend(zip(lat.tolist(), lng.tolist()))
+    path.append(points[-1])
+    return path
+
+
+def generate_routes(rng, n, deliveries, vehicles, depots, now, days, stops=(5, 25)):
+    rows = []
+    for i in range(n):
+        depot_row = depots[int(rng.integers(0, len(depots)))]
+        depot = depot_row["coordinates"]
+        members = rng.choice(len(deliveries), int(rng.integers(stops[0], stops[1] + 1)), replace=False)
+        chosen = [deliveries[j] for j in members]
+        points = [(depot["lat"], depot["lng"])]
+        points += [(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in chosen]
+        points.append(points[0])
+        legs = haversine_pairs(points[:-1], points[1:]).diagonal() * 1.3
+        minutes = legs / 25 * 60
+        created = now - timedelta(seconds=int(rng.integers(0, days * 24 * 3600)))
+        sequence = {
+            "format": COMPACT_FORMAT,
+            "encodedPolyline": polyline.encode(_road_path(points, rng)),
+            "depot": dict(depot),
+            "waypoint_ids": [d["id"] for d in chosen],
+            "waypoints": [list(p) for p in points[1:-1]],
+            "leg_distance_km": np.round(legs, 3).tolist(),
+            "leg_duration_min": np.round(minutes, 2).tolist(),
+        }
+        if rng.random() < 0.5:
+            sequence["depot_id"] = depot_row["id"]  # las rutas anteriores solo guardaban las coordenadas
+        if vehicles and rng.random() < 0.5:
+            sequence["vehicle_id"] = vehicles[int(rng.integers(0, len(vehicles)))]["id"]
+        rows.append({
+            "id": i + 1,
+            "route_name": f"Ruta Pacasmayo {_iso(created)}",
+            "delivery_ids": [d["id"] for d in chosen],
+            "optimized_sequence": sequence,
+            "total_distance_km": round(float(legs.sum()), 3),
+            "estimated_duration_minutes": int(round(minutes.sum())),
+            "route_status": "planned",
+            "created_at": _iso(created),
+            "updated_at": _iso(created),
+        })
+    return rows
+
+
+def generate_road_grid(size=80, spacing_deg=0.0009, oneway_every=3, seed=0):
+    """Arreglos de RoadGraph.from_edges: cuadrícula de size x size cuadras centrada en Pacasmayo.
+
+    Una de cada `oneway_every` calles horizontales es de un solo sentido
+    (alternando) y las velocidades varían por calle, como en un extracto real.
+    """
+    rng = np.random.default_rng(seed)
+    rows, cols = np.divmod(np.arange(size * size), size)
+    lat = PACASMAYO_COORDS["lat"] + (rows - size / 2) * spacing_deg + rng.normal(0, spacing_deg / 20, rows.size)
+    lng = PACASMAYO_COORDS["lng"] + (cols - size / 2) * spacing_deg + rng.normal(0, spacing_deg / 20, rows.size)
+    node = np.arange(size * size).reshape(size, size)
+    src, dst, speed = [], [], []
+    for r in range(size):
+        a, b = node[r, :-1], node[r, 1:]
+        kmh = float(rng.choice([15, 25, 35]))
+        if r % oneway_every == 1:
+            a, b = (a, b) if r % (2 * oneway_every) == 1 else (b, a)
+            src.append(a), dst.append(b), speed.append(np.full(len(a), kmh))
+        else:
+            src += [a, b]
+            dst += [b, a]
+            speed.append(np.full(2 * len(a), kmh))
+    for c in range(size):
+        a, b = node[:-1, c], node[1:, c]
+        src += [a, b]
+        dst += [b, a]
+        speed.append(np.full(2 * len(a), float(rng.choice([25, 40]))))
+    src, dst, speed = np.concatenate(src), np.concatenate(dst), np.concatenate(speed)
+    km = edge_km(np.column_stack([lat, lng]), src, dst)
+    return lat, lng, src, dst, km, km / speed * 60
+
+
+def generate(deliveries=10_000, routes=None, vehicles=20, depots=3, days=90, seed=0, now=None):
+    """Tablas sintéticas con la misma semilla -> exactamente los mismos datos."""
+    rng = np.random.default_rng(seed)
+    now = now or datetime(2025, 1, 1, tzinfo=timezone.utc)
+    routes = deliveries // 10 if routes is None else routes
+    depot_rows = generate_depots(rng, depots)
+    vehicle_rows = generate_vehicles(rng, vehicles, now)
+    delivery_rows = generate_deliveries(rng, deliveries, now, days)
+    return {
+        "depots": depot_rows,
+        "vehicles": vehicle_rows,
+        "deliveries": delivery_rows,
+        "optimized_routes": generate_routes(rng, routes, delivery_rows, vehicle_rows, depot_rows, now, days),
+    }
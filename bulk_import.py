@@ -0,0 +1,165 @@
+"""Importación masiva de entregas: geocodificación concurrente y limitada, inserción por lotes."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from geocoding import normalize_address
+
+REQUIRED_COLUMNS = ["customer_name", "customer_address"]
+OPTIONAL_COLUMNS = {
+    "customer_phone": "",
+    "package_description": "",
+    "package_weight": 1.0,
+    "estimated_delivery_time": None,
+}
+
+
+class TokenBucket:
+    """Limitador de tasa: como máximo `rate` peticiones por segundo, ráfagas de `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retries(fn, retries=3, backoff=0.5):
+    """Ejecuta fn() reintentando con espera exponencial ante excepciones."""
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def geocode_many(addresses, geocode, workers=8, rate=10, retries=3, progress=None):
+    """Geocodifica direcciones únicas en paralelo.
+
+    Las direcciones con la misma clave normalizada se consultan una sola vez.
+    `geocode(dirección, throttle)` debe llamar a `throttle()` solo antes de ir
+    al backend: las direcciones ya guardadas no gastan cupo del limitador.
+    Devuelve {clave: coordenadas | None | excepción}; `progress(hechas, total)`
+    se llama desde el hilo que invoca, así puede actualizar la interfaz.
+    """
+    unique = {}
+    for address in addresses:
+        key = normalize_address(address)
+        if key and key not in unique:
+            unique[key] = address
+
+    bucket = TokenBucket(rate)
+
+    def task(address):
+        return with_retries(lambda: geocode(address, bucket.acquire), retries=retries)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(task, address): key for key, address in unique.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = e
+            if progress:
+                progress(done, len(futures))
+    return results
+
+
+def _blank(value):
+    """Celda vacía: None, texto en blanco o el NaN con que pandas lee las celdas vacías."""
+    return value is None or value != value or (isinstance(value, str) and not value.strip())
+
+
+def parse_weight(value):
+    """Peso en kg desde Excel/CSV: número, o texto con coma o punto decimal ("2,5")."""
+    if isinstance(value, (int, float)):
+        weight = float(value)
+    else:
+        text = str(value).strip().lower()
+        text = (text[:-2] if text.endswith("kg") else text).strip().replace(",", ".")
+        try:
+            weight = float(text)
+        except ValueError:
+            raise ValueError(f"Peso inválido: {value!r}") from None
+    if weight != weight or weight < 0:
+        raise ValueError(f"Peso inválido: {value!r}")
+    return weight
+
+
+def build_delivery_rows(records, coords_by_key, tracking_prefix):
+    """Arma filas para `deliveries` y separa las que no se pueden crear.
+
+    Devuelve (filas, fallos) donde cada fallo es (número de fila, motivo).
+    """
+    rows, failures = [], []
+    for i, record in enumerate(records, 1):
+        missing = [c for c in REQUIRED_COLUMNS if not str(record.get(c) or "").strip()]
+        if missing:
+            failures.append((i, f"Faltan columnas: {', '.join(missing)}"))
+            continue
+        coords = coords_by_key.get(normalize_address(record["customer_address"]))
+        if isinstance(coords, Exception):
+            failures.append((i, f"Error de geocodificación: {coords}"))
+            continue
+        if not coords:
+            failures.append((i, "Dirección no encontrada"))
+            continue
+
+        row = {c: default if _blank(record.get(c)) else record.get(c) for c, default in OPTIONAL_COLUMNS.items()}
+        try:
+            weight = parse_weight(row["package_weight"])
+        except ValueError as e:
+            failures.append((i, str(e)))
+            continue
+        row.update({
+            "tracking_number": f"{tracking_prefix}{i:04d}",
+            "customer_name": str(record["customer_name"]).strip(),
+            "customer_address": str(record["customer_address"]).strip(),
+            "customer_coordinates": coords,
+            "package_weight": weight,
+            "status": "pending",
+        })
+        row["_source_row"] = i
+        rows.append(row)
+    return rows, failures
+
+
+def insert_in_batches(insert, rows, batch_size=100, progress=None):
+    """Inserta de a `batch_size` filas por petición.
+
+    Si un lote falla se reintenta fila por fila para aislar las filas malas sin
+    abortar el resto. `insert` devuelve las filas creadas; se devuelve
+    (filas insertadas, fallos).
+    """
+    inserted, failures = [], []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        clean = [{k: v for k, v in r.items() if k != "_source_row"} for r in batch]
+        try:
+            inserted += insert(clean) or []
+        except Exception:
+            for row, data in zip(batch, clean):
+                try:
+                    inserted += insert(data) or []
+                except Exception as e:
+                    failures.append((row["_source_row"], f"Error al guardar: {e}"))
+        if progress:
+            progress(min(start + batch_size, len(rows)), len(rows))
+    return inserted, failures
@@ -0,0 +1,652 @@
+"""Infraestructura compartida por todas las páginas.
+
+Configuración, caché de tablas, sincronización, acceso a Supabase y servicios
+por proceso. Solo importa lo que cualquier página necesita; lo que usa una
+sola página (plotly, fpdf, el optimizador en segundo plano) vive en su módulo
+de views/ y se carga la primera vez que se abre esa página.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+from supabase import Client, create_client
+from supabase.lib.client_options import ClientOptions
+
+from geocoding import GeocodeStore, GeocodingService, GoogleGeocoder
+from http_pool import pooled_session
+from rollups import RouteRollups, day_bounds
+from tracing import traced
+
+# ---------------- CONFIGURACIÓN ----------------
+PACASMAYO_COORDS = {"lat": -7.4002, "lng": -79.5717}
+DELIVERY_STATUSES = ["pending", "in_progress", "delivered"]
+WAYPOINT_LIMIT = 25  # máximo de intermediates por llamada a Google computeRoutes
+PLANNING_MODES = [
+    "Ruta manual", "Plan de flota (capacidad)", "Multi-almacén (más cercano)", "Insertar en ruta existente",
+]
+SELECTION_METHODS = ["Ninguna", "Radio desde el almacén", "Zona automática"]
+OPTIMIZATION_ENGINES = ["n8n (Google Maps)", "Local", "n8n con respaldo local"]
+DELIVERY_LIST_COLUMNS = ["tracking_number", "customer_name", "status", "customer_address"]
+
+# ---------------- CACHÉ DE TABLAS ----------------
+class TableCache:
+    """Caché read-through por tabla con TTL, compartida entre sesiones.
+
+    Cada tabla lleva un número de versión que se incrementa al invalidarla;
+    una lectura que empezó antes de la invalidación no guarda su resultado.
+    Los fallos simultáneos de una misma clave esperan a una sola carga. Como
+    cada búsqueda y cada página de resultados es una clave, las entradas se
+    acotan a `max_entries` (se descarta la menos usada) y las vencidas se
+    purgan una vez por TTL.
+    """
+
+    def __init__(self, ttl=60, max_entries=512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (tabla, clave) -> (versión, instante, filas), de menos a más usada
+        self._last_purge = time.monotonic()
+        self._versions = {}  # tabla -> versión actual
+        self._loading = {}   # (tabla, clave) -> [lock de carga, hilos esperando]
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, table, key):
+        """Filas vigentes de la entrada (llamar con self._lock tomado) o None."""
+        entry = self._entries.get((table, key))
+        if entry and entry[0] == self._versions.get(table, 0) and time.monotonic() - entry[1] < self.ttl:
+            self._entries.move_to_end((table, key))
+            self.hits += 1
+            return entry[2]
+        return None
+
+    def _store(self, table, key, version, loaded_at, rows):
+        """Guarda una entrada (llamar con self._lock tomado) respetando TTL y tamaño máximo."""
+        self._entries[(table, key)] = (version, loaded_at, rows)
+        self._entries.move_to_end((table, key))
+        now = time.monotonic()
+        if now - self._last_purge >= self.ttl:
+            for k in [k for k, e in self._entries.items() if now - e[1] >= self.ttl]:
+                del self._entries[k]
+            self._last_purge = now
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, table, loader, key=None):
+        with self._lock:
+            rows = self._fresh(table, key)
+            if rows is not None:
+                return list(rows)
+            slot = self._loading.setdefault((table, key), [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                with self._lock:
+                    # Otro hilo pudo haberla cargado mientras se esperaba el lock
+                    rows = self._fresh(table, key)
+                    if rows is not None:
+                        return list(rows)
+                    self.misses += 1
+                    version = self._versions.get(table, 0)
+                now = time.monotonic()
+                rows = loader()
+                with self._lock:
+                    if self._versions.get(table, 0) == version:
+                        self._store(table, key, version, now, rows)
+                return list(rows)
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    self._loading.pop((table, key), None)
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                for k in [k for k in self._entries if k[0] == table]:
+                    del self._entries[k]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+@st.cache_resource
+def get_table_cache():
+    """Una sola caché por proceso, compartida por todas las sesiones de Streamlit."""
+    return TableCache(
+        ttl=int(st.secrets.get("CACHE_TTL_SECONDS", 60)),
+        max_entries=int(st.secrets.get("CACHE_MAX_ENTRIES", 512)),
+    )
+
+# ---------------- SINCRONIZACIÓN INCREMENTAL ----------------
+# Columna usada como marca de agua para traer solo filas nuevas o modificadas
+# (mantenida por los triggers de sql/updated_at.sql).
+SYNC_WATERMARKS = {
+    "deliveries": "updated_at",
+    "optimized_routes": "updated_at",
+}
+# Columnas escalares de optimized_routes: listas y reportes no traen la geometría.
+ROUTE_SCALAR_COLUMNS = [
+    "id", "route_name", "total_distance_km", "estimated_duration_minutes", "route_status", "created_at",
+]
+SYNC_COLUMNS = {"optimized_routes": ",".join(ROUTE_SCALAR_COLUMNS + ["updated_at"])}
+PAGE_SIZE = 1000  # límite por defecto de filas por respuesta en PostgREST
+
+
+def iter_pages(make_query, page_size=PAGE_SIZE):
+    """Recorre una consulta por bloques con range(), entregando un bloque a la vez."""
+    start = 0
+    while True:
+        chunk = make_query().range(start, start + page_size - 1).execute().data
+        if chunk:
+            yield chunk
+        if len(chunk) < page_size:
+            return
+        start += page_size
+
+def fetch_all(make_query, page_size=PAGE_SIZE):
+    """Todas las filas de una consulta paginada."""
+    return [row for chunk in iter_pages(make_query, page_size) for row in chunk]
+
+def in_range(row, between):
+    """Filtro `(columna, desde, hasta)` sobre timestamps ISO, [desde, hasta)."""
+    if between is None:
+        return True
+    column, lo, hi = between
+    value = row.get(column)
+    return bool(value) and datetime.fromisoformat(lo) <= datetime.fromisoformat(value) < datetime.fromisoformat(hi)
+
+def ilike_literal(text):
+    """Texto para buscarse literalmente dentro de un patrón ilike de PostgREST.
+
+    `%` y `_` se escapan con barra invertida. PostgREST convierte todo `*` en
+    `%` antes de armar el LIKE, así que no hay forma de pedir un `*` literal y
+    se quita, igual que comas y paréntesis, que romperían el filtro or=(...).
+    """
+    term = "".join(c for c in text if c not in ",()*").strip()
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def filter_range(query, between):
+    if between is None:
+        return query
+    column, lo, hi = between
+    return query.gte(column, lo).lt(column, hi)
+
+
+class TableMirror:
+    """Espejo en memoria de una tabla que se actualiza por marca de agua.
+
+    Cada sincronización pide las filas con `watermark >= último valor leído -
+    overlap`: una transacción de otro proceso puede confirmarse después con un
+    valor anterior al último visto, y la ventana de solapamiento la vuelve a
+    traer. La marca solo avanza con lecturas de sincronización, nunca con las
+    filas de escrituras propias. Los borrados se reconcilian con un barrido
+    periódico que solo trae los ids.
+    """
+
+    def __init__(self, table, watermark, min_interval=5, sweep_interval=300, columns="*", overlap=60):
+        self.table = table
+        self.watermark = watermark
+        self.columns = columns
+        self.min_interval = min_interval
+        self.sweep_interval = sweep_interval
+        self.overlap = timedelta(seconds=overlap)
+        # Nombres de las columnas proyectadas (con alias `nombre:expresión`), o None si es "*"
+        self._fields = None if columns == "*" else [c.split(":")[0].strip() for c in columns.split(",")]
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._last_value = None
+        self._last_sync = 0.0
+        self._last_sweep = 0.0
+
+    def _advance(self, rows):
+        values = [r[self.watermark] for r in rows if r.get(self.watermark)]
+        if values:
+            newest = max(values, key=datetime.fromisoformat)
+            if self._last_value is None or datetime.fromisoformat(newest) > datetime.fromisoformat(self._last_value):
+                self._last_value = newest
+
+    def apply(self, rows):
+        """Aplica al espejo filas devueltas por una escritura propia (sin mover la marca de agua).
+
+        Las escrituras devuelven la fila completa: se guarda solo la proyección
+        del espejo, con la misma forma que las filas sincronizadas.
+        """
+        with self._lock:
+            for r in rows or []:
+                if "id" in r:
+                    self._rows[r["id"]] = r if self._fields is None else {c: r.get(c) for c in self._fields}
+
+    def remove(self, rows):
+        with self._lock:
+            for r in rows or []:
+                self._rows.pop(r.get("id"), None)
+
+    def sync(self, client, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_value is not None and now - self._last_sync < self.min_interval:
+                return list(self._rows.values())
+
+            if self._last_value is None:
+                rows = fetch_all(lambda: client.table(self.table).select(self.columns).order("id"))
+                self._rows = {r["id"]: r for r in rows}
+                self._last_sweep = now
+            else:
+                since = (datetime.fromisoformat(self._last_value) - self.overlap).isoformat()
+                rows = fetch_all(
+                    lambda: client.table(self.table).select(self.columns)
+                    .gte(self.watermark, since).order(self.watermark).order("id")
+                )
+                for r in rows:
+                    self._rows[r["id"]] = r
+                if now - self._last_sweep >= self.sweep_interval:
+                    ids = {r["id"] for r in fetch_all(lambda: client.table(self.table).select("id").order("id"))}
+                    for stale in set(self._rows) - ids:
+                        del self._rows[stale]
+                    self._last_sweep = now
+            self._advance(rows)
+            self._last_sync = now
+            return list(self._rows.values())
+
+
+@st.cache_resource
+def get_table_mirrors():
+    """Espejos por proceso; None si el modo de sincronización está desactivado."""
+    if not st.secrets.get("SYNC_MODE", False):
+        return None
+    return {
+        table: TableMirror(
+            table, column,
+            min_interval=int(st.secrets.get("SYNC_INTERVAL_SECONDS", 5)),
+            sweep_interval=int(st.secrets.get("SYNC_SWEEP_SECONDS", 300)),
+            columns=SYNC_COLUMNS.get(table, "*"),
+            overlap=int(st.secrets.get("SYNC_OVERLAP_SECONDS", 60)),
+        )
+        for table, column in SYNC_WATERMARKS.items()
+    }
+
+# Columnas de route_daily_rollups y lo que el respaldo local lee de cada ruta
+ROLLUP_FIELDS = [
+    "day", "vehicle_id", "depot_id", "route_count", "total_distance_km", "total_duration_min", "total_deliveries",
+]
+ROLLUP_SOURCE = (
+    "id,created_at,total_distance_km,estimated_duration_minutes,delivery_ids,"
+    "vehicle_id:optimized_sequence->>vehicle_id,depot_id:optimized_sequence->>depot_id,"
+    "depot:optimized_sequence->depot"
+)
+
+# ---------------- AGREGADOS DEL DASHBOARD ----------------
+# Entradas de caché derivadas que deben invalidarse junto con su tabla de origen.
+CACHE_DEPENDENTS = {
+    "deliveries": ("dashboard_summary",),
+    "optimized_routes": ("dashboard_summary",),
+}
+
+
+def summarize_locally(statuses, routes, nbins=10):
+    """Mismo resultado que la RPC `dashboard_summary`, calculado en Python."""
+    status_counts = {}
+    for row in statuses:
+        status_counts[row["status"]] = status_counts.get(row["status"], 0) + 1
+
+    distances = [r["total_distance_km"] for r in routes if r.get("total_distance_km") is not None]
+    durations = [r["estimated_duration_minutes"] for r in routes if r.get("estimated_duration_minutes") is not None]
+    lo, hi = (min(distances), max(distances)) if distances else (None, None)
+    bins = {}
+    if distances and hi > lo:
+        width = (hi - lo) / nbins
+        for d in distances:
+            b = min(int((d - lo) / width) + 1, nbins)
+            bins[b] = bins.get(b, 0) + 1
+
+    return {
+        "status_counts": status_counts,
+        "total_deliveries": len(statuses),
+        "route_count": len(routes),
+        "avg_distance_km": sum(distances) / len(distances) if distances else None,
+        "avg_duration_min": sum(durations) / len(durations) if durations else None,
+        "distance_min": lo,
+        "distance_max": hi,
+        "histogram": [{"bin": b, "count": n} for b, n in sorted(bins.items())],
+    }
+
+
+def normalize_summary(raw, nbins=10):
+    """Convierte los índices de bin en rangos legibles para el gráfico de barras."""
+    summary = dict(raw)
+    lo, hi = summary.get("distance_min"), summary.get("distance_max")
+    histogram = []
+    if lo is not None and hi is not None:
+        if hi > lo:
+            width = (hi - lo) / nbins
+            counts = {h["bin"]: h["count"] for h in summary.get("histogram") or []}
+            for b in range(1, nbins + 1):
+                start = lo + (b - 1) * width
+                histogram.append({"Rango (km)": f"{start:.1f}–{start + width:.1f}", "Cantidad": counts.get(b, 0)})
+        elif summary.get("route_count"):
+            histogram.append({"Rango (km)": f"{lo:.1f}", "Cantidad": summary["route_count"]})
+    summary["histogram"] = histogram
+    summary["total_deliveries"] = int(summary.get("total_deliveries") or 0)
+    summary["route_count"] = int(summary.get("route_count") or 0)
+    return summary
+
+@traced("dataframe.delivery_points")
+def delivery_points(rows):
+    """DataFrame lat/lon/Estado/Cliente a partir de filas con customer_coordinates, sin bucles por fila."""
+    df = pd.DataFrame(rows, columns=["customer_coordinates", "status", "customer_name"])
+    df = df[df["customer_coordinates"].notna()]
+    coords = pd.DataFrame(df["customer_coordinates"].tolist(), index=df.index, columns=["lat", "lng"])
+    return pd.DataFrame({
+        "lat": coords["lat"],
+        "lon": coords["lng"],
+        "Estado": df["status"],
+        "Cliente": df["customer_name"],
+    })
+
+
+@traced("dataframe.bin_points")
+def bin_points(points, cell_deg):
+    """Agrupa puntos en celdas de `cell_deg` grados por estado; cada grupo queda en su centroide."""
+    cells = (points[["lat", "lon"]] // cell_deg).astype("int64")
+    return (
+        points.assign(cell_y=cells["lat"], cell_x=cells["lon"])
+        .groupby(["Estado", "cell_y", "cell_x"], as_index=False)
+        .agg(lat=("lat", "mean"), lon=("lon", "mean"), Cantidad=("lat", "size"))
+        .drop(columns=["cell_y", "cell_x"])
+    )
+
+# ---------------- CONEXIÓN SUPABASE ----------------
+@st.cache_resource
+def get_supabase_client() -> Client:
+    """Un solo cliente de Supabase por proceso: su pool httpx mantiene las conexiones vivas."""
+    return create_client(
+        st.secrets["SUPABASE_URL"],
+        st.secrets["SUPABASE_KEY"],
+        options=ClientOptions(postgrest_client_timeout=int(st.secrets.get("SUPABASE_TIMEOUT_SECONDS", 30))),
+    )
+
+@st.cache_resource
+def get_http_session():
+    """Sesión HTTP compartida (Google y n8n) con keep-alive y reintentos en GET."""
+    return pooled_session(
+        pool_size=int(st.secrets.get("HTTP_POOL_SIZE", 10)),
+        retries=int(st.secrets.get("HTTP_RETRIES", 3)),
+        timeout=(5, float(st.secrets.get("HTTP_TIMEOUT_SECONDS", 30))),
+    )
+
+
+class SupabaseManager:
+    def __init__(self, cache=None, mirrors=None, client=None):
+        self.client: Client = client or get_supabase_client()
+        self.cache = cache or get_table_cache()
+        self.mirrors = mirrors if mirrors is not None else get_table_mirrors()
+
+    @traced("supabase.get")
+    def get(self, table):
+        return self.cache.get(table, lambda: self.client.table(table).select("*").execute().data)
+
+    @traced("supabase.get_synced")
+    def get_synced(self, table):
+        """Lee desde el espejo incremental si está activo; si no, igual que get()."""
+        mirror = (self.mirrors or {}).get(table)
+        if mirror is None:
+            return self.get(table)
+        return mirror.sync(self.client)
+
+    @traced("supabase.query_deliveries")
+    def query_deliveries(self, columns, status=None, search=None, after=None, limit=50):
+        """Página de entregas filtrada y proyectada en el servidor.
+
+        Pagina por cursor (keyset) sobre `tracking_number`: `after` es el último
+        tracking de la página anterior. Devuelve (filas, hay_más).
+        """
+        def load():
+            q = self.client.table("deliveries").select(",".join(columns))
+            if status:
+                q = q.eq("status", status)
+            if search:
+                term = ilike_literal(search)
+                if term:
+                    q = q.or_(f"tracking_number.ilike.*{term}*,customer_name.ilike.*{term}*")
+            if after:
+                q = q.gt("tracking_number", after)
+            return q.order("tracking_number").range(0, limit).execute().data
+
+        rows = self.cache.get("deliveries", load, key=(tuple(columns), status, search, after, limit))
+        return rows[:limit], len(rows) > limit
+
+    @traced("supabase.get_columns")
+    def get_columns(self, table, columns, between=None):
+        """Todas las filas de una tabla (o de un rango de fechas), solo con las columnas pedidas."""
+        mirror = (self.mirrors or {}).get(table)
+        if mirror is not None:
+            return [{c: r.get(c) for c in columns} for r in mirror.sync(self.client) if in_range(r, between)]
+        return self.cache.get(
+            table,
+            lambda: fetch_all(lambda: filter_range(self.client.table(table).select(",".join(columns)), between)),
+            key=("columns", tuple(columns), between),
+        )
+
+    def iter_rows(self, table, columns, chunk_size=PAGE_SIZE, between=None):
+        """Filas proyectadas por bloques, sin armar la tabla completa en memoria."""
+        mirror = (self.mirrors or {}).get(table)
+        if mirror is not None:
+            rows = [r for r in mirror.sync(self.client) if in_range(r, between)]
+            for start in range(0, len(rows), chunk_size):
+                yield [{c: r.get(c) for c in columns} for r in rows[start:start + chunk_size]]
+            return
+        yield from iter_pages(
+            lambda: filter_range(self.client.table(table).select(",".join(columns)), between).order("id"),
+            chunk_size,
+        )
+
+    @traced("supabase.get_route_rollups")
+    def get_route_rollups(self, start, end):
+        """Agregados diarios por vehículo y almacén entre dos fechas locales (inclusive).
+
+        Lee la tabla `route_daily_rollups` (sql/route_daily_rollups.sql), que un
+        trigger mantiene al día; si no existe, usa los agregados incrementales
+        en memoria, que solo recalculan los días con rutas nuevas o cambiadas.
+        """
+        def load():
+            try:
+                return (self.client.table("route_daily_rollups").select(",".join(ROLLUP_FIELDS))
+                        .gte("day", start.isoformat()).lte("day", end.isoformat()).order("day")
+                        .execute().data)
+            except Exception:
+                # Solo las rutas del periodo: sync no toca los días fuera de él
+                between = ("created_at", *day_bounds(start, end))
+                routes = fetch_all(
+                    lambda: filter_range(self.client.table("optimized_routes").select(ROLLUP_SOURCE), between)
+                )
+                rollups = get_route_rollups()
+                rollups.sync(routes, self.get("depots"), days=(start, end))
+                return rollups.query(start, end)
+
+        return self.cache.get("optimized_routes", load, key=("rollups", start, end))
+
+    @traced("supabase.get_dashboard_summary")
+    def get_dashboard_summary(self, nbins=10):
+        """KPIs del dashboard en una sola respuesta pequeña.
+
+        Usa la función `dashboard_summary` (sql/dashboard_summary.sql); si aún no
+        está instalada en la base, agrega localmente leyendo solo las columnas
+        necesarias.
+        """
+        def load():
+            try:
+                raw = self.client.rpc("dashboard_summary", {"nbins": nbins}).execute().data
+            except Exception:
+                statuses = fetch_all(lambda: self.client.table("deliveries").select("status"))
+                routes = fetch_all(lambda: self.client.table("optimized_routes").select(
+                    "total_distance_km,estimated_duration_minutes"))
+                raw = summarize_locally(statuses, routes, nbins)
+            return [normalize_summary(raw, nbins)]
+
+        return self.cache.get("dashboard_summary", load, key=nbins)[0]
+
+    @traced("supabase.get_delivery_bins")
+    def get_delivery_bins(self, cell_deg=0.002):
+        """Entregas agrupadas en celdas de la grilla por estado (lat, lon, Estado, Cantidad).
+
+        Usa la función `delivery_map_bins` (sql/delivery_map_bins.sql); si no
+        existe, agrupa localmente a partir de las coordenadas y el estado.
+        """
+        def load():
+            try:
+                rows = self.client.rpc("delivery_map_bins", {"cell_deg": cell_deg}).execute().data
+                return [pd.DataFrame(rows, columns=["status", "lat", "lng", "n"]).rename(
+                    columns={"status": "Estado", "lng": "lon", "n": "Cantidad"})]
+            except Exception:
+                points = delivery_points(self.get_columns("deliveries", ["customer_coordinates", "status"]))
+                return [bin_points(points, cell_deg)]
+
+        return self.cache.get("deliveries", load, key=("map_bins", cell_deg))[0]
+
+    @traced("supabase.get_route_geometry")
+    def get_route_geometry(self, route_id):
+        """Geometría y paradas de una sola ruta; se pide solo al abrirla."""
+        def load():
+            return (self.client.table("optimized_routes").select("id,delivery_ids,optimized_sequence")
+                    .eq("id", route_id).execute().data)
+
+        rows = self.cache.get("optimized_routes", load, key=("geometry", route_id))
+        return rows[0] if rows else None
+
+    @traced("supabase.get_delivery_labels")
+    def get_delivery_labels(self, ids):
+        """{id: nombre del cliente} solo para las entregas pedidas."""
+        if not ids:
+            return {}
+
+        def load():
+            return self.client.table("deliveries").select("id,customer_name").in_("id", list(ids)).execute().data
+
+        rows = self.cache.get("deliveries", load, key=("labels", tuple(sorted(map(str, ids)))))
+        return {r["id"]: r["customer_name"] for r in rows}
+
+    @traced("supabase.insert")
+    def insert(self, table, data):
+        res = self.client.table(table).insert(data).execute().data
+        self._written(table, res)
+        return res
+
+    @traced("supabase.update")
+    def update(self, table, data, eq_field, eq_value):
+        res = self.client.table(table).update(data).eq(eq_field, eq_value).execute().data
+        self._written(table, res)
+        if table == "deliveries" and "customer_coordinates" in data:
+            get_route_cache().invalidate_deliveries([r["id"] for r in res])
+        return res
+
+    @traced("supabase.delete")
+    def delete(self, table, eq_field, eq_value):
+        res = self.client.table(table).delete().eq(eq_field, eq_value).execute().data
+        self.cache.invalidate(table, *CACHE_DEPENDENTS.get(table, ()))
+        mirror = (self.mirrors or {}).get(table)
+        if mirror:
+            mirror.remove(res)
+        return res
+
+    def _written(self, table, rows):
+        self.cache.invalidate(table, *CACHE_DEPENDENTS.get(table, ()))
+        mirror = (self.mirrors or {}).get(table)
+        if mirror:
+            mirror.apply(rows)
+
+# ---------------- FUNCIONES AUXILIARES ----------------
+@st.cache_resource
+def get_geocoder():
+    """Servicio de geocodificación compartido por todas las sesiones del proceso."""
+    google = GoogleGeocoder(st.secrets["GOOGLE_MAPS_API_KEY"], session=get_http_session())
+    backend = traced("google.geocode")(google)
+    store = GeocodeStore(st.secrets.get("GEOCODE_CACHE_PATH", "geocode_cache.sqlite3"))
+    return GeocodingService(backend, store)
+
+@st.cache_resource
+def get_route_cache():
+    """Rutas ya optimizadas por selección de entregas y almacén."""
+    from route_cache import RouteResultCache
+
+    return RouteResultCache(max_entries=int(st.secrets.get("ROUTE_CACHE_ENTRIES", 500)))
+
+@st.cache_resource
+def get_road_graph():
+    """Red vial del extracto OSM_EXTRACT (.osm o .npz ya convertido), o None si no está configurado."""
+    path = st.secrets.get("OSM_EXTRACT")
+    if not path:
+        return None
+    from road_network import load_road_graph
+
+    return load_road_graph(path)
+
+@st.cache_resource
+def get_matrix_store():
+    """Matrices de distancia/duración persistentes, compartidas por todas las sesiones.
+
+    Con red vial los costos salen de las calles y se guardan aparte, por
+    extracto, para no mezclarlos con las estimaciones en línea recta.
+    """
+    # matrix_store trae numpy y el optimizador: solo se cargan cuando una página los usa
+    from matrix_store import MatrixStore
+
+    directory = st.secrets.get("MATRIX_STORE_DIR", "matrix_store")
+    graph = get_road_graph()
+    if graph is None:
+        return MatrixStore(directory)
+    return MatrixStore(os.path.join(directory, f"osm-{graph.signature}"), cost_fn=traced("road.costs")(graph.costs))
+
+@st.cache_resource
+def get_job_queue():
+    """Cola de trabajos en segundo plano compartida por todas las sesiones del proceso."""
+    from jobs import JobQueue
+
+    return JobQueue(max_workers=int(st.secrets.get("OPTIMIZATION_WORKERS", 2)))
+
+def precompute_locations(locations):
+    """Calcula en segundo plano las filas de matriz de ubicaciones nuevas {clave: (lat, lng)}.
+
+    Con red vial cada ubicación nueva son búsquedas de Dijkstra contra todas
+    las demás: no deben bloquear el formulario que la creó.
+    """
+    if not locations:
+        return None
+    from jobs import idempotency_key
+
+    store = get_matrix_store()
+    return get_job_queue().submit(idempotency_key("matrix", sorted(locations)), lambda report: store.ensure(locations))
+
+@st.cache_resource
+def get_route_rollups():
+    """Agregados diarios en memoria para cuando la tabla route_daily_rollups no está instalada."""
+    return RouteRollups()
+
+@st.cache_resource
+def get_report_cache():
+    """PDFs ya generados por huella de sus datos, compartidos entre sesiones."""
+    from reports import ReportCache  # fpdf se carga solo en las páginas con PDF
+
+    return ReportCache(max_bytes=int(st.secrets.get("REPORT_CACHE_MB", 64)) * 1024 * 1024)
+
+def get_coordinates(address):
+    return get_geocoder().geocode(address)
+
+def geocode_address(address):
+    """Devuelve lat/lng reales de una dirección en Pacasmayo usando la API de Google."""
+    coords = get_geocoder().geocode(address)
+    if coords:
+        return {"address": address, **coords}
+    return None
@@ -0,0 +1,212 @@
+"""Servicio de geocodificación con caché persistente para direcciones de Pacasmayo."""
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import requests
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Abreviaturas frecuentes en direcciones peruanas, para que "Jr." y "Jirón" compartan clave.
+# Las palabras de una letra nunca se reescriben: "Mz. N" y "Mz. Ñ" son manzanas distintas.
+ABBREVIATIONS = {
+    "jr": "jiron",
+    "av": "avenida",
+    "ca": "calle",
+    "cl": "calle",
+    "psj": "pasaje",
+    "pje": "pasaje",
+    "mz": "manzana",
+    "urb": "urbanizacion",
+    "nro": "numero",
+}
+LOCALITY_WORDS = {"pacasmayo", "peru", "la", "libertad"}
+
+
+def normalize_address(address):
+    """Clave canónica de una dirección: sin tildes, mayúsculas, puntuación ni localidad.
+
+    La localidad solo se quita cuando va después de una coma (", Pacasmayo,
+    La Libertad"): dentro de la calle es parte del nombre ("Calle La Libertad").
+    """
+    text = unicodedata.normalize("NFKD", (address or "").lower())
+    text = text.replace("n\u0303", "ñ")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    segments = [re.findall(r"[a-z0-9ñ]+", part) for part in text.split(",")]
+    # La localidad se agrega siempre en la consulta, así que no distingue direcciones
+    while len(segments) > 1 and all(w in LOCALITY_WORDS for w in segments[-1]):
+        segments.pop()
+    return " ".join(ABBREVIATIONS.get(w, w) for part in segments for w in part)
+
+
+class GeocodingError(RuntimeError):
+    """Google respondió sin resultado por un motivo distinto de que la dirección no exista."""
+
+
+class GoogleGeocoder:
+    """Backend real: Google Geocoding API restringida a Pacasmayo.
+
+    Devuelve None solo con ZERO_RESULTS (la dirección no existe, se puede
+    recordar); OVER_QUERY_LIMIT, REQUEST_DENIED, etc. llegan con HTTP 200 y se
+    elevan como GeocodingError para que no queden en la caché negativa.
+    """
+
+    def __init__(self, api_key, timeout=10, session=None):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = session or requests
+
+    def __call__(self, address):
+        r = self.session.get(
+            GEOCODE_URL,
+            params={"address": f"{address},Pacasmayo,Peru", "key": self.api_key},
+            timeout=self.timeout,
+        )
+        r.raise_for_status()
+        data = r.json()
+        status = data.get("status")
+        if status == "ZERO_RESULTS" or (status == "OK" and not data.get("results")):
+            return None
+        if status != "OK":
+            raise GeocodingError(f"{status}: {data.get('error_message', 'sin detalle')}")
+        loc = data["results"][0]["geometry"]["location"]
+        return {"lat": loc["lat"], "lng": loc["lng"]}
+
+
+class StubGeocoder:
+    """Backend local para pruebas: responde desde un diccionario y cuenta las llamadas."""
+
+    def __init__(self, known=None):
+        self.known = {normalize_address(k): v for k, v in (known or {}).items()}
+        self.calls = 0
+
+    def __call__(self, address):
+        self.calls += 1
+        return self.known.get(normalize_address(address))
+
+
+class GeocodeStore:
+    """Caché persistente en SQLite: clave normalizada -> coordenadas (o ausencia).
+
+    La tabla lleva la versión de `normalize_address`: las claves de la versión
+    anterior juntaban direcciones distintas y no se reutilizan.
+    """
+
+    def __init__(self, path=":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_v2 ("
+            " key TEXT PRIMARY KEY, lat REAL, lng REAL, found INTEGER NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT lat, lng, found, stored_at FROM geocode_v2 WHERE key = ?", (key,)
+            ).fetchone()
+
+    def put(self, key, coords):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_v2 (key, lat, lng, found, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (key, coords["lat"] if coords else None, coords["lng"] if coords else None,
+                 1 if coords else 0, time.time()),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM geocode_v2").fetchone()[0]
+
+
+class GeocodingService:
+    """Geocodificación con caché persistente, TTL, caché negativa y deduplicación.
+
+    Varias sesiones que piden la misma dirección a la vez comparten una sola
+    llamada al backend. Las direcciones no encontradas (el backend devuelve
+    None) se recuerdan durante `negative_ttl` para no gastar cuota
+    repitiéndolas; los errores de red y de cuota (excepciones) no se guardan.
+    Con `raise_errors=True` el error se propaga, también a quienes esperaban
+    la misma llamada, para que puedan reintentar.
+    """
+
+    def __init__(self, backend, store=None, ttl=90 * 24 * 3600, negative_ttl=24 * 3600):
+        self.backend = backend
+        self.store = store or GeocodeStore()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._inflight = {}  # clave -> (evento, [resultado, excepción])
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def geocode(self, address, raise_errors=False, throttle=None):
+        """Coordenadas {lat, lng} o None; `throttle()` se llama solo antes de ir al backend."""
+        key = normalize_address(address)
+        if not key:
+            return None
+
+        row = self.store.get(key)
+        if row:
+            lat, lng, found, stored_at = row
+            if time.time() - stored_at < (self.ttl if found else self.negative_ttl):
+                with self._lock:
+                    if found:
+                        self.hits += 1
+                    else:
+                        self.negative_hits += 1
+                return {"lat": lat, "lng": lng} if found else None
+
+        with self._lock:
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                waiting = self._inflight[key] = (threading.Event(), [None, None])
+                owner = True
+                self.misses += 1
+            else:
+                owner = False
+                self.hits += 1
+        event, result = waiting
+
+        if not owner:
+            event.wait()
+            if result[1] is not None and raise_errors:
+                raise result[1]
+            return result[0]
+
+        try:
+            if throttle:
+                throttle()
+            coords = self.backend(address)
+            self.store.put(key, coords)
+            result[0] = coords
+            return coords
+        except Exception as e:
+            result[1] = e
+            with self._lock:
+                self.errors += 1
+            if raise_errors:
+                raise
+            return None
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                "stored": len(self.store),
+            }
@@ -0,0 +1,123 @@
+"""Decodificación vectorizada de polilíneas y simplificación según el zoom del mapa."""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+EARTH_CIRCUMFERENCE_M = 40075016.686
+TILE_SIZE = 256
+
+
+def decode_polyline_array(encoded, precision=5):
+    """Decodifica una polilínea de Google a arreglos contiguos (lat, lon) sin bucles en Python.
+
+    Cada valor es una serie de grupos de 5 bits (caracter - 63) donde el bit
+    0x20 indica que sigue otro grupo; se suman todos los grupos a la vez con
+    reduceat y luego se acumulan los deltas.
+    """
+    if not encoded:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty
+    chunks = np.frombuffer(encoded.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    last = chunks < 0x20
+    starts = np.concatenate(([0], np.nonzero(last)[0][:-1] + 1))
+    group = np.cumsum(np.concatenate(([0], last[:-1])))
+    shift = 5 * (np.arange(len(chunks)) - starts[group])
+    values = np.add.reduceat((chunks & 0x1F) << shift, starts)
+    deltas = (values >> 1) ^ -(values & 1)
+    coords = np.cumsum(deltas[: len(deltas) // 2 * 2].reshape(-1, 2), axis=0) / 10 ** precision
+    return np.ascontiguousarray(coords[:, 0]), np.ascontiguousarray(coords[:, 1])
+
+
+def tolerance_for_zoom(zoom, lat, pixels=1.0):
+    """Metros que ocupa `pixels` píxeles en un mapa web Mercator a ese zoom y latitud."""
+    meters_per_pixel = EARTH_CIRCUMFERENCE_M * math.cos(math.radians(lat)) / (TILE_SIZE * 2 ** zoom)
+    return pixels * meters_per_pixel
+
+
+def douglas_peucker(lat, lon, tolerance_m):
+    """Índices de los puntos que se conservan al simplificar con Douglas–Peucker.
+
+    Procesa todos los tramos pendientes a la vez: en cada pasada cada punto
+    intermedio se mide contra el segmento entre sus puntos conservados vecinos,
+    y el máximo por tramo se obtiene con reduceat. Son tantas pasadas como
+    niveles tenga la recursión, no una llamada a numpy por tramo.
+    """
+    n = len(lat)
+    if n <= 2:
+        return np.arange(n)
+    # Proyección local en metros, suficiente a escala de una ciudad
+    mean_lat = math.radians(float(np.mean(lat)))
+    x = np.radians(lon) * math.cos(mean_lat) * 6371008.8
+    y = np.radians(lat) * 6371008.8
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    active = np.arange(1, n - 1)  # puntos dentro de tramos todavía abiertos, en orden
+    while active.size:
+        kept = np.flatnonzero(keep)
+        segment = np.searchsorted(kept, active)
+        first, last = kept[segment - 1], kept[segment]
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[active] - x[first], y[active] - y[first]
+        seg_len2 = dx * dx + dy * dy
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.where(seg_len2 > 0, np.clip((px * dx + py * dy) / seg_len2, 0.0, 1.0), 0.0)
+        dist = np.hypot(px - t * dx, py - t * dy)
+
+        starts = np.flatnonzero(np.concatenate(([True], segment[1:] != segment[:-1])))
+        group = np.zeros(active.size, dtype=np.int64)
+        group[starts[1:]] = 1
+        group = np.cumsum(group)
+        seg_max = np.maximum.reduceat(dist, starts)
+        # Primer punto que alcanza el máximo de su tramo (igual que argmax)
+        at_max = np.flatnonzero(dist == seg_max[group])
+        first_at_max = at_max[np.concatenate(([True], group[at_max][1:] != group[at_max][:-1]))]
+        split = seg_max > tolerance_m
+        keep[active[first_at_max[split]]] = True
+        active = active[split[group] & ~keep[active]]
+    return np.nonzero(keep)[0]
+
+
+class GeometryCache:
+    """LRU de geometrías decodificadas y simplificadas por (ruta, polilínea, zoom)."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, encoded, zoom=None, route_id=None, pixels=1.0):
+        """(lat, lon) de la polilínea; con `zoom` se quita el detalle que no se vería."""
+        # La huella de la polilínea va siempre en la clave: si otra sesión o proceso reescribió
+        # la ruta, la geometría vieja no se vuelve a servir aunque `invalidate` no haya corrido aquí
+        key = (route_id, hashlib.sha1(encoded.encode()).hexdigest(), zoom, pixels)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        lat, lon = decode_polyline_array(encoded)
+        if zoom is not None and len(lat) > 2:
+            keep = douglas_peucker(lat, lon, tolerance_for_zoom(zoom, float(lat.mean()), pixels))
+            lat, lon = lat[keep], lon[keep]
+        lat.setflags(write=False)
+        lon.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (lat, lon)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return lat, lon
+
+    def invalidate(self, route_id):
+        """Descarta todas las versiones (zooms) de una ruta cuya geometría cambió."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == route_id]:
+                del self._entries[key]
@@ -0,0 +1,65 @@
+"""Sesión HTTP compartida con keep-alive, reintentos y medición de reutilización."""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Solo se reintentan métodos idempotentes: un POST a n8n guarda una ruta
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter con timeout por defecto para las llamadas que no indican uno."""
+
+    def __init__(self, timeout=(5, 30), **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def pooled_session(pool_size=10, hosts=4, retries=3, backoff=0.5, timeout=(5, 30)):
+    """Sesión `requests` segura para usar desde varios hilos.
+
+    Mantiene hasta `pool_size` conexiones vivas por host (para `hosts` hosts
+    distintos) y reintenta con espera exponencial los métodos idempotentes
+    ante errores de conexión o respuestas 429/5xx.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=IDEMPOTENT_METHODS,
+        raise_on_status=False,
+    )
+    adapter = PooledAdapter(
+        timeout=timeout, pool_connections=hosts, pool_maxsize=pool_size, pool_block=False, max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session_stats(session):
+    """Peticiones y conexiones abiertas por host; reuse_rate = peticiones sin conexión nueva."""
+    requests_total, connections = 0, 0
+    hosts = {}
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        manager = adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            requests_total += pool.num_requests
+            connections += pool.num_connections
+            hosts[pool.host] = {"requests": pool.num_requests, "connections": pool.num_connections}
+    return {
+        "requests": requests_total,
+        "connections": connections,
+        "reuse_rate": 1 - connections / requests_total if requests_total else 0.0,
+        "hosts": hosts,
+    }
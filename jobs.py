@@ -0,0 +1,108 @@
+"""Cola de trabajos en segundo plano para optimizaciones largas."""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def idempotency_key(*parts):
+    """Clave estable para una solicitud: mismo contenido, misma clave."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "En cola"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Ejecuta trabajos en un pool de hilos y guarda su estado para consultarlo.
+
+    `submit(key, fn)` devuelve el id de un trabajo activo con la misma clave si
+    existe, así un doble clic o un rerun no lanzan dos veces el mismo cálculo.
+    `fn(report)` recibe `report(progreso, mensaje)` para informar avance (0 a 1).
+    Los trabajos terminados se olvidan después de `keep` segundos.
+    """
+
+    def __init__(self, max_workers=2, keep=3600):
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route-job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}  # clave -> id de trabajo en cola o en ejecución
+
+    def submit(self, key, fn):
+        with self._lock:
+            self._prune()
+            if key in self._active:
+                return self._active[key]
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+        self._pool.submit(self._run, job, fn)
+        return job.id
+
+    def add_result(self, key, result):
+        """Registra como terminado un resultado ya conocido (p. ej. desde caché)."""
+        job = Job(key)
+        job.status, job.progress, job.message = DONE, 1.0, "Listo"
+        job.result, job.finished_at = result, time.time()
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def _run(self, job, fn):
+        def report(progress, message=None):
+            with self._lock:
+                job.progress = max(0.0, min(1.0, progress))
+                if message:
+                    job.message = message
+
+        report(0.05, "En ejecución")
+        with self._lock:
+            job.status = RUNNING
+        try:
+            result = fn(report)
+            with self._lock:
+                job.result, job.status, job.progress, job.message = result, DONE, 1.0, "Listo"
+        except Exception as e:
+            with self._lock:
+                job.error, job.status, job.message = str(e), FAILED, "Falló"
+        finally:
+            with self._lock:
+                job.finished_at = time.time()
+                self._active.pop(job.key, None)
+
+    def _prune(self):
+        limit = time.time() - self.keep
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < limit]:
+            del self._jobs[job_id]
@@ -0,0 +1,13 @@
+"""Claves de ubicación de MatrixStore.
+
+Viven aparte del optimizador para que las páginas que solo registran
+ubicaciones (entregas, almacenes) no carguen numpy ni el solver.
+"""
+
+
+def depot_key(depot):
+    return f"depot:{depot['lat']:.6f},{depot['lng']:.6f}"
+
+
+def delivery_key(delivery):
+    return f"delivery:{delivery['id']}"
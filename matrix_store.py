@@ -0,0 +1,249 @@
+"""Almacén persistente de matrices de distancia/duración entre ubicaciones.
+
+Cada ubicación (entrega o almacén) tiene un índice fijo en arreglos float32
+mapeados a disco; agregar una ubicación calcula solo su fila y su columna.
+Las optimizaciones leen submatrices en vez de recalcular todos los pares.
+Pensado para un solo proceso escritor (el servidor de Streamlit).
+
+Archivos: `index.json` (instantánea del índice y número de generación),
+`index.<gen>.log` (ubicaciones agregadas o movidas desde la instantánea) y
+`<matriz>.<gen>.bin`. Crecer o compactar escribe una generación nueva completa
+y recién después reemplaza `index.json`, así un corte a mitad de camino deja
+la generación anterior intacta.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from route_optimizer import estimated_costs
+
+MATRICES = {"distance": np.float32, "duration": np.float32, "computed_at": np.uint32}
+COPY_BLOCK = 4 * 1024 * 1024  # celdas por bloque al copiar entre generaciones
+
+
+class MatrixStore:
+    """Matrices cuadradas (km, minutos, instante de cálculo) indexadas por id de ubicación.
+
+    `cost_fn(origenes, destinos)` devuelve (km, minutos) para dos listas de
+    puntos (lat, lng). Las entradas más antiguas que `max_age` segundos, o las
+    de una ubicación cuyas coordenadas cambiaron, se recalculan al consultarlas.
+    Las ubicaciones que dejan de usarse (entregas entregadas o borradas) se
+    descartan con `retain`.
+    """
+
+    def __init__(self, directory, cost_fn=estimated_costs, max_age=30 * 24 * 3600, initial_capacity=256):
+        self.directory = directory
+        self.cost_fn = cost_fn
+        self.max_age = max_age
+        self.initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        index_path = self._path("index.json")
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                meta = json.load(f)
+            self.index = meta["index"]
+            self.capacity = meta["capacity"]
+            self.generation = meta.get("generation", 0)
+            self.coords = np.array(meta["coords"], dtype=np.float64).reshape(-1, 2)
+            self._replay_log()
+            self._arrays = {name: self._open(name, dtype, "r+") for name, dtype in MATRICES.items()}
+        else:
+            self.index = {}
+            self.capacity = initial_capacity
+            self.generation = 1
+            self.coords = np.empty((0, 2), dtype=np.float64)
+            self._arrays = {name: self._open(name, dtype, "w+") for name, dtype in MATRICES.items()}
+            self._write_index()
+        self._remove_other_generations()
+        self.computed = 0
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _file(self, name, generation):
+        # La generación 0 son los archivos de antes de versionarlos
+        return f"{name}.bin" if generation == 0 else f"{name}.{generation}.bin"
+
+    def _open(self, name, dtype, mode, capacity=None, generation=None):
+        capacity = capacity or self.capacity
+        generation = self.generation if generation is None else generation
+        return np.memmap(self._path(self._file(name, generation)), dtype=dtype, mode=mode,
+                         shape=(capacity, capacity))
+
+    # ---------------- ÍNDICE ----------------
+    def _log_path(self, generation=None):
+        return self._path(f"index.{self.generation if generation is None else generation}.log")
+
+    def _replay_log(self):
+        """Aplica las ubicaciones registradas después de la última instantánea."""
+        if not os.path.exists(self._log_path()):
+            return
+        good = 0
+        with open(self._log_path(), "rb") as f:
+            for line in f:
+                try:
+                    key, i, lat, lng = json.loads(line)
+                except ValueError:
+                    break  # última línea a medio escribir
+                good += len(line)
+                self.index[key] = i
+                if i >= len(self.coords):
+                    self.coords = np.vstack([self.coords, np.zeros((i + 1 - len(self.coords), 2))])
+                self.coords[i] = (lat, lng)
+        if good < os.path.getsize(self._log_path()):
+            os.truncate(self._log_path(), good)
+
+    def _log(self, keys):
+        with open(self._log_path(), "a") as f:
+            for key in keys:
+                i = self.index[key]
+                f.write(json.dumps([key, i, *self.coords[i].tolist()]) + "\n")
+
+    def _write_index(self):
+        """Instantánea atómica: es el punto en que una generación nueva pasa a ser la vigente."""
+        tmp = self._path("index.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({
+                "generation": self.generation,
+                "capacity": self.capacity,
+                "index": self.index,
+                "coords": self.coords.tolist(),
+            }, f)
+        os.replace(tmp, self._path("index.json"))
+
+    def _remove_other_generations(self):
+        current = {self._file(name, self.generation) for name in MATRICES} | {os.path.basename(self._log_path())}
+        for entry in os.listdir(self.directory):
+            if (entry.endswith(".bin") or (entry.startswith("index.") and entry.endswith(".log"))) \
+                    and entry not in current:
+                os.remove(self._path(entry))
+
+    # ---------------- GENERACIONES ----------------
+    def _rewrite(self, rows, capacity, index, coords):
+        """Copia las filas/columnas `rows` a una generación nueva de `capacity` y la activa."""
+        generation = self.generation + 1
+        rows = np.asarray(rows, dtype=np.int64)
+        m = len(rows)
+        contiguous = m == 0 or (rows[0] == 0 and rows[-1] == m - 1)
+        step = max(1, COPY_BLOCK // max(m, 1))
+        arrays = {}
+        for name, dtype in MATRICES.items():
+            old, new = self._arrays[name], self._open(name, dtype, "w+", capacity, generation)
+            for start in range(0, m, step):
+                block = rows[start:start + step]
+                if contiguous:
+                    new[start:start + len(block), :m] = old[block[0]:block[-1] + 1, :m]
+                else:
+                    new[start:start + len(block), :m] = old[np.ix_(block, rows)]
+            new.flush()
+            arrays[name] = new
+
+        self.generation, self.capacity, self.index, self.coords = generation, capacity, index, coords
+        self._write_index()
+        self._arrays = arrays
+        self._remove_other_generations()
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        n = len(self.index)
+        self._rewrite(range(n), capacity, self.index, self.coords)
+
+    def needs_compaction(self, keys, min_fraction=0.25, min_inactive=64):
+        """True si suficientes ubicaciones guardadas ya no están en `keys` como para compactar."""
+        with self._lock:
+            inactive = len(self.index) - len(self.index.keys() & set(keys))
+            return inactive >= max(min_inactive, min_fraction * len(self.index))
+
+    def retain(self, keys):
+        """Deja solo las ubicaciones de `keys` y achica los archivos. Devuelve cuántas se quitaron."""
+        keys = set(keys)
+        with self._lock:
+            kept = [k for k, _ in sorted(self.index.items(), key=lambda item: item[1]) if k in keys]
+            removed = len(self.index) - len(kept)
+            if not removed:
+                return 0
+            rows = [self.index[k] for k in kept]
+            capacity = self.initial_capacity
+            while capacity < len(kept):
+                capacity *= 2
+            self._rewrite(rows, capacity, {k: i for i, k in enumerate(kept)}, self.coords[rows])
+            return removed
+
+    # ---------------- COSTOS ----------------
+    def _compute(self, rows):
+        """Recalcula filas y columnas completas de los índices dados."""
+        n = len(self.index)
+        rows = np.asarray(sorted(set(rows)), dtype=np.int64)
+        if not len(rows):
+            return
+        km, minutes = self.cost_fn(self.coords[rows], self.coords[:n])
+        km_back, minutes_back = self.cost_fn(self.coords[:n], self.coords[rows])
+        now = int(time.time())
+        dist, dur, stamp = (self._arrays[k] for k in MATRICES)
+        dist[rows, :n], dur[rows, :n] = km, minutes
+        dist[:n, rows], dur[:n, rows] = km_back, minutes_back
+        stamp[rows, :n] = now
+        stamp[:n, rows] = now
+        self.computed += len(rows) * (2 * n - len(rows))
+
+    def ensure(self, locations):
+        """Registra ubicaciones {id: (lat, lng)}; solo calcula filas nuevas o movidas."""
+        with self._lock:
+            self._ensure(locations)
+
+    def _ensure(self, locations):
+        changed = []
+        new = [k for k in locations if k not in self.index]
+        if new:
+            self._grow(len(self.index) + len(new))
+            for key in new:
+                self.index[key] = len(self.index)
+            self.coords = np.vstack([self.coords, np.zeros((len(new), 2))])
+        for key, point in locations.items():
+            i = self.index[key]
+            if key in new or not np.allclose(self.coords[i], point, atol=1e-7):
+                self.coords[i] = point
+                changed.append(key)
+        if changed:
+            self._compute([self.index[k] for k in changed])
+            self._flush()
+            # Se registra después de escribir las matrices: si el proceso se corta antes, la
+            # ubicación simplemente no existe y se vuelve a calcular en el próximo ensure
+            self._log(changed)
+
+    def submatrix(self, keys, locations=None):
+        """(km, minutos) como float64 para las ubicaciones dadas, en ese orden.
+
+        Con `locations` las registra antes, bajo el mismo lock, así una
+        compactación en paralelo no puede quitarlas entre medio.
+        """
+        with self._lock:
+            if locations:
+                self._ensure(locations)
+            idx = np.array([self.index[k] for k in keys], dtype=np.int64)
+            stamp = self._arrays["computed_at"][np.ix_(idx, idx)]
+            stale = np.unique(np.nonzero(int(time.time()) - stamp.astype(np.int64) > self.max_age)[0])
+            if len(stale):
+                self._compute(idx[stale])
+                self._flush()
+            return (
+                self._arrays["distance"][np.ix_(idx, idx)].astype(np.float64),
+                self._arrays["duration"][np.ix_(idx, idx)].astype(np.float64),
+            )
+
+    def _flush(self):
+        for arr in self._arrays.values():
+            arr.flush()
+
+    def stats(self):
+        with self._lock:
+            return {"locations": len(self.index), "capacity": self.capacity, "pairs_computed": self.computed}
@@ -0,0 +1,379 @@
+"""Red vial local a partir de un extracto de OpenStreetMap, sin llamadas de red.
+
+    python road_network.py pacasmayo.osm        # convierte y guarda pacasmayo.osm.npz
+
+El grafo se guarda como adyacencia CSR (indptr/indices) con longitud en km y
+duración en minutos por arista, en arreglos NumPy. Las entregas y almacenes
+se ajustan al nodo más cercano de la componente principal; las consultas
+punto a punto usan Dijkstra bidireccional y las matrices un Dijkstra de uno
+a muchos por origen (o por destino sobre el grafo invertido).
+"""
+import bz2
+import gzip
+import hashlib
+import heapq
+import math
+import os
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from route_optimizer import AVG_SPEED_KMH, EARTH_RADIUS_KM, estimated_costs, haversine_pairs
+from spatial_index import KM_PER_DEG_LAT
+
+# Velocidades por defecto (km/h) de las vías transitables cuando no hay maxspeed
+HIGHWAY_SPEEDS = {
+    "motorway": 80, "trunk": 60, "primary": 50, "secondary": 40, "tertiary": 35,
+    "unclassified": 30, "residential": 25, "road": 25, "living_street": 10, "service": 15,
+}
+ONEWAY_FORWARD = {"yes", "1", "true"}
+SNAP_CHUNK = 256  # puntos por bloque al buscar el nodo más cercano
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def _highway(tags):
+    highway = tags.get("highway", "")
+    return highway[:-len("_link")] if highway.endswith("_link") else highway
+
+
+def _speed(tags):
+    """km/h de la vía: maxspeed numérico si existe, si no el de su tipo (los *_link como su vía)."""
+    raw = tags.get("maxspeed", "").split(";")[0].strip()
+    if raw.split(" ")[0].replace(".", "", 1).isdigit():
+        value = float(raw.split(" ")[0])
+        return value * 1.609 if raw.endswith("mph") else value
+    return HIGHWAY_SPEEDS[_highway(tags)]
+
+
+def _direction(tags):
+    """1 sentido de dibujo, -1 sentido contrario, 0 doble sentido."""
+    oneway = tags.get("oneway", "").lower()
+    if oneway == "-1":
+        return -1
+    if oneway in ONEWAY_FORWARD or (tags.get("junction") == "roundabout" and oneway != "no"):
+        return 1
+    return 0
+
+
+def parse_osm(path):
+    """Lee un extracto .osm (XML, también .gz/.bz2) y devuelve los arreglos de un RoadGraph.
+
+    Solo se guardan las vías con `highway` transitable en auto; los nodos que
+    ninguna de ellas usa se descartan.
+    """
+    nodes = {}
+    ways = []
+    with _open(path) as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag == "node":
+                nodes[int(elem.get("id"))] = (float(elem.get("lat")), float(elem.get("lon")))
+            elif elem.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                if _highway(tags) in HIGHWAY_SPEEDS and tags.get("access") not in ("no", "private"):
+                    refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                    ways.append((refs, _direction(tags), _speed(tags)))
+            if elem.tag in ("node", "way", "relation"):
+                elem.clear()
+
+    index = {}
+    src, dst, speed = [], [], []
+    for refs, direction, kmh in ways:
+        refs = [r for r in refs if r in nodes]
+        for a, b in zip(refs[:-1], refs[1:]):
+            ia = index.setdefault(a, len(index))
+            ib = index.setdefault(b, len(index))
+            if direction >= 0:
+                src.append(ia), dst.append(ib), speed.append(kmh)
+            if direction <= 0:
+                src.append(ib), dst.append(ia), speed.append(kmh)
+
+    coords = np.array([nodes[osm_id] for osm_id in index], dtype=np.float64).reshape(-1, 2)
+    src, dst = np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+    km = edge_km(coords, src, dst)
+    return coords[:, 0], coords[:, 1], src, dst, km, km / np.array(speed, dtype=np.float64) * 60
+
+
+def edge_km(coords, src, dst):
+    """km en línea recta de cada arista (src[i] -> dst[i]) entre filas (lat, lng) de `coords`."""
+    lat1, lng1 = np.radians(coords[src, 0]), np.radians(coords[src, 1])
+    lat2, lng2 = np.radians(coords[dst, 0]), np.radians(coords[dst, 1])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _csr(n, src, dst, *weights):
+    """indptr, indices y pesos ordenados por nodo de origen."""
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return (indptr, dst[order].astype(np.int32)) + tuple(w[order] for w in weights)
+
+
+class RoadGraph:
+    """Grafo dirigido en CSR con km y minutos por arista.
+
+    Los arreglos NumPy son la forma guardada (`save`/`load`); para las
+    búsquedas se copian una vez a listas de Python, que se indexan mucho más
+    rápido elemento a elemento dentro de heapq.
+    """
+
+    def __init__(self, lat, lon, indptr, indices, km, minutes):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.km = np.asarray(km, dtype=np.float32)
+        self.minutes = np.asarray(minutes, dtype=np.float32)
+        n = len(self.lat)
+
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))
+        self._forward = (self.indptr.tolist(), self.indices.tolist(), self.minutes.tolist(), self.km.tolist())
+        r_indptr, r_indices, r_minutes, r_km = _csr(n, self.indices.astype(np.int64), src, self.minutes, self.km)
+        self._backward = (r_indptr.tolist(), r_indices.tolist(), r_minutes.tolist(), r_km.tolist())
+
+        # Proyección equirectangular (km) para ajustar puntos a nodos
+        self._km_per_deg_lng = KM_PER_DEG_LAT * math.cos(math.radians(float(self.lat.mean()) if n else 0.0))
+        self._xy = np.column_stack([self.lon * self._km_per_deg_lng, self.lat * KM_PER_DEG_LAT])
+        self._snappable = np.nonzero(self._main_component())[0]
+        self._lock = threading.Lock()
+        self.searches = 0
+
+    @classmethod
+    def from_edges(cls, lat, lon, src, dst, km, minutes):
+        indptr, indices, km, minutes = _csr(len(lat), np.asarray(src), np.asarray(dst),
+                                            np.asarray(km), np.asarray(minutes))
+        return cls(lat, lon, indptr, indices, km, minutes)
+
+    @classmethod
+    def from_osm(cls, path):
+        return cls.from_edges(*parse_osm(path))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(*(data[k] for k in ("lat", "lon", "indptr", "indices", "km", "minutes")))
+
+    def save(self, path):
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, lat=self.lat, lon=self.lon, indptr=self.indptr, indices=self.indices,
+                            km=self.km, minutes=self.minutes)
+        os.replace(tmp, path)
+
+    @property
+    def signature(self):
+        """Huella corta del grafo: cambia si cambia el extracto."""
+        digest = hashlib.sha256()
+        for arr in (self.indptr, self.indices, self.minutes):
+            digest.update(arr.tobytes())
+        return digest.hexdigest()[:12]
+
+    def stats(self):
+        return {"nodes": len(self.lat), "edges": len(self.indices), "snappable": len(self._snappable),
+                "searches": self.searches}
+
+    # ---------------- COMPONENTE PRINCIPAL ----------------
+    def _reach(self, start, adjacency):
+        indptr, indices = adjacency[0], adjacency[1]
+        seen = bytearray(len(indptr) - 1)
+        seen[start] = 1
+        stack = [start]
+        while stack:
+            u = stack.pop()
+            for v in indices[indptr[u]:indptr[u + 1]]:
+                if not seen[v]:
+                    seen[v] = 1
+                    stack.append(v)
+        return np.frombuffer(bytes(seen), dtype=np.uint8).astype(bool)
+
+    def _main_component(self):
+        """Nodos a los que se llega y desde los que se vuelve al nodo de mayor grado.
+
+        Evita ajustar una entrega a un estacionamiento o a un tramo suelto del
+        extracto desde el que no hay camino al resto de la ciudad.
+        """
+        if not len(self.lat):
+            return np.zeros(0, dtype=bool)
+        degree = np.diff(self.indptr) + np.diff(np.asarray(self._backward[0]))
+        hub = int(np.argmax(degree))
+        return self._reach(hub, self._forward) & self._reach(hub, self._backward)
+
+    # ---------------- AJUSTE A NODOS ----------------
+    def snap(self, points):
+        """(nodos, km de acceso) del nodo de la componente principal más cercano a cada (lat, lng)."""
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        xy = np.column_stack([pts[:, 1] * self._km_per_deg_lng, pts[:, 0] * KM_PER_DEG_LAT])
+        candidates = self._xy[self._snappable]
+        nodes = np.empty(len(pts), dtype=np.int64)
+        access = np.empty(len(pts), dtype=np.float64)
+        for start in range(0, len(pts), SNAP_CHUNK):
+            block = xy[start:start + SNAP_CHUNK]
+            d2 = ((block[:, None, :] - candidates[None, :, :]) ** 2).sum(axis=2)
+            best = np.argmin(d2, axis=1)
+            nodes[start:start + SNAP_CHUNK] = self._snappable[best]
+            access[start:start + SNAP_CHUNK] = np.sqrt(d2[np.arange(len(block)), best])
+        return nodes, access
+
+    # ---------------- BÚSQUEDAS ----------------
+    @staticmethod
+    def _one_to_many(adjacency, source, targets):
+        """Dijkstra por minutos desde `source` hasta fijar todos los `targets`: {nodo: (min, km)}."""
+        indptr, indices, minutes, km = adjacency
+        push, pop = heapq.heappush, heapq.heappop
+        best = [math.inf] * (len(indptr) - 1)
+        dist_km = best[:]
+        best[source] = dist_km[source] = 0.0
+        remaining = set(targets)
+        found = {}
+        heap = [(0.0, source)]
+        while heap and remaining:
+            d, u = pop(heap)
+            if d > best[u]:
+                continue
+            if u in remaining:
+                remaining.discard(u)
+                found[u] = (d, dist_km[u])
+            u_km = dist_km[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + minutes[e]
+                if nd < best[v]:
+                    best[v] = nd
+                    dist_km[v] = u_km + km[e]
+                    push(heap, (nd, v))
+        return found
+
+    def shortest_path(self, source, target):
+        """Dijkstra bidireccional por minutos entre dos nodos: (minutos, km, [nodos]) o None."""
+        with self._lock:
+            self.searches += 1
+        if source == target:
+            return 0.0, 0.0, [source]
+        sides = (
+            (self._forward, {source: 0.0}, {source: None}, [(0.0, source)]),
+            (self._backward, {target: 0.0}, {target: None}, [(0.0, target)]),
+        )
+        best, meet = math.inf, None
+        while sides[0][3] and sides[1][3]:
+            if sides[0][3][0][0] + sides[1][3][0][0] >= best:
+                break
+            side = 0 if sides[0][3][0][0] <= sides[1][3][0][0] else 1
+            (indptr, indices, minutes, _), dist, parent, heap = sides[side]
+            other = sides[1 - side][1]
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + minutes[e]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    parent[v] = (u, e)
+                    heapq.heappush(heap, (nd, v))
+                    if v in other and nd + other[v] < best:
+                        best, meet = nd + other[v], v
+        if meet is None:
+            return None
+
+        nodes, total_km = [], 0.0
+        node = meet
+        while sides[0][2][node] is not None:
+            node, e = sides[0][2][node]
+            nodes.append(node)
+            total_km += self._forward[3][e]
+        nodes.reverse()
+        node = meet
+        nodes.append(meet)
+        while sides[1][2][node] is not None:
+            node, e = sides[1][2][node]
+            nodes.append(node)
+            total_km += self._backward[3][e]
+        return best, total_km, nodes
+
+    # ---------------- COSTOS Y GEOMETRÍA ----------------
+    def costs(self, origins, destinations):
+        """(km, minutos) por calles entre dos listas de (lat, lng); misma firma que `estimated_costs`.
+
+        Se suma el tramo en línea recta de cada punto a su nodo. Los pares sin
+        camino (no debería haberlos dentro de la componente principal) usan la
+        estimación en línea recta.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+        o_nodes, o_access = self.snap(origins)
+        d_nodes, d_access = self.snap(destinations)
+        net_min = np.full((len(origins), len(destinations)), np.nan)
+        net_km = np.full_like(net_min, np.nan)
+
+        # Una búsqueda por origen distinto, o por destino distinto sobre el grafo invertido
+        forward = len(set(o_nodes.tolist())) <= len(set(d_nodes.tolist()))
+        sources, targets = (o_nodes, d_nodes) if forward else (d_nodes, o_nodes)
+        adjacency = self._forward if forward else self._backward
+        for source in set(sources.tolist()):
+            found = self._one_to_many(adjacency, source, set(targets.tolist()))
+            rows = np.nonzero(sources == source)[0]
+            for j, target in enumerate(targets.tolist()):
+                if target in found:
+                    i, k = (rows, j) if forward else (j, rows)
+                    net_min[i, k], net_km[i, k] = found[target]
+        with self._lock:
+            self.searches += len(set(sources.tolist()))
+
+        access_km = o_access[:, None] + d_access[None, :]
+        km = net_km + access_km
+        minutes = net_min + access_km / AVG_SPEED_KMH * 60
+        missing = np.isnan(km)
+        if missing.any():
+            est_km, est_min = estimated_costs(origins, destinations)
+            km[missing], minutes[missing] = est_km[missing], est_min[missing]
+        same = haversine_pairs(origins, destinations) < 1e-6
+        km[same] = minutes[same] = 0.0
+        return km, minutes
+
+    def route_geometry(self, points):
+        """Puntos (lat, lng) del recorrido por calles que pasa por `points` en orden."""
+        points = [tuple(p) for p in points]
+        if len(points) < 2:
+            return points
+        nodes, _ = self.snap(points)
+        path = [points[0]]
+        for a, b, (na, nb) in zip(points[:-1], points[1:], zip(nodes[:-1].tolist(), nodes[1:].tolist())):
+            found = self.shortest_path(na, nb)
+            if found is not None:
+                path.extend((float(self.lat[n]), float(self.lon[n])) for n in found[2])
+            path.append(b)
+        return path
+
+
+def load_road_graph(path):
+    """RoadGraph de un .npz ya convertido, o de un extracto .osm guardando `<extracto>.npz` al lado."""
+    if path.endswith(".npz"):
+        return RoadGraph.load(path)
+    cached = f"{path}.npz"
+    if os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(path):
+        return RoadGraph.load(cached)
+    graph = RoadGraph.from_osm(path)
+    try:
+        graph.save(cached)
+    except OSError:
+        pass  # directorio de solo lectura: se vuelve a convertir en el próximo arranque
+    return graph
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("uso: python road_network.py <extracto.osm[.gz|.bz2]>")
+    started = time.perf_counter()
+    graph = load_road_graph(sys.argv[1])
+    stats = graph.stats()
+    print(f"{stats['nodes']} nodos, {stats['edges']} aristas, {stats['snappable']} en la componente principal "
+          f"({time.perf_counter() - started:.2f} s)")
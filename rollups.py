@@ -0,0 +1,154 @@
+"""Agregados diarios de rutas (por día, vehículo y almacén) mantenidos por diferencias.
+
+Es el respaldo en Python de la tabla `route_daily_rollups`
+(sql/route_daily_rollups.sql): ambos producen filas con la misma forma.
+"""
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+# Pacasmayo no usa horario de verano: los días se cortan a medianoche UTC-5
+LOCAL_TZ = timezone(timedelta(hours=-5))
+TOTALS = ("route_count", "total_distance_km", "total_duration_min", "total_deliveries")
+
+
+def rollup_day(created_at):
+    """Fecha local (YYYY-MM-DD) de un timestamp ISO de Supabase."""
+    moment = datetime.fromisoformat(str(created_at).replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(LOCAL_TZ).date().isoformat()
+
+
+def depot_lookup(depots):
+    """{(lat, lng): id} para reconocer el almacén guardado en la secuencia de una ruta."""
+    return {
+        (d["coordinates"]["lat"], d["coordinates"]["lng"]): str(d["id"])
+        for d in depots if d.get("coordinates")
+    }
+
+
+class RouteRollups:
+    """Totales por (día, vehículo, almacén) que solo recalculan los días tocados.
+
+    `sync(filas)` compara cada ruta con lo que aportaba antes; las rutas nuevas,
+    modificadas o borradas marcan su día como sucio y solo esos días se vuelven
+    a sumar. Las filas traen id, created_at, total_distance_km,
+    estimated_duration_minutes, delivery_ids, vehicle_id, depot_id y depot
+    (lat/lng, para rutas guardadas sin depot_id).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # id -> (día, vehículo, almacén, km, min, entregas)
+        self._by_day = {}  # día -> set de ids
+        self._days = {}    # día -> {(vehículo, almacén): totales}
+        self.recomputed_days = 0
+
+    def _contribution(self, row, depots):
+        depot = row.get("depot") or {}
+        return (
+            rollup_day(row["created_at"]),
+            str(row.get("vehicle_id") or ""),
+            str(row.get("depot_id") or depots.get((depot.get("lat"), depot.get("lng")), "")),
+            float(row.get("total_distance_km") or 0),
+            float(row.get("estimated_duration_minutes") or 0),
+            len(row.get("delivery_ids") or []),
+        )
+
+    def sync(self, rows, depots=(), days=None):
+        """Deja los agregados al día con las rutas dadas; devuelve los días recalculados.
+
+        Con `days` = (inicio, fin) las filas son solo las de ese periodo: las
+        rutas conocidas de otros días no se dan por borradas.
+        """
+        lookup = depot_lookup(depots)
+        if days is not None:
+            days = (str(days[0]), str(days[1]))
+        with self._lock:
+            dirty, seen = set(), set()
+            for row in rows:
+                if not row.get("created_at"):
+                    continue
+                key = row["id"]
+                seen.add(key)
+                new = self._contribution(row, lookup)
+                old = self._routes.get(key)
+                if old == new:
+                    continue
+                if old:
+                    self._by_day[old[0]].discard(key)
+                    dirty.add(old[0])
+                self._routes[key] = new
+                self._by_day.setdefault(new[0], set()).add(key)
+                dirty.add(new[0])
+            gone = [
+                k for k, route in self._routes.items()
+                if k not in seen and (days is None or days[0] <= route[0] <= days[1])
+            ]
+            for key in gone:
+                day = self._routes.pop(key)[0]
+                self._by_day[day].discard(key)
+                dirty.add(day)
+            for day in dirty:
+                self._recompute(day)
+            return sorted(dirty)
+
+    def _recompute(self, day):
+        groups = {}
+        for key in self._by_day.get(day, ()):
+            _, vehicle, depot, km, minutes, stops = self._routes[key]
+            g = groups.setdefault((vehicle, depot), [0, 0.0, 0.0, 0])
+            g[0] += 1
+            g[1] += km
+            g[2] += minutes
+            g[3] += stops
+        if groups:
+            self._days[day] = groups
+        else:
+            self._days.pop(day, None)
+            self._by_day.pop(day, None)
+        self.recomputed_days += 1
+
+    def query(self, start, end):
+        """Filas de agregados entre dos fechas (inclusive), igual que la tabla SQL."""
+        start, end = str(start), str(end)
+        with self._lock:
+            return [
+                {"day": day, "vehicle_id": vehicle, "depot_id": depot, **dict(zip(TOTALS, totals))}
+                for day in sorted(d for d in self._days if start <= d <= end)
+                for (vehicle, depot), totals in sorted(self._days[day].items())
+            ]
+
+
+def summarize_rollups(rows, by="day"):
+    """Combina filas diarias agrupando por `by` (day, vehicle_id o depot_id) y agrega promedios."""
+    groups = {}
+    for row in rows:
+        key = row[by] if by else ""
+        g = groups.setdefault(key, dict.fromkeys(TOTALS, 0))
+        for field in TOTALS:
+            g[field] += row.get(field) or 0
+    result = []
+    for key, g in sorted(groups.items()):
+        n = g["route_count"]
+        result.append({
+            by or "total": key,
+            **g,
+            "avg_distance_km": g["total_distance_km"] / n if n else None,
+            "avg_duration_min": g["total_duration_min"] / n if n else None,
+            "deliveries_per_route": g["total_deliveries"] / n if n else None,
+        })
+    return result
+
+
+def default_range(days=30, today=None):
+    """Últimos `days` días hasta hoy (hora local)."""
+    today = today or datetime.now(LOCAL_TZ).date()
+    return today - timedelta(days=days - 1), today
+
+
+def day_bounds(start: date, end: date):
+    """Límites ISO en UTC [inicio, fin) de un rango de días locales, para filtrar created_at."""
+    lo = datetime.combine(start, datetime.min.time(), LOCAL_TZ)
+    hi = datetime.combine(end + timedelta(days=1), datetime.min.time(), LOCAL_TZ)
+    return lo.astimezone(timezone.utc).isoformat(), hi.astimezone(timezone.utc).isoformat()
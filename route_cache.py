@@ -0,0 +1,69 @@
+"""Memoización de rutas optimizadas por conjunto de entregas y almacén."""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def selection_key(deliveries, depot, namespace=""):
+    """Hash canónico: ids ordenados con sus coordenadas, más las del almacén.
+
+    Si cambian las coordenadas de alguna entrega la clave cambia, así que una
+    ruta vieja nunca se devuelve para datos nuevos.
+    """
+    members = sorted(
+        (str(d["id"]), round(d["customer_coordinates"]["lat"], 6), round(d["customer_coordinates"]["lng"], 6))
+        for d in deliveries
+    )
+    origin = (round(depot["lat"], 6), round(depot["lng"], 6)) if depot else None
+    raw = json.dumps([namespace, members, origin])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class RouteResultCache:
+    """LRU de resultados de optimización, con índice inverso id de entrega -> claves."""
+
+    def __init__(self, max_entries=500):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clave -> (ids, resultado)
+        self._by_delivery = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, deliveries, result):
+        ids = [str(d["id"]) for d in deliveries]
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (ids, result)
+            for i in ids:
+                self._by_delivery.setdefault(i, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_deliveries(self, ids):
+        """Olvida las rutas que incluyen alguna de estas entregas."""
+        with self._lock:
+            for i in ids:
+                for key in list(self._by_delivery.get(str(i), ())):
+                    self._drop(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for i in entry[0]:
+                keys = self._by_delivery.get(i)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_delivery[i]
@@ -0,0 +1,603 @@
+"""Optimizador de rutas local: matriz de distancias vectorizada + heurística y búsqueda local.
+
+Alternativa al webhook de n8n. Devuelve el mismo formato que la respuesta de
+n8n (`total_distance_km`, `estimated_duration_minutes`, `optimized_sequence`)
+para que la página lo dibuje sin cambios.
+"""
+import time
+
+import numpy as np
+import polyline
+
+from keys import delivery_key, depot_key
+
+EARTH_RADIUS_KM = 6371.0088
+# Las calles no van en línea recta: factor de rodeo promedio y velocidad urbana.
+ROAD_FACTOR = 1.3
+AVG_SPEED_KMH = 25.0
+EPS = 1e-9
+
+
+def haversine_pairs(origins, destinations):
+    """Matriz (m, k) de distancias en km entre dos listas de puntos (lat, lng) en grados."""
+    a_pts = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+    b_pts = np.radians(np.asarray(destinations, dtype=np.float64).reshape(-1, 2))
+    lat1, lng1 = a_pts[:, 0][:, None], a_pts[:, 1][:, None]
+    lat2, lng2 = b_pts[:, 0][None, :], b_pts[:, 1][None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(points):
+    """Matriz (n, n) de distancias en km entre puntos (lat, lng) en grados."""
+    return haversine_pairs(points, points)
+
+
+def estimated_costs(origins, destinations, road_factor=ROAD_FACTOR, speed_kmh=AVG_SPEED_KMH):
+    """Costos estimados sin red: (km por calle, minutos) a partir de la distancia en línea recta."""
+    km = haversine_pairs(origins, destinations) * road_factor
+    return km, km / speed_kmh * 60
+
+
+def route_length(route, dist):
+    route = np.asarray(route)
+    return float(dist[route[:-1], route[1:]].sum())
+
+
+def nearest_neighbor(dist, start=0):
+    """Ruta cerrada inicial: siempre al punto no visitado más cercano."""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    route = [start]
+    current = start
+    for _ in range(n - 1):
+        candidates = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(candidates))
+        visited[current] = True
+        route.append(current)
+    route.append(start)
+    return route
+
+
+def two_opt(route, dist, deadline):
+    """Invierte tramos mientras acorte la ruta.
+
+    La matriz puede ser asimétrica (calles de un solo sentido): el costo de
+    invertir un tramo incluye recorrer sus arcos internos al revés, tomado de
+    sumas acumuladas en ambos sentidos.
+    """
+    route = np.asarray(route)
+    n = len(route)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        forward = np.concatenate(([0.0], np.cumsum(dist[route[:-1], route[1:]])))
+        backward = np.concatenate(([0.0], np.cumsum(dist[route[1:], route[:-1]])))
+        for i in range(1, n - 2):
+            j = np.arange(i + 1, n - 1)
+            a, b = route[i - 1], route[i]
+            c, d = route[j], route[j + 1]
+            inner = (backward[j] - backward[i]) - (forward[j] - forward[i])
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d] + inner
+            k = int(np.argmin(delta))
+            if delta[k] < -EPS:
+                route[i:j[k] + 1] = route[i:j[k] + 1][::-1]
+                forward = np.concatenate(([0.0], np.cumsum(dist[route[:-1], route[1:]])))
+                backward = np.concatenate(([0.0], np.cumsum(dist[route[1:], route[:-1]])))
+                improved = True
+            if time.monotonic() >= deadline:
+                break
+    return route.tolist()
+
+
+def or_opt(route, dist, deadline, max_segment=3):
+    """Mueve tramos de 1 a `max_segment` paradas (también invertidos) a su mejor hueco."""
+    route = list(route)
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for seg_len in range(1, max_segment + 1):
+            i = 1
+            while i + seg_len < len(route):
+                seg = route[i:i + seg_len]
+                prev, nxt = route[i - 1], route[i + seg_len]
+                gain = dist[prev, seg[0]] + dist[seg[-1], nxt] - dist[prev, nxt]
+                # Con matriz asimétrica el tramo invertido cuesta distinto por dentro
+                flip = sum(dist[seg[q + 1], seg[q]] - dist[seg[q], seg[q + 1]] for q in range(seg_len - 1))
+
+                rest = np.asarray(route[:i] + route[i + seg_len:])
+                u, v = rest[:-1], rest[1:]
+                fwd = dist[u, seg[0]] + dist[seg[-1], v] - dist[u, v]
+                rev = dist[u, seg[-1]] + dist[seg[0], v] - dist[u, v] + flip
+                # No reinsertar en el mismo hueco de donde salió
+                fwd[i - 1] = rev[i - 1] = np.inf
+                k_f, k_r = int(np.argmin(fwd)), int(np.argmin(rev))
+                reverse = rev[k_r] < fwd[k_f]
+                k, cost = (k_r, rev[k_r]) if reverse else (k_f, fwd[k_f])
+
+                if cost < gain - EPS:
+                    moved = seg[::-1] if reverse else seg
+                    rest = rest.tolist()
+                    route = rest[:k + 1] + moved + rest[k + 1:]
+                    improved = True
+                else:
+                    i += 1
+                if time.monotonic() >= deadline:
+                    return route
+    return route
+
+
+def solve_tsp(dist, time_budget=1.0):
+    """Ruta cerrada que empieza y termina en el nodo 0, mejorada dentro del tiempo dado.
+
+    Devuelve la mejor ruta encontrada, nunca una peor que la inicial.
+    """
+    n = len(dist)
+    if n <= 3:
+        route = list(range(n)) + [0]
+        if n == 3 and route_length([0, 2, 1, 0], dist) < route_length(route, dist) - EPS:
+            route = [0, 2, 1, 0]
+        return route
+    deadline = time.monotonic() + time_budget
+    best_route = route = nearest_neighbor(dist, 0)
+    best = route_length(route, dist)
+    while time.monotonic() < deadline:
+        route = two_opt(route, dist, deadline)
+        route = or_opt(route, dist, deadline)
+        length = route_length(route, dist)
+        if length >= best - EPS:
+            break
+        best_route, best = route, length
+    return best_route
+
+
+def optimize_route(deliveries, depot=None, time_budget=1.0,
+                   road_factor=ROAD_FACTOR, speed_kmh=AVG_SPEED_KMH, matrix_store=None, road_graph=None):
+    """Optimiza el orden de visita de `deliveries` (filas con customer_coordinates).
+
+    Con almacén la ruta sale y vuelve a él; sin almacén es un recorrido abierto
+    cuyos extremos elige el optimizador (un nodo ficticio a distancia cero).
+    Con `matrix_store` los costos se leen del almacén de matrices en vez de
+    recalcularse. Con `road_graph` (road_network.RoadGraph) los costos sin
+    almacén y la polilínea siguen las calles en vez de la línea recta.
+    """
+    stops = [(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in deliveries]
+    origin = [(depot["lat"], depot["lng"])] if depot else [(0.0, 0.0)]
+    points = origin + stops
+
+    if matrix_store is not None:
+        locations = {delivery_key(d): p for d, p in zip(deliveries, stops)}
+        if depot:
+            locations[depot_key(depot)] = origin[0]
+        keys = ([depot_key(depot)] if depot else []) + [delivery_key(d) for d in deliveries]
+        dist, dur = matrix_store.submatrix(keys, locations)
+        if not depot:
+            dist, dur = np.pad(dist, ((1, 0), (1, 0))), np.pad(dur, ((1, 0), (1, 0)))
+    elif road_graph is not None:
+        dist, dur = road_graph.costs(points, points)
+    else:
+        dist, dur = estimated_costs(points, points, road_factor, speed_kmh)
+    if not depot:
+        dist[0, :] = dist[:, 0] = dur[0, :] = dur[:, 0] = 0.0
+
+    route = solve_tsp(dist, time_budget)
+    order = [i - 1 for i in route[1:-1]]
+    path = route if depot else route[1:-1]
+
+    distance_km = route_length(path, dist)
+    visits = [points[i] for i in path]
+    return {
+        "success": True,
+        "message": "Ruta optimizada localmente" + (" por la red vial" if road_graph is not None else ""),
+        "engine": "local",
+        "total_distance_km": distance_km,
+        "estimated_duration_minutes": round(route_length(path, dur)),
+        "delivery_ids": [deliveries[i]["id"] for i in order if "id" in deliveries[i]],
+        "optimized_sequence": {
+            "encodedPolyline": polyline.encode(road_graph.route_geometry(visits) if road_graph is not None else visits),
+            "depot": {"lat": depot["lat"], "lng": depot["lng"]} if depot else None,
+            "leg_distance_km": dist[path[:-1], path[1:]].tolist(),
+            "leg_duration_min": dur[path[:-1], path[1:]].tolist(),
+            "ordered_waypoints": [
+                {"lat": stops[i][0], "lng": stops[i][1], "label": deliveries[i].get("customer_name") or "Entrega"}
+                for i in order
+            ],
+        },
+    }
+
+
+def sweep_partition(order, weights, capacities):
+    """Reparte paradas (en orden angular) entre vehículos respetando capacidad.
+
+    Los vehículos se llenan uno tras otro; cuando ya no quedan, cada parada
+    sobrante va al vehículo con más espacio libre que la admita. Devuelve
+    (índices por vehículo, índices sin asignar).
+    """
+    groups = [[] for _ in capacities]
+    loads = [0.0] * len(capacities)
+    unassigned = []
+    v = 0
+    for i in order:
+        while v < len(capacities) and loads[v] + weights[i] > capacities[v]:
+            v += 1
+        if v < len(capacities):
+            target = v
+        else:
+            room = [c - l for c, l in zip(capacities, loads)]
+            target = max(range(len(capacities)), key=room.__getitem__, default=None)
+            if target is None or room[target] < weights[i]:
+                unassigned.append(i)
+                continue
+        groups[target].append(i)
+        loads[target] += weights[i]
+    return groups, unassigned
+
+
+def plan_fleet(deliveries, vehicles, depot, time_budget=3.0, starts=8,
+               road_factor=ROAD_FACTOR, speed_kmh=AVG_SPEED_KMH, matrix_store=None, road_graph=None):
+    """Plan CVRP: reparte las entregas entre vehículos por capacidad y optimiza cada ruta.
+
+    Usa el algoritmo de barrido (sweep) alrededor del almacén probando varios
+    ángulos de inicio, se queda con la partición más corta según el vecino más
+    cercano y luego mejora cada ruta con `solve_tsp`. Devuelve
+    {"routes": [...], "unassigned": [entregas]}.
+    """
+    fleet = sorted(
+        (v for v in vehicles if float(v.get("capacity_kg") or 0) > 0),
+        key=lambda v: -float(v["capacity_kg"]),
+    )
+    capacities = [float(v["capacity_kg"]) for v in fleet]
+    weights = [float(d.get("package_weight") or 0) for d in deliveries]
+    if not deliveries or not fleet:
+        return {"routes": [], "unassigned": list(deliveries)}
+
+    points = np.array(
+        [(depot["lat"], depot["lng"])]
+        + [(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in deliveries]
+    )
+    dist = haversine_matrix(points)
+    angles = np.arctan2(points[1:, 0] - points[0, 0], points[1:, 1] - points[0, 1])
+    by_angle = np.argsort(angles)
+
+    best = None
+    for offset in np.linspace(0, len(by_angle), num=min(starts, len(by_angle)), endpoint=False).astype(int):
+        order = np.roll(by_angle, -offset).tolist()
+        groups, unassigned = sweep_partition(order, weights, capacities)
+        cost = 0.0
+        for group in groups:
+            if group:
+                nodes = np.array([0] + [i + 1 for i in group])
+                cost += route_length(nearest_neighbor(dist[np.ix_(nodes, nodes)]), dist[np.ix_(nodes, nodes)])
+        key = (len(unassigned), cost)
+        if best is None or key < best[0]:
+            best = (key, groups, unassigned)
+    _, groups, unassigned = best
+
+    used = [g for g in groups if g]
+    routes = []
+    for vehicle, capacity, group in zip(fleet, capacities, groups):
+        if not group:
+            continue
+        members = [deliveries[i] for i in group]
+        result = optimize_route(members, depot, time_budget=time_budget / len(used),
+                                road_factor=road_factor, speed_kmh=speed_kmh, matrix_store=matrix_store,
+                                road_graph=road_graph)
+        result["vehicle"] = vehicle
+        result["load_kg"] = sum(weights[i] for i in group)
+        result["capacity_kg"] = capacity
+        routes.append(result)
+    return {"routes": routes, "unassigned": [deliveries[i] for i in unassigned]}
+
+
+def split_by_sweep(deliveries, depot, max_size):
+    """Divide entregas en grupos contiguos por ángulo alrededor del almacén.
+
+    Los grupos tienen tamaño parejo (como máximo `max_size`) y el barrido
+    empieza en el mayor hueco angular, para que ningún grupo quede partido a
+    ambos lados de la ciudad. Sin almacén se usa el centroide de las entregas.
+    """
+    if len(deliveries) <= max_size:
+        return [list(deliveries)]
+    pts = np.array([(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in deliveries])
+    center = np.array([depot["lat"], depot["lng"]]) if depot else pts.mean(axis=0)
+    angles = np.arctan2(pts[:, 0] - center[0], pts[:, 1] - center[1])
+    order = np.argsort(angles)
+    gaps = np.diff(np.append(angles[order], angles[order[0]] + 2 * np.pi))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    k = -(-len(deliveries) // max_size)
+    return [[deliveries[i] for i in chunk] for chunk in np.array_split(order, k)]
+
+
+def chunk_boundaries(chunks):
+    """Entrega de cada grupo (salvo el último) donde termina su tramo y empieza el siguiente.
+
+    Es la más cercana al centroide del grupo siguiente, así los tramos se
+    encadenan en vez de volver al almacén entre uno y otro.
+    """
+    boundaries = []
+    for chunk, following in zip(chunks, chunks[1:]):
+        pts = np.array([(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in chunk])
+        center = np.array([(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"])
+                           for d in following]).mean(axis=0)
+        boundaries.append(chunk[int(haversine_pairs(pts, [center])[:, 0].argmin())])
+    return boundaries + [None]
+
+
+def direct_leg(start, end, depot=None):
+    """Tramo sin paradas intermedias de `start` a `end` ({lat, lng}), estimado en línea recta.
+
+    Con el mismo formato que una respuesta de n8n, para unirlo con `stitch_results`.
+    Sin `start` (ruta sin almacén) el tramo empieza en `end` y no tiene recorrido.
+    """
+    points = [(p["lat"], p["lng"]) for p in (start, end) if p]
+    km, minutes = estimated_costs(points[:1], points[-1:])
+    km, minutes = (float(km[0, 0]), float(minutes[0, 0])) if start else (0.0, 0.0)
+    return {
+        "success": True,
+        "total_distance_km": km,
+        "estimated_duration_minutes": round(minutes),
+        "delivery_ids": [],
+        "optimized_sequence": {
+            "encodedPolyline": polyline.encode(points),
+            "ordered_waypoints": [],
+            "depot": depot,
+            "leg_distance_km": [round(km, 3)] if start else [],
+            "leg_duration_min": [round(minutes, 2)] if start else [],
+        },
+    }
+
+
+def stitch_results(results):
+    """Une tramos encadenados (cada uno empieza donde terminó el anterior) en una sola secuencia."""
+    points = []
+    for r in results:
+        part = polyline.decode(r["optimized_sequence"]["encodedPolyline"])
+        if points and part and points[-1] == part[0]:
+            part = part[1:]
+        points.extend(part)
+    return {
+        "success": all(r.get("success", True) for r in results),
+        "message": f"Ruta optimizada en {len(results)} tramos",
+        "engine": results[0].get("engine"),
+        "chunks": len(results),
+        "total_distance_km": sum(r["total_distance_km"] for r in results),
+        "estimated_duration_minutes": sum(r["estimated_duration_minutes"] for r in results),
+        "delivery_ids": [i for r in results for i in r.get("delivery_ids", [])],
+        "optimized_sequence": {
+            "encodedPolyline": polyline.encode(points),
+            "ordered_waypoints": [w for r in results for w in r["optimized_sequence"].get("ordered_waypoints", [])],
+            "depot": results[0]["optimized_sequence"].get("depot"),
+            "leg_distance_km": [x for r in results for x in r["optimized_sequence"].get("leg_distance_km", [])],
+            "leg_duration_min": [x for r in results for x in r["optimized_sequence"].get("leg_duration_min", [])],
+        },
+    }
+
+
+COMPACT_FORMAT = "compact-v1"
+
+
+def route_stops(row):
+    """Extrae (almacén, [(id, lat, lng, etiqueta)]) en orden de una fila de optimized_routes.
+
+    Acepta las tres formas guardadas: la compacta (`format: compact-v1`), la
+    de respuesta de este módulo (`ordered_waypoints`) y la respuesta cruda de
+    Google que guardaba n8n (`routes[0].legs` + `optimizedIntermediateWaypointIndex`).
+    """
+    seq = row.get("optimized_sequence") or {}
+    ids = list(row.get("delivery_ids") or [])
+    if seq.get("format") == COMPACT_FORMAT:
+        waypoints = [(lat, lng, "Entrega") for lat, lng in seq.get("waypoints", [])]
+        ids = list(seq.get("waypoint_ids") or ids)
+        depot = seq.get("depot")
+    elif "ordered_waypoints" in seq:
+        waypoints = [(w["lat"], w["lng"], w.get("label", "Entrega")) for w in seq["ordered_waypoints"]]
+        depot = seq.get("depot")
+        if depot is None and seq.get("encodedPolyline"):
+            lat, lng = polyline.decode(seq["encodedPolyline"])[0]
+            depot = {"lat": lat, "lng": lng}
+    else:
+        route = seq["routes"][0]
+        legs = route["legs"]
+        waypoints = [
+            (leg["endLocation"]["latLng"]["latitude"], leg["endLocation"]["latLng"]["longitude"], "Entrega")
+            for leg in legs[:-1]
+        ]
+        start = legs[0]["startLocation"]["latLng"]
+        depot = {"lat": start["latitude"], "lng": start["longitude"]}
+        order = route.get("optimizedIntermediateWaypointIndex")
+        if order and len(order) == len(ids):
+            ids = [ids[i] for i in order]
+    if len(ids) != len(waypoints):
+        ids = ids + [None] * (len(waypoints) - len(ids))
+    return depot, [(i, lat, lng, label) for i, (lat, lng, label) in zip(ids, waypoints)]
+
+
+def _seconds(duration):
+    return int(str(duration or "0s").rstrip("s") or 0)
+
+
+def compact_sequence(seq, delivery_ids=None):
+    """Forma compacta para guardar en optimized_routes.optimized_sequence.
+
+    Solo polilínea codificada, ids y coordenadas de las paradas en orden, y
+    distancia/duración por tramo; nada de los pasos ni legs completos de Google.
+    """
+    if seq.get("format") == COMPACT_FORMAT:
+        return seq
+    depot, stops = route_stops({"optimized_sequence": seq, "delivery_ids": delivery_ids})
+    if "routes" in seq:
+        route = seq["routes"][0]
+        encoded = route["polyline"]["encodedPolyline"]
+        leg_km = [leg.get("distanceMeters", 0) / 1000 for leg in route["legs"]]
+        leg_min = [round(_seconds(leg.get("duration")) / 60, 2) for leg in route["legs"]]
+    else:
+        encoded = seq.get("encodedPolyline")
+        leg_km = seq.get("leg_distance_km", [])
+        leg_min = seq.get("leg_duration_min", [])
+    compact = {
+        "format": COMPACT_FORMAT,
+        "encodedPolyline": encoded,
+        "depot": depot,
+        "waypoint_ids": [i for i, _, _, _ in stops],
+        "waypoints": [[round(lat, 6), round(lng, 6)] for _, lat, lng, _ in stops],
+        "leg_distance_km": [round(float(x), 3) for x in leg_km],
+        "leg_duration_min": [round(float(x), 2) for x in leg_min],
+    }
+    for extra in ("vehicle_id", "depot_id", "approximate_geometry"):
+        if extra in seq:
+            compact[extra] = seq[extra]
+    return compact
+
+
+def expand_sequence(seq, labels=None):
+    """Forma que dibuja la página (`encodedPolyline` + `ordered_waypoints`) desde cualquier forma guardada."""
+    depot, stops = route_stops({"optimized_sequence": seq})
+    labels = labels or {}
+    encoded = seq["routes"][0]["polyline"]["encodedPolyline"] if "routes" in seq else seq.get("encodedPolyline")
+    return {
+        "encodedPolyline": encoded,
+        "depot": depot,
+        "ordered_waypoints": [
+            {"lat": lat, "lng": lng, "label": labels.get(i, label)} for i, lat, lng, label in stops
+        ],
+    }
+
+
+def leg_lengths(pts):
+    """Distancias en km entre puntos consecutivos de una secuencia (n, 2)."""
+    lat1, lng1 = np.radians(pts[:-1, 0]), np.radians(pts[:-1, 1])
+    lat2, lng2 = np.radians(pts[1:, 0]), np.radians(pts[1:, 1])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def cheapest_insertion(points, new_point, road_factor=ROAD_FACTOR):
+    """Mejor hueco para un punto nuevo en una ruta cerrada, en O(n).
+
+    `points` es la secuencia almacén, paradas..., almacén. Devuelve
+    (posición en `points` donde insertar, km adicionales).
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    u, v = pts[:-1], pts[1:]
+    to_new = haversine_pairs(u, [new_point])[:, 0]
+    from_new = haversine_pairs([new_point], v)[0]
+    delta = to_new + from_new - leg_lengths(pts)
+    k = int(np.argmin(delta))
+    return k + 1, float(delta[k]) * road_factor
+
+
+def _anchor_indices(path, points):
+    """Índice del vértice de `path` más cercano a cada punto de `points`, sin retroceder."""
+    path = np.asarray(path, dtype=np.float64)
+    anchors, start = [], 0
+    for p in points[:-1]:
+        d = np.abs(path[start:] - p).sum(axis=1)
+        start += int(np.argmin(d))
+        anchors.append(start)
+    return anchors + [len(path) - 1]
+
+
+def insert_into_route(row, delivery, repair=False, time_budget=0.5,
+                      road_factor=ROAD_FACTOR, speed_kmh=AVG_SPEED_KMH):
+    """Agrega una entrega a una ruta guardada sin volver a resolverla completa.
+
+    Inserta en el hueco más barato y, si `repair`, aplica 2-opt/Or-opt
+    acotados. Los totales se actualizan con la diferencia estimada, así los
+    km por calle de los tramos no tocados se conservan. Devuelve los campos a
+    actualizar en optimized_routes, con la secuencia ya en forma compacta.
+
+    Los tramos no tocados conservan su distancia/duración y su geometría por
+    calle; los nuevos son estimaciones en línea recta, y la secuencia queda
+    marcada con `approximate_geometry`.
+    """
+    seq = compact_sequence(row.get("optimized_sequence") or {}, row.get("delivery_ids"))
+    depot, stops = route_stops({"optimized_sequence": seq})
+    new = (delivery["customer_coordinates"]["lat"], delivery["customer_coordinates"]["lng"])
+    origin = (depot["lat"], depot["lng"])
+    points = [origin] + [(lat, lng) for _, lat, lng, _ in stops] + [origin]
+    before = float(leg_lengths(np.asarray(points)).sum())
+    path = polyline.decode(seq["encodedPolyline"]) if seq.get("encodedPolyline") else []
+    legs = list(zip(seq.get("leg_distance_km") or [], seq.get("leg_duration_min") or []))
+    if len(legs) != len(points) - 1:
+        legs = None
+
+    def estimate(u, v):
+        km = float(leg_lengths(np.asarray([u, v]))[0]) * road_factor
+        return round(km, 3), round(km / speed_kmh * 60, 2)
+
+    position, _ = cheapest_insertion(points, new, road_factor)
+    stops.insert(position - 1, (delivery.get("id"), new[0], new[1], delivery.get("customer_name") or "Entrega"))
+    old_points = points
+    points = points[:position] + [new] + points[position:]
+
+    if repair and len(stops) > 2:
+        dist = haversine_matrix(points[:-1])
+        deadline = time.monotonic() + time_budget
+        route = or_opt(two_opt(list(range(len(points) - 1)) + [0], dist, deadline), dist, deadline)
+        stops = [stops[i - 1] for i in route[1:-1]]
+        points = [origin] + [(lat, lng) for _, lat, lng, _ in stops] + [origin]
+        # Los tramos que ya existían (mismo origen y destino) conservan sus valores por calle
+        known = dict(zip(zip(old_points[:-1], old_points[1:]), legs or []))
+        legs = [known.get((u, v)) or estimate(u, v) for u, v in zip(points[:-1], points[1:])]
+        pieces = {}
+        if len(path) >= 2:
+            anchors = _anchor_indices(path, old_points)
+            pieces = {(u, v): path[a:b + 1] for u, v, a, b in
+                      zip(old_points[:-1], old_points[1:], anchors[:-1], anchors[1:])}
+        joined = []
+        for u, v in zip(points[:-1], points[1:]):
+            joined.extend(pieces.get((u, v), [u, v])[1 if joined else 0:])
+        path = joined
+    else:
+        if legs is not None:
+            legs[position - 1:position] = [estimate(old_points[position - 1], new),
+                                           estimate(new, old_points[position])]
+        if len(path) >= 2:
+            # Se reemplaza solo el trozo del tramo partido por el desvío a la parada nueva
+            anchors = _anchor_indices(path, old_points)
+            first, last = anchors[position - 1], anchors[position]
+            path = path[:first + 1] + [new] + path[last:]
+        else:
+            path = points
+
+    if legs is None:
+        legs = [estimate(u, v) for u, v in zip(points[:-1], points[1:])]
+
+    after = float(leg_lengths(np.asarray(points)).sum())
+    delta_km = (after - before) * road_factor
+    total_km = float(row.get("total_distance_km") or 0) + delta_km
+    minutes = float(row.get("estimated_duration_minutes") or 0) + delta_km / speed_kmh * 60
+
+    sequence = {
+        **seq,
+        "encodedPolyline": polyline.encode(path),
+        "waypoint_ids": [i for i, _, _, _ in stops],
+        "waypoints": [[round(lat, 6), round(lng, 6)] for _, lat, lng, _ in stops],
+        "leg_distance_km": [km for km, _ in legs],
+        "leg_duration_min": [m for _, m in legs],
+        "approximate_geometry": True,
+    }
+    return {
+        "delivery_ids": [i for i, _, _, _ in stops if i is not None],
+        "total_distance_km": total_km,
+        "estimated_duration_minutes": round(minutes),
+        "optimized_sequence": sequence,
+    }
+
+
+def assign_to_nearest_depot(deliveries, depots):
+    """Asigna cada entrega al almacén más cercano (partición de Voronoi por distancia).
+
+    `depots` son filas con `coordinates`; devuelve {índice de almacén: [entregas]}.
+    """
+    if not deliveries or not depots:
+        return {}
+    stops = [(d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"]) for d in deliveries]
+    origins = [(dp["coordinates"]["lat"], dp["coordinates"]["lng"]) for dp in depots]
+    nearest = haversine_pairs(stops, origins).argmin(axis=1)
+    groups = {}
+    for delivery, j in zip(deliveries, nearest.tolist()):
+        groups.setdefault(j, []).append(delivery)
+    return groups
@@ -0,0 +1,117 @@
+"""Índice espacial en grilla para seleccionar entregas por cercanía o por zona."""
+import math
+import threading
+
+import numpy as np
+
+from route_optimizer import haversine_pairs
+
+KM_PER_DEG_LAT = 111.32
+
+
+class DeliveryIndex:
+    """Grilla uniforme (celdas de `cell_km`) sobre customer_coordinates.
+
+    Las celdas se calculan con una proyección equirectangular centrada en
+    Pacasmayo, suficiente a escala de ciudad. `sync(filas)` aplica solo las
+    diferencias respecto de la última llamada, así el índice se mantiene al
+    día con los datos de entregas sin reconstruirse en cada rerun.
+    """
+
+    def __init__(self, origin_lat=-7.4002, cell_km=0.5):
+        self.cell_km = cell_km
+        self._km_per_deg_lng = KM_PER_DEG_LAT * math.cos(math.radians(origin_lat))
+        self._lock = threading.Lock()
+        self._cells = {}      # (cx, cy) -> set de ids
+        self._points = {}     # id -> (lat, lng, celda)
+        self._rows = {}
+
+    def _cell(self, lat, lng):
+        return (
+            int(math.floor(lng * self._km_per_deg_lng / self.cell_km)),
+            int(math.floor(lat * KM_PER_DEG_LAT / self.cell_km)),
+        )
+
+    def _add(self, key, lat, lng):
+        cell = self._cell(lat, lng)
+        self._points[key] = (lat, lng, cell)
+        self._cells.setdefault(cell, set()).add(key)
+
+    def _remove(self, key):
+        _, _, cell = self._points.pop(key)
+        members = self._cells[cell]
+        members.discard(key)
+        if not members:
+            del self._cells[cell]
+
+    def sync(self, rows):
+        """Deja en el índice exactamente las filas dadas (con coordenadas)."""
+        with self._lock:
+            seen = set()
+            for row in rows:
+                coords = row.get("customer_coordinates")
+                if not coords:
+                    continue
+                key = row["id"]
+                seen.add(key)
+                self._rows[key] = row
+                current = self._points.get(key)
+                if current and current[0] == coords["lat"] and current[1] == coords["lng"]:
+                    continue
+                if current:
+                    self._remove(key)
+                self._add(key, coords["lat"], coords["lng"])
+            for key in [k for k in self._points if k not in seen]:
+                self._remove(key)
+                del self._rows[key]
+
+    def __len__(self):
+        return len(self._points)
+
+    def within(self, lat, lng, radius_km):
+        """Filas a menos de `radius_km` del punto, ordenadas por distancia."""
+        with self._lock:
+            cx, cy = self._cell(lat, lng)
+            reach = int(math.ceil(radius_km / self.cell_km))
+            candidates = [
+                key
+                for dx in range(-reach, reach + 1)
+                for dy in range(-reach, reach + 1)
+                for key in self._cells.get((cx + dx, cy + dy), ())
+            ]
+            if not candidates:
+                return []
+            pts = np.array([self._points[k][:2] for k in candidates])
+            dist = haversine_pairs([(lat, lng)], pts)[0]
+            inside = np.nonzero(dist <= radius_km)[0]
+            return [self._rows[candidates[i]] for i in inside[np.argsort(dist[inside])]]
+
+    def zones(self, max_size=25):
+        """Agrupa las entregas en zonas compactas de como máximo `max_size` paradas.
+
+        Bisección recursiva: cada grupo se ordena sobre su eje más largo y se
+        corta en un múltiplo de `max_size`, lo que da zonas llenas, compactas y
+        estables entre reruns.
+        """
+        with self._lock:
+            keys = list(self._points)
+            if not keys:
+                return []
+            pts = np.array([self._points[k][:2] for k in keys])
+            rows = [self._rows[k] for k in keys]
+
+        xy = np.column_stack([pts[:, 1] * self._km_per_deg_lng, pts[:, 0] * KM_PER_DEG_LAT])
+        pending, groups = [np.arange(len(xy))], []
+        while pending:
+            idx = pending.pop()
+            if len(idx) <= max_size:
+                groups.append(idx)
+                continue
+            # Partir en múltiplos de max_size deja zonas llenas en vez de muchas a medias
+            parts = -(-len(idx) // max_size)
+            cut = (parts // 2) * max_size if parts > 1 else len(idx) // 2
+            axis = int(np.ptp(xy[idx], axis=0).argmax())
+            order = idx[np.argsort(xy[idx, axis], kind="stable")]
+            pending += [order[:cut], order[cut:]]
+        groups.sort(key=lambda g: (xy[g, 1].mean(), xy[g, 0].mean()), reverse=True)
+        return [[rows[i] for i in g] for g in groups]
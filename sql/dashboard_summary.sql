@@ -0,0 +1,38 @@
+-- Resumen de KPIs del dashboard en una sola llamada RPC.
+-- Uso desde Python: client.rpc("dashboard_summary", {"nbins": 10})
+create or replace function dashboard_summary(nbins int default 10)
+returns json
+language sql
+stable
+as $$
+    with s as (
+        select status, count(*) as n
+        from deliveries
+        group by status
+    ),
+    r as (
+        select count(*) as n,
+               avg(total_distance_km) as avg_distance,
+               avg(estimated_duration_minutes) as avg_duration,
+               min(total_distance_km) as lo,
+               max(total_distance_km) as hi
+        from optimized_routes
+    ),
+    h as (
+        select least(width_bucket(o.total_distance_km, r.lo, r.hi, nbins), nbins) as bin,
+               count(*) as n
+        from optimized_routes o, r
+        where o.total_distance_km is not null and r.hi > r.lo
+        group by 1
+    )
+    select json_build_object(
+        'status_counts', coalesce((select json_object_agg(status, n) from s), '{}'::json),
+        'total_deliveries', coalesce((select sum(n) from s), 0),
+        'route_count', (select n from r),
+        'avg_distance_km', (select avg_distance from r),
+        'avg_duration_min', (select avg_duration from r),
+        'distance_min', (select lo from r),
+        'distance_max', (select hi from r),
+        'histogram', coalesce((select json_agg(json_build_object('bin', bin, 'count', n) order by bin) from h), '[]'::json)
+    );
+$$;
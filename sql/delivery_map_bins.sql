@@ -0,0 +1,17 @@
+-- Entregas agrupadas en celdas de una grilla lat/lng por estado, para el mapa del dashboard.
+-- Uso desde Python: client.rpc("delivery_map_bins", {"cell_deg": 0.002})
+create or replace function delivery_map_bins(cell_deg double precision default 0.002)
+returns table (status text, lat double precision, lng double precision, n bigint)
+language sql
+stable
+as $$
+    select status,
+           avg((customer_coordinates->>'lat')::double precision) as lat,
+           avg((customer_coordinates->>'lng')::double precision) as lng,
+           count(*) as n
+    from deliveries
+    where customer_coordinates is not null
+    group by status,
+             floor((customer_coordinates->>'lat')::double precision / cell_deg),
+             floor((customer_coordinates->>'lng')::double precision / cell_deg);
+$$;
@@ -0,0 +1,94 @@
+-- Agregados diarios de rutas por día, vehículo y almacén.
+-- Un trigger sobre optimized_routes recalcula solo los días afectados por cada cambio.
+-- Uso desde Python: client.table("route_daily_rollups").select("*").gte("day", ...).lte("day", ...)
+create table if not exists route_daily_rollups (
+    day date not null,
+    vehicle_id text not null default '',
+    depot_id text not null default '',
+    route_count int not null,
+    total_distance_km double precision not null,
+    total_duration_min double precision not null,
+    total_deliveries int not null,
+    updated_at timestamptz not null default now(),
+    primary key (day, vehicle_id, depot_id)
+);
+
+-- Día local de Pacasmayo (UTC-5, sin horario de verano).
+-- Depende de la base de zonas horarias del servidor: stable, no immutable, y por
+-- eso no sirve para un índice; las consultas filtran created_at por rango.
+drop index if exists optimized_routes_rollup_day_idx;
+
+create or replace function route_rollup_day(ts timestamptz)
+returns date
+language sql
+stable
+as $$
+    select (ts at time zone 'America/Lima')::date;
+$$;
+
+create index if not exists optimized_routes_created_at_idx on optimized_routes (created_at);
+
+create or replace function refresh_route_rollups(days date[])
+returns void
+language plpgsql
+as $$
+declare
+    d date;
+begin
+    -- Un lock por día hasta el fin de la transacción: dos inserciones concurrentes del
+    -- mismo día (planificación por almacén, tramos de n8n en paralelo) se turnan y la
+    -- segunda vuelve a leer con lo que la primera confirmó. Los días se bloquean en
+    -- orden para no generar deadlocks.
+    for d in select distinct x from unnest(days) as x where x is not null order by 1 loop
+        perform pg_advisory_xact_lock(hashtext('route_daily_rollups:' || d::text));
+
+        delete from route_daily_rollups where day = d;
+
+        insert into route_daily_rollups
+            (day, vehicle_id, depot_id, route_count, total_distance_km, total_duration_min, total_deliveries)
+        select d,
+               coalesce(r.optimized_sequence->>'vehicle_id', ''),
+               coalesce(r.optimized_sequence->>'depot_id', matched.id::text, ''),
+               count(*),
+               coalesce(sum(r.total_distance_km), 0),
+               coalesce(sum(r.estimated_duration_minutes), 0),
+               coalesce(sum(jsonb_array_length(coalesce(to_jsonb(r.delivery_ids), '[]'::jsonb))), 0)
+        from optimized_routes r
+        -- Rutas guardadas antes de registrar depot_id: se reconoce el almacén por sus coordenadas
+        left join lateral (
+            select dp.id
+            from depots dp
+            where r.optimized_sequence->>'depot_id' is null
+              and (dp.coordinates->>'lat')::float8 = (r.optimized_sequence->'depot'->>'lat')::float8
+              and (dp.coordinates->>'lng')::float8 = (r.optimized_sequence->'depot'->>'lng')::float8
+            limit 1
+        ) matched on true
+        where r.created_at >= d::timestamp at time zone 'America/Lima'
+          and r.created_at < (d + 1)::timestamp at time zone 'America/Lima'
+        group by 2, 3;
+    end loop;
+end;
+$$;
+
+create or replace function route_rollups_trigger()
+returns trigger
+language plpgsql
+as $$
+begin
+    perform refresh_route_rollups(array_remove(array[
+        case when tg_op <> 'INSERT' then route_rollup_day(old.created_at) end,
+        case when tg_op <> 'DELETE' then route_rollup_day(new.created_at) end
+    ], null));
+    return null;
+end;
+$$;
+
+drop trigger if exists optimized_routes_rollups on optimized_routes;
+create trigger optimized_routes_rollups
+    after insert or update of created_at, total_distance_km, estimated_duration_minutes,
+        delivery_ids, optimized_sequence or delete
+    on optimized_routes
+    for each row execute function route_rollups_trigger();
+
+-- Carga inicial con las rutas existentes
+select refresh_route_rollups(array(select distinct route_rollup_day(created_at) from optimized_routes));
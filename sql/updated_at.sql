@@ -0,0 +1,33 @@
+-- Marca de agua de la sincronización incremental (core.SYNC_WATERMARKS).
+-- updated_at se actualiza en cada UPDATE, así los espejos de otros procesos ven
+-- también las modificaciones, no solo las filas nuevas.
+create or replace function set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+-- deliveries ya tiene updated_at; faltaba mantenerla en los UPDATE
+drop trigger if exists deliveries_updated_at on deliveries;
+create trigger deliveries_updated_at
+    before update on deliveries
+    for each row execute function set_updated_at();
+
+create index if not exists deliveries_updated_at_idx on deliveries (updated_at);
+
+-- optimized_routes solo tenía created_at: las inserciones en rutas existentes no se sincronizaban
+alter table optimized_routes add column if not exists updated_at timestamptz;
+update optimized_routes set updated_at = created_at where updated_at is null;
+alter table optimized_routes alter column updated_at set default now();
+alter table optimized_routes alter column updated_at set not null;
+
+drop trigger if exists optimized_routes_updated_at on optimized_routes;
+create trigger optimized_routes_updated_at
+    before update on optimized_routes
+    for each row execute function set_updated_at();
+
+create index if not exists optimized_routes_updated_at_idx on optimized_routes (updated_at);
@@ -0,0 +1,74 @@
+"""Presupuesto de importación: cuánto cuesta cargar la app y cada página.
+
+En el servidor, `IMPORT_BUDGET` registra la primera carga de cada página en
+el proceso (lo que aún no estaba importado por otra página). Para medir en
+frío, cada página por separado en un intérprete nuevo:
+
+    python startup.py
+"""
+import importlib
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from views import PAGES
+
+
+class ImportBudget:
+    """Segundos de la primera importación de cada módulo en este proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+
+    def record(self, label, seconds):
+        with self._lock:
+            self.timings.setdefault(label, seconds)
+
+    def load(self, label, module_name):
+        """Importa el módulo (si hace falta) y anota cuánto tardó la primera vez."""
+        module = sys.modules.get(module_name)
+        if module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self.record(label, time.perf_counter() - started)
+        return module
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.timings)
+
+
+IMPORT_BUDGET = ImportBudget()
+
+COLD_SCRIPT = """
+import json, sys, time
+timings = {}
+for name in sys.argv[1:]:
+    started = time.perf_counter()
+    __import__(name)
+    timings[name] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def measure_cold(page_module, base=("streamlit", "core")):
+    """Importa `base` y luego la página en un intérprete nuevo; segundos por módulo."""
+    out = subprocess.run(
+        [sys.executable, "-c", COLD_SCRIPT, *base, page_module],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'Página':<24}{'streamlit':>12}{'core':>10}{'página':>10}")
+    for label, (module_name, _) in PAGES.items():
+        t = measure_cold(module_name)
+        print(f"{label:<24}{t['streamlit']:>12.3f}{t['core']:>10.3f}{t[module_name]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
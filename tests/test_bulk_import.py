@@ -0,0 +1,36 @@
+"""Importación masiva: limitador solo para llamadas reales y filas insertadas."""
+from bulk_import import geocode_many, insert_in_batches
+from geocoding import GeocodeStore, GeocodingService, StubGeocoder
+
+ADDRESS = "Jr. Dos de Mayo 135, Pacasmayo"
+
+
+def test_cached_addresses_do_not_take_rate_limit_tokens(tmp_path):
+    backend = StubGeocoder({ADDRESS: {"lat": -7.4, "lng": -79.57}})
+    service = GeocodingService(backend, GeocodeStore(str(tmp_path / "geo.sqlite3")))
+    throttled = []
+
+    def geocode(address, throttle):
+        return service.geocode(address, raise_errors=True, throttle=lambda: throttled.append(address))
+
+    geocode_many([ADDRESS], geocode)
+    results = geocode_many([ADDRESS], geocode)
+
+    assert results and list(results.values()) == [{"lat": -7.4, "lng": -79.57}]
+    assert backend.calls == 1
+    assert throttled == [ADDRESS]
+
+
+def test_insert_in_batches_returns_created_rows_and_isolates_bad_ones():
+    def insert(data):
+        rows = data if isinstance(data, list) else [data]
+        if any(r["name"] == "mala" for r in rows):
+            raise ValueError("fila inválida")
+        return [{**r, "id": r["name"]} for r in rows]
+
+    rows = [{"name": n, "_source_row": i} for i, n in enumerate(["a", "mala", "c"], 1)]
+    created, failures = insert_in_batches(insert, rows, batch_size=2)
+
+    assert [r["id"] for r in created] == ["a", "c"]
+    assert "_source_row" not in created[0]
+    assert [row for row, _ in failures] == [2]
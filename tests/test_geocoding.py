@@ -0,0 +1,77 @@
+"""Geocodificación con deduplicación de llamadas simultáneas (GeocodingService)."""
+import threading
+import time
+
+import pytest
+
+from geocoding import GeocodeStore, GeocodingService
+
+ADDRESS = "Jr. Dos de Mayo 135, Pacasmayo"
+
+
+class SlowFailingBackend:
+    """Falla después de que todos los hilos ya están esperando la misma llamada."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def __call__(self, address):
+        self.calls += 1
+        self.release.wait(5)
+        raise ConnectionError("timeout")
+
+
+def run_concurrently(service, backend, raise_errors, n=4):
+    outcomes = [None] * n
+
+    def lookup(i):
+        try:
+            outcomes[i] = service.geocode(ADDRESS, raise_errors=raise_errors)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    # Los que esperan una llamada en curso cuentan como aciertos
+    deadline = time.monotonic() + 5
+    while (backend.calls == 0 or service.hits < n - 1) and time.monotonic() < deadline:
+        time.sleep(0.001)
+    backend.release.set()
+    for t in threads:
+        t.join(5)
+    return outcomes
+
+
+def test_waiters_receive_the_owner_error_when_raising():
+    backend = SlowFailingBackend()
+    service = GeocodingService(backend, GeocodeStore())
+    outcomes = run_concurrently(service, backend, raise_errors=True)
+
+    assert backend.calls == 1
+    assert all(isinstance(o, ConnectionError) for o in outcomes)
+    assert len(service.store) == 0  # los errores no se guardan como "no encontrada"
+
+
+def test_waiters_get_none_without_raise_errors():
+    backend = SlowFailingBackend()
+    service = GeocodingService(backend, GeocodeStore())
+    assert run_concurrently(service, backend, raise_errors=False) == [None] * 4
+
+
+def test_not_found_is_cached_but_errors_are_retried():
+    calls = []
+
+    def backend(address):
+        calls.append(address)
+        if len(calls) == 1:
+            raise ConnectionError("timeout")
+        return None
+
+    service = GeocodingService(backend, GeocodeStore())
+    with pytest.raises(ConnectionError):
+        service.geocode(ADDRESS, raise_errors=True)
+    assert service.geocode(ADDRESS, raise_errors=True) is None
+    assert service.geocode(ADDRESS, raise_errors=True) is None
+    assert len(calls) == 2
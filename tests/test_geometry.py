@@ -0,0 +1,26 @@
+"""Caché de geometrías simplificadas (geometry.GeometryCache)."""
+import polyline
+
+from geometry import GeometryCache
+
+
+def test_rewritten_route_is_not_served_from_stale_entry():
+    cache = GeometryCache()
+    old = polyline.encode([(-7.40, -79.57), (-7.41, -79.56)])
+    new = polyline.encode([(-7.40, -79.57), (-7.42, -79.55), (-7.41, -79.56)])
+
+    assert len(cache.get(old, zoom=14, route_id=1)[0]) == 2
+    # Sin invalidate: otro proceso reescribió la ruta 1
+    assert len(cache.get(new, zoom=14, route_id=1)[0]) == 3
+    assert cache.get(new, zoom=14, route_id=1) is cache.get(new, zoom=14, route_id=1)
+    assert cache.hits == 2
+
+
+def test_invalidate_drops_all_versions_of_a_route():
+    cache = GeometryCache()
+    encoded = polyline.encode([(-7.40, -79.57), (-7.41, -79.56)])
+    cache.get(encoded, zoom=12, route_id=5)
+    cache.get(encoded, zoom=15, route_id=5)
+    cache.invalidate(5)
+    cache.get(encoded, zoom=12, route_id=5)
+    assert cache.misses == 3
@@ -0,0 +1,16 @@
+"""Las páginas livianas no deben cargar el optimizador (ver startup.IMPORT_BUDGET)."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("route_optimizer", "polyline", "matrix_store", "road_network")
+
+
+@pytest.mark.parametrize("module", ["core", "views.deliveries", "views.depots"])
+def test_module_does_not_import_solver_stack(module):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
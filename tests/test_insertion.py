@@ -0,0 +1,77 @@
+"""Inserción de entregas tardías en rutas guardadas (route_optimizer.insert_into_route)."""
+import polyline
+
+from route_optimizer import COMPACT_FORMAT, compact_sequence, insert_into_route, route_stops
+
+DEPOT = {"lat": -7.4000, "lng": -79.5700}
+STOPS = [(-7.4010, -79.5710), (-7.4030, -79.5690), (-7.4020, -79.5660)]
+
+
+def compact_row():
+    points = [(DEPOT["lat"], DEPOT["lng"])] + STOPS + [(DEPOT["lat"], DEPOT["lng"])]
+    # Geometría "por calle": un vértice intermedio en cada tramo
+    road = [points[0]]
+    for u, v in zip(points[:-1], points[1:]):
+        road += [(u[0], v[1]), v]
+    return {
+        "id": 7,
+        "delivery_ids": ["a", "b", "c"],
+        "total_distance_km": 2.0,
+        "estimated_duration_minutes": 6,
+        "optimized_sequence": {
+            "format": COMPACT_FORMAT,
+            "encodedPolyline": polyline.encode(road),
+            "depot": dict(DEPOT),
+            "waypoint_ids": ["a", "b", "c"],
+            "waypoints": [list(p) for p in STOPS],
+            "leg_distance_km": [0.5, 0.6, 0.4, 0.5],
+            "leg_duration_min": [1.5, 1.8, 1.2, 1.5],
+            "vehicle_id": "v1",
+            "depot_id": "d1",
+        },
+    }
+
+
+def late_delivery():
+    return {"id": "z", "customer_name": "Tarde", "customer_coordinates": {"lat": -7.4020, "lng": -79.5700}}
+
+
+def test_insertion_keeps_attribution_and_untouched_legs():
+    row = compact_row()
+    fields = insert_into_route(row, late_delivery())
+    seq = compact_sequence(fields["optimized_sequence"], fields["delivery_ids"])
+
+    assert seq["vehicle_id"] == "v1" and seq["depot_id"] == "d1"
+    assert seq["approximate_geometry"] is True
+    assert sorted(fields["delivery_ids"]) == ["a", "b", "c", "z"]
+    assert len(seq["waypoints"]) == 4
+    assert len(seq["leg_distance_km"]) == len(seq["leg_duration_min"]) == 5
+
+    # Solo el tramo partido cambia: los demás conservan sus valores
+    k = seq["waypoint_ids"].index("z")
+    old_legs = row["optimized_sequence"]["leg_distance_km"]
+    assert seq["leg_distance_km"][:k] == old_legs[:k]
+    assert seq["leg_distance_km"][k + 2:] == old_legs[k + 1:]
+
+
+def test_insertion_keeps_road_geometry_of_other_legs():
+    row = compact_row()
+    old_path = polyline.decode(row["optimized_sequence"]["encodedPolyline"])
+    fields = insert_into_route(row, late_delivery())
+    path = polyline.decode(fields["optimized_sequence"]["encodedPolyline"])
+
+    # Se quita el vértice intermedio del tramo partido y se agregan la parada nueva
+    assert len(path) == len(old_path) - 1 + 1
+    assert (-7.402, -79.57) in path
+    assert path[0] == old_path[0] and path[-1] == old_path[-1]
+
+
+def test_repair_rebuilds_legs_and_keeps_attribution():
+    fields = insert_into_route(compact_row(), late_delivery(), repair=True)
+    seq = fields["optimized_sequence"]
+    depot, stops = route_stops({"optimized_sequence": seq})
+
+    assert depot == DEPOT
+    assert seq["vehicle_id"] == "v1" and seq["depot_id"] == "d1"
+    assert len(stops) == 4
+    assert len(seq["leg_distance_km"]) == len(seq["leg_duration_min"]) == len(stops) + 1
@@ -0,0 +1,112 @@
+"""Almacén persistente de matrices (matrix_store.MatrixStore)."""
+import json
+import os
+
+import numpy as np
+import pytest
+
+from matrix_store import MatrixStore
+from route_optimizer import estimated_costs
+
+
+def locations(n, offset=0):
+    rng = np.random.default_rng(offset)
+    return {f"delivery:{offset + i}": (-7.40 + rng.random() * 0.05, -79.57 + rng.random() * 0.05) for i in range(n)}
+
+
+def expected(points):
+    pts = list(points.values())
+    km, minutes = estimated_costs(pts, pts)
+    return np.asarray(km, dtype=np.float32), np.asarray(minutes, dtype=np.float32)
+
+
+def test_reopen_keeps_values_across_growth(tmp_path):
+    store = MatrixStore(str(tmp_path), initial_capacity=4)
+    first, second = locations(3), locations(6, offset=100)
+    store.ensure(first)
+    store.ensure(second)  # crece de 4 a 16 y pasa a una generación nueva
+    everything = {**first, **second}
+
+    reopened = MatrixStore(str(tmp_path), initial_capacity=4)
+    km, minutes = reopened.submatrix(list(everything))
+    exp_km, exp_min = expected(everything)
+    np.testing.assert_allclose(km, exp_km, rtol=1e-6)
+    np.testing.assert_allclose(minutes, exp_min, rtol=1e-6)
+    assert reopened.computed == 0
+    # Solo quedan los archivos de la generación vigente
+    assert sorted(f for f in os.listdir(tmp_path) if f.endswith(".bin")) == sorted(
+        f"{name}.{reopened.generation}.bin" for name in ("distance", "duration", "computed_at")
+    )
+
+
+def test_log_replay_ignores_half_written_last_line(tmp_path):
+    store = MatrixStore(str(tmp_path))
+    points = locations(5)
+    store.ensure(points)
+    log = tmp_path / f"index.{store.generation}.log"
+    with open(log, "a") as f:
+        f.write('["delivery:999", 5, -7.4')  # corte a mitad de una escritura
+
+    reopened = MatrixStore(str(tmp_path))
+    assert set(reopened.index) == set(points)
+    assert log.read_text().endswith("\n")
+    # El índice se sigue registrando bien después del recorte
+    reopened.ensure(locations(1, offset=50))
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [line[0] for line in lines][-1] == "delivery:50"
+    assert set(MatrixStore(str(tmp_path)).index) == set(points) | {"delivery:50"}
+
+
+def test_location_missing_from_log_is_recomputed(tmp_path):
+    # Las matrices se escriben antes que el log: si el proceso se corta entre medio,
+    # la ubicación no existe al reabrir y el próximo ensure la vuelve a calcular
+    store = MatrixStore(str(tmp_path))
+    points = locations(4)
+    store.ensure(points)
+    log = tmp_path / f"index.{store.generation}.log"
+    lines = log.read_text().splitlines(keepends=True)
+    log.write_text("".join(lines[:-1]))
+
+    reopened = MatrixStore(str(tmp_path))
+    assert len(reopened.index) == 3
+    km, _ = reopened.submatrix(list(points), points)
+    np.testing.assert_allclose(km, expected(points)[0], rtol=1e-6)
+
+
+def test_retain_compacts_and_survives_reopen(tmp_path):
+    store = MatrixStore(str(tmp_path), initial_capacity=4)
+    points = locations(20)
+    store.ensure(points)
+    keep = dict(list(points.items())[::4])
+
+    assert store.retain(keep) == 15
+    assert store.capacity == 8
+    assert store.retain(keep) == 0
+
+    reopened = MatrixStore(str(tmp_path), initial_capacity=4)
+    assert set(reopened.index) == set(keep)
+    km, _ = reopened.submatrix(list(keep))
+    np.testing.assert_allclose(km, expected(keep)[0], rtol=1e-6)
+    assert reopened.computed == 0
+
+
+def test_needs_compaction_thresholds(tmp_path):
+    store = MatrixStore(str(tmp_path))
+    points = locations(10)
+    store.ensure(points)
+    active = list(points)[:2]
+    assert not store.needs_compaction(active)
+    assert store.needs_compaction(active, min_fraction=0.5, min_inactive=1)
+
+
+def test_moved_location_is_recomputed(tmp_path):
+    store = MatrixStore(str(tmp_path))
+    points = locations(3)
+    store.ensure(points)
+    key = next(iter(points))
+    moved = {**points, key: (points[key][0] + 0.01, points[key][1])}
+
+    km, _ = store.submatrix(list(moved), moved)
+    np.testing.assert_allclose(km, expected(moved)[0], rtol=1e-6)
+    with pytest.raises(KeyError):
+        store.submatrix(["delivery:unknown"])
@@ -0,0 +1,73 @@
+"""Rutas grandes por n8n: tramos encadenados y guardados como una sola fila."""
+import polyline
+import pytest
+
+import views.routing as routing
+
+DEPOT = {"lat": -7.40, "lng": -79.57}
+
+
+def delivery(i, lat, lng):
+    return {"id": f"d{i}", "customer_name": f"Cliente {i}", "customer_coordinates": {"lat": lat, "lng": lng}}
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.rows = []
+
+    def insert(self, table, data):
+        self.rows.append((table, data))
+        return [{**data, "id": len(self.rows)}]
+
+
+def fake_webhook(calls):
+    def run(ids, depot, origin=None, destination=None, save=True, depot_id=None):
+        calls.append({"ids": ids, "origin": origin, "destination": destination, "save": save})
+        points = [(origin["lat"], origin["lng"]), (destination["lat"], destination["lng"])]
+        return {
+            "total_distance_km": 1.0, "estimated_duration_minutes": 2, "delivery_ids": list(ids),
+            "optimized_sequence": {
+                "encodedPolyline": polyline.encode(points), "depot": depot,
+                "ordered_waypoints": [{"lat": 0, "lng": 0, "label": i} for i in ids],
+                "leg_distance_km": [0.5] * (len(ids) + 1), "leg_duration_min": [1.0] * (len(ids) + 1),
+            },
+        }
+    return run
+
+
+@pytest.fixture
+def chunked(monkeypatch):
+    calls = []
+    monkeypatch.setattr(routing.st, "secrets", {"N8N_WAYPOINT_LIMIT": 2, "N8N_PARALLEL_REQUESTS": 2})
+    monkeypatch.setattr(routing, "run_n8n_optimization", fake_webhook(calls))
+    return calls
+
+
+def test_single_member_chunk_skips_the_webhook(chunked, monkeypatch):
+    chunks = [[delivery(1, -7.401, -79.571)], [delivery(2, -7.41, -79.58), delivery(3, -7.42, -79.59)]]
+    monkeypatch.setattr(routing, "split_by_sweep", lambda chosen, depot, size: chunks)
+    sb = FakeSupabase()
+
+    result = routing.run_n8n_chunked(sb, [d for c in chunks for d in c], DEPOT, lambda *a: None, depot_id="dep1")
+
+    assert all(call["ids"] for call in chunked)
+    assert len(chunked) == 1 and chunked[0]["origin"] == chunks[0][0]["customer_coordinates"]
+    assert sorted(result["delivery_ids"]) == ["d1", "d2", "d3"]
+    assert len(sb.rows) == 1 and sb.rows[0][1]["optimized_sequence"]["depot_id"] == "dep1"
+    seq = sb.rows[0][1]["optimized_sequence"]
+    assert len(seq["leg_distance_km"]) == len(seq["waypoint_ids"]) + 1
+
+
+def test_chunks_are_chained_and_not_saved_by_n8n(chunked, monkeypatch):
+    chosen = [delivery(i, -7.40 - 0.01 * i, -79.57 - 0.01 * i) for i in range(1, 7)]
+    monkeypatch.setattr(routing, "split_by_sweep", lambda chosen, depot, size: [chosen[:3], chosen[3:]])
+    sb = FakeSupabase()
+
+    result = routing.run_n8n_chunked(sb, chosen, DEPOT, lambda *a: None)
+
+    first, second = sorted(chunked, key=lambda c: c["origin"] != DEPOT)
+    assert first["origin"] == DEPOT and second["destination"] == DEPOT
+    assert first["destination"] == second["origin"]
+    assert not any(call["save"] for call in chunked)
+    assert sorted(result["delivery_ids"]) == [d["id"] for d in chosen]
+    assert len(sb.rows) == 1
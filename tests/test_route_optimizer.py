@@ -0,0 +1,80 @@
+"""Búsqueda local del optimizador con matrices asimétricas (calles de un solo sentido)."""
+import itertools
+import time
+
+import numpy as np
+import pytest
+
+from route_optimizer import nearest_neighbor, or_opt, route_length, solve_tsp, two_opt
+
+
+def asymmetric(n, seed):
+    rng = np.random.default_rng(seed)
+    dist = rng.random((n, n)) * 10
+    np.fill_diagonal(dist, 0)
+    return dist
+
+
+def far_deadline():
+    return time.monotonic() + 60
+
+
+def reversals(route):
+    for i in range(1, len(route) - 2):
+        for j in range(i + 1, len(route) - 1):
+            yield route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+
+
+def segment_moves(route, max_segment=3):
+    for length in range(1, max_segment + 1):
+        for i in range(1, len(route) - length):
+            seg, rest = route[i:i + length], route[:i] + route[i + length:]
+            for k in range(len(rest) - 1):
+                for moved in (seg, seg[::-1]):
+                    yield rest[:k + 1] + moved + rest[k + 1:]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_two_opt_ends_at_a_true_local_optimum(seed):
+    dist = asymmetric(9, seed)
+    start = nearest_neighbor(dist)
+    route = two_opt(start, dist, far_deadline())
+
+    assert route_length(route, dist) <= route_length(start, dist) + 1e-9
+    best_neighbor = min(route_length(r, dist) for r in reversals(route))
+    assert best_neighbor >= route_length(route, dist) - 1e-9
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_or_opt_ends_at_a_true_local_optimum(seed):
+    dist = asymmetric(9, seed)
+    start = nearest_neighbor(dist)
+    route = or_opt(start, dist, far_deadline())
+
+    assert sorted(route[:-1]) == list(range(9))
+    assert route_length(route, dist) <= route_length(start, dist) + 1e-9
+    best_neighbor = min(route_length(r, dist) for r in segment_moves(route))
+    assert best_neighbor >= route_length(route, dist) - 1e-9
+
+
+@pytest.mark.parametrize("n", [3, 4, 5, 6, 7])
+def test_solve_tsp_never_worse_than_start_and_close_to_brute_force(n):
+    for seed in range(5):
+        dist = asymmetric(n, seed)
+        route = solve_tsp(dist, time_budget=1.0)
+        assert route[0] == route[-1] == 0 and sorted(route[:-1]) == list(range(n))
+
+        optimum = min(route_length([0, *p, 0], dist) for p in itertools.permutations(range(1, n)))
+        length = route_length(route, dist)
+        assert length <= route_length(nearest_neighbor(dist), dist) + 1e-9
+        if n <= 4:
+            assert length == pytest.approx(optimum)
+        else:
+            assert length <= optimum * 1.5
+
+
+def test_solve_tsp_converges_before_the_budget():
+    dist = asymmetric(40, 0)
+    started = time.monotonic()
+    solve_tsp(dist, time_budget=5.0)
+    assert time.monotonic() - started < 5.0
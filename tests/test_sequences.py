@@ -0,0 +1,68 @@
+"""Formas guardadas de optimized_sequence: compacta, respuesta local y respuesta cruda de Google."""
+import polyline
+
+from route_optimizer import COMPACT_FORMAT, compact_sequence, expand_sequence, route_stops
+
+DEPOT = {"lat": -7.4, "lng": -79.57}
+STOPS = [(-7.401, -79.571), (-7.403, -79.569)]
+ENCODED = polyline.encode([(DEPOT["lat"], DEPOT["lng"]), *STOPS, (DEPOT["lat"], DEPOT["lng"])])
+
+
+def local_sequence():
+    return {
+        "encodedPolyline": ENCODED,
+        "depot": dict(DEPOT),
+        "ordered_waypoints": [{"lat": lat, "lng": lng, "label": f"Cliente {i}"} for i, (lat, lng) in enumerate(STOPS)],
+        "leg_distance_km": [0.2, 0.3, 0.4],
+        "leg_duration_min": [0.5, 0.7, 0.9],
+        "vehicle_id": "v1",
+        "depot_id": "d1",
+    }
+
+
+def point(lat, lng):
+    return {"latLng": {"latitude": lat, "longitude": lng}}
+
+
+def google_sequence():
+    path = [(DEPOT["lat"], DEPOT["lng"]), STOPS[1], STOPS[0], (DEPOT["lat"], DEPOT["lng"])]
+    return {"routes": [{
+        "polyline": {"encodedPolyline": ENCODED},
+        "optimizedIntermediateWaypointIndex": [1, 0],
+        "legs": [
+            {"startLocation": point(*u), "endLocation": point(*v), "distanceMeters": 200, "duration": "60s"}
+            for u, v in zip(path[:-1], path[1:])
+        ],
+    }]}
+
+
+def test_local_sequence_round_trip():
+    compact = compact_sequence(local_sequence(), ["a", "b"])
+    assert compact["format"] == COMPACT_FORMAT
+    assert compact["waypoint_ids"] == ["a", "b"]
+    assert compact["vehicle_id"] == "v1" and compact["depot_id"] == "d1"
+    assert compact_sequence(compact) is compact
+
+    expanded = expand_sequence(compact, {"a": "Ana", "b": "Beto"})
+    assert expanded["encodedPolyline"] == ENCODED
+    assert expanded["depot"] == DEPOT
+    assert [(w["lat"], w["lng"], w["label"]) for w in expanded["ordered_waypoints"]] == [
+        (STOPS[0][0], STOPS[0][1], "Ana"), (STOPS[1][0], STOPS[1][1], "Beto"),
+    ]
+    # Volver a compactar la forma expandida da la misma secuencia
+    again = compact_sequence({**expanded, "leg_distance_km": compact["leg_distance_km"],
+                              "leg_duration_min": compact["leg_duration_min"]}, ["a", "b"])
+    assert {k: again[k] for k in ("encodedPolyline", "depot", "waypoint_ids", "waypoints", "leg_distance_km")} == \
+        {k: compact[k] for k in ("encodedPolyline", "depot", "waypoint_ids", "waypoints", "leg_distance_km")}
+
+
+def test_google_response_is_reordered_and_compacted():
+    compact = compact_sequence(google_sequence(), ["a", "b"])
+    assert compact["waypoint_ids"] == ["b", "a"]
+    assert compact["waypoints"] == [list(STOPS[1]), list(STOPS[0])]
+    assert compact["leg_distance_km"] == [0.2, 0.2, 0.2]
+    assert compact["leg_duration_min"] == [1.0, 1.0, 1.0]
+    assert compact["depot"] == DEPOT
+
+    depot, stops = route_stops({"optimized_sequence": compact})
+    assert depot == DEPOT and [i for i, _, _, _ in stops] == ["b", "a"]
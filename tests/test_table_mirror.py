@@ -0,0 +1,28 @@
+"""Espejo en memoria de tablas (core.TableMirror)."""
+from benchmarks.fake_supabase import FakeSupabaseClient
+from core import ROUTE_SCALAR_COLUMNS, SYNC_COLUMNS, TableMirror
+
+ROUTE = {
+    "id": 1, "route_name": "Ruta 1", "total_distance_km": 3.2, "estimated_duration_minutes": 9,
+    "route_status": "planned", "created_at": "2025-01-01T10:00:00+00:00", "updated_at": "2025-01-01T10:00:00+00:00",
+    "delivery_ids": ["a"], "optimized_sequence": {"encodedPolyline": "x" * 1000},
+}
+
+
+def test_own_writes_are_projected_to_the_mirror_columns():
+    mirror = TableMirror("optimized_routes", "updated_at", columns=SYNC_COLUMNS["optimized_routes"])
+    client = FakeSupabaseClient({"optimized_routes": [dict(ROUTE)]})
+    synced = mirror.sync(client)
+
+    mirror.apply([{**ROUTE, "id": 2, "route_name": "Ruta 2"}])
+    rows = {r["id"]: r for r in mirror.sync(client)}
+
+    assert set(rows[2]) == set(ROUTE_SCALAR_COLUMNS + ["updated_at"])
+    assert set(rows[2]) == set(synced[0])
+    assert "optimized_sequence" not in rows[2]
+
+
+def test_unprojected_mirror_keeps_full_rows():
+    mirror = TableMirror("deliveries", "updated_at")
+    mirror.apply([{"id": 1, "status": "pending", "extra": True}])
+    assert mirror._rows[1] == {"id": 1, "status": "pending", "extra": True}
@@ -0,0 +1,155 @@
+"""Medición liviana de operaciones: spans por rerun, percentiles y exportación Prometheus.
+
+    with span("plotly.mapa"):
+        fig = px.scatter_mapbox(...)
+
+    @traced("supabase.get")
+    def get(...): ...
+
+Desactivado (por defecto), `span` devuelve un contexto vacío compartido y
+`traced` solo revisa un booleano antes de llamar a la función.
+"""
+import contextlib
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+_NOOP = contextlib.nullcontext()
+QUANTILES = (0.5, 0.95)
+
+
+def _quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Tracer:
+    """Acumula duraciones por operación (ventana de las últimas `window`) y por rerun.
+
+    Los spans de cada rerun se guardan en el hilo que ejecuta el script, así
+    cada sesión ve solo los suyos; los hilos de fondo (trabajos de
+    optimización) alimentan igual los percentiles.
+    """
+
+    def __init__(self, enabled=False, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._recent = {}  # operación -> deque de segundos
+        self._totals = {}  # operación -> [cantidad, suma]
+        self._local = threading.local()
+        self._written_at = 0.0
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        local.depth = depth + 1
+        run = getattr(local, "run", None)
+        if run is not None:
+            slot = len(run)
+            run.append((name, None, depth))  # se reserva al abrir: el desglose queda en orden de inicio
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            local.depth = depth
+            if run is not None:
+                run[slot] = (name, elapsed, depth)
+            self.observe(name, elapsed)
+
+    def span(self, name):
+        return self._timed(name) if self.enabled else _NOOP
+
+    def traced(self, name):
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self._timed(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def observe(self, name, seconds):
+        with self._lock:
+            recent = self._recent.get(name)
+            if recent is None:
+                recent = self._recent[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            recent.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    # ---------------- RERUNS ----------------
+    def begin_run(self):
+        """Empieza a guardar los spans del rerun actual (hilo del script)."""
+        self._local.run = [] if self.enabled else None
+        self._local.depth = 0
+
+    def end_run(self):
+        """Spans del rerun en orden de inicio: [(operación, segundos, profundidad)]."""
+        run, self._local.run = getattr(self._local, "run", None), None
+        return run or []
+
+    # ---------------- RESÚMENES ----------------
+    def summary(self):
+        """{operación: {count, total_s, p50_s, p95_s}} sobre la ventana reciente."""
+        with self._lock:
+            items = [(name, list(recent), list(self._totals[name])) for name, recent in self._recent.items()]
+        return {
+            name: {
+                "count": count,
+                "total_s": total,
+                "p50_s": _quantile(recent, 0.5),
+                "p95_s": _quantile(recent, 0.95),
+            }
+            for name, recent, (count, total) in sorted(items)
+        }
+
+    def prometheus(self, metric="pacasmayo_operation_seconds"):
+        """Texto en formato de exposición de Prometheus (un summary por operación)."""
+        with self._lock:
+            items = [(name, list(recent), list(self._totals[name])) for name, recent in self._recent.items()]
+        lines = [
+            f"# HELP {metric} Duración de operaciones instrumentadas de la app.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, recent, (count, total) in sorted(items):
+            op = _label(name)
+            for q in QUANTILES:
+                lines.append(f'{metric}{{operation="{op}",quantile="{q}"}} {_quantile(recent, q):.6f}')
+            lines.append(f'{metric}_sum{{operation="{op}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{operation="{op}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Escribe el archivo de forma atómica (apto para el textfile collector de node_exporter)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def export(self, path, every=15):
+        """write_prometheus como mucho una vez cada `every` segundos (se llama en cada rerun)."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._written_at < every:
+                return False
+            self._written_at = now
+        self.write_prometheus(path)
+        return True
+
+
+TRACER = Tracer()
+span = TRACER.span
+traced = TRACER.traced
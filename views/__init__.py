@@ -0,0 +1,11 @@
+"""Páginas de la aplicación; app.py importa cada una recién cuando se abre."""
+
+# Sección del menú -> (módulo, función que dibuja la página)
+PAGES = {
+    "Dashboard": ("views.dashboard", "show_dashboard"),
+    "Gestión de Entregas": ("views.deliveries", "manage_deliveries"),
+    "Optimización de Rutas": ("views.routing", "optimize_routes"),
+    "Gestión de Vehículos": ("views.vehicles", "show_vehicle_management"),
+    "Gestión de Almacenes": ("views.depots", "show_depot_management"),
+    "Reportes": ("views.reporting", "generate_reports"),
+}
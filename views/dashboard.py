@@ -0,0 +1,88 @@
+"""Página del dashboard: KPIs, mapa de entregas y distribución de distancias."""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from core import SupabaseManager, delivery_points
+from tracing import span
+
+# ---------------- DASHBOARD ----------------
+
+def show_dashboard(sb: SupabaseManager):
+    st.header("📊 Dashboard General - Pacasmayo")
+
+    summary = sb.get_dashboard_summary()
+    if not summary["total_deliveries"] and not summary["route_count"]:
+        st.info("No hay datos aún para mostrar estadísticas.")
+        return
+
+    # --- MÉTRICAS PRINCIPALES ---
+    counts = summary["status_counts"]
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("📦 Total Entregas", summary["total_deliveries"])
+    col2.metric("✅ Entregadas", counts.get("delivered", 0))
+    col3.metric("🚚 En Progreso", counts.get("in_progress", 0))
+    col4.metric("🕓 Pendientes", counts.get("pending", 0))
+
+    # --- GRÁFICO 1: ESTADOS DE ENTREGA ---
+    if counts:
+        with span("plotly.dashboard.estados"):
+            status_counts = pd.DataFrame(list(counts.items()), columns=["Estado", "Cantidad"])
+            fig_status = px.pie(
+                status_counts, names="Estado", values="Cantidad",
+                title="Distribución de Estados de Entrega",
+                color_discrete_sequence=px.colors.qualitative.Pastel
+            )
+            st.plotly_chart(fig_status, use_container_width=True)
+
+    # --- GRÁFICO 3: HISTOGRAMA DE DISTANCIAS OPTIMIZADAS ---
+    if summary["histogram"]:
+        with span("plotly.dashboard.distancias"):
+            df_hist = pd.DataFrame(summary["histogram"])
+            fig_dist = px.bar(
+                df_hist, x="Rango (km)", y="Cantidad",
+                title="Distribución de Distancias de Rutas (km)",
+                color_discrete_sequence=["#3E92CC"]
+            )
+            fig_dist.update_layout(bargap=0)
+            st.plotly_chart(fig_dist, use_container_width=True)
+
+    # --- MAPA DE ENTREGAS ---
+    st.subheader("🌍 Mapa de Entregas en Pacasmayo")
+    threshold = int(st.secrets.get("MAP_CLUSTER_THRESHOLD", 2000))
+    if summary["total_deliveries"] <= threshold:
+        df_coords = delivery_points(
+            sb.get_columns("deliveries", ["customer_coordinates", "status", "customer_name"])
+        )
+        if not df_coords.empty:
+            with span("plotly.dashboard.mapa"):
+                fig_map = px.scatter_mapbox(
+                    df_coords,
+                    lat="lat", lon="lon", color="Estado",
+                    hover_name="Cliente", zoom=14,
+                    center={"lat": -7.4002, "lon": -79.5717},
+                    mapbox_style="open-street-map",
+                    title="Ubicaciones de Entregas - Pacasmayo"
+                )
+                st.plotly_chart(fig_map, use_container_width=True)
+    else:
+        # Demasiados puntos: se agrupan en celdas por estado y el tamaño indica la cantidad
+        df_bins = sb.get_delivery_bins(float(st.secrets.get("MAP_CELL_DEG", 0.002)))
+        if not df_bins.empty:
+            with span("plotly.dashboard.mapa_agrupado"):
+                fig_map = px.scatter_mapbox(
+                    df_bins,
+                    lat="lat", lon="lon", color="Estado", size="Cantidad",
+                    hover_data={"Cantidad": True, "lat": False, "lon": False},
+                    size_max=30, zoom=14,
+                    center={"lat": -7.4002, "lon": -79.5717},
+                    mapbox_style="open-street-map",
+                    title=f"Entregas agrupadas ({summary['total_deliveries']}) - Pacasmayo"
+                )
+                st.plotly_chart(fig_map, use_container_width=True)
+
+    # --- KPI DE TIEMPO PROMEDIO Y DISTANCIA PROMEDIO ---
+    if summary["route_count"]:
+        col1, col2 = st.columns(2)
+        col1.metric("📏 Distancia Promedio por Ruta (km)", round(summary["avg_distance_km"] or 0, 2))
+        col2.metric("⏱️ Duración Promedio (min)", round(summary["avg_duration_min"] or 0, 2))
@@ -0,0 +1,168 @@
+"""Página de gestión de entregas: alta, importación masiva y listado paginado."""
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from bulk_import import build_delivery_rows, geocode_many, insert_in_batches
+from core import (
+    DELIVERY_LIST_COLUMNS, DELIVERY_STATUSES, SupabaseManager, get_coordinates, get_geocoder, precompute_locations,
+)
+from keys import delivery_key
+
+# ---------------- GESTIÓN DE ENTREGAS ----------------
+def manage_deliveries(sb: SupabaseManager):
+    st.header("📦 Gestión de Entregas en Pacasmayo")
+
+    # --- Formulario para nueva entrega ---
+    with st.form("nueva_entrega"):
+        col1, col2 = st.columns(2)
+        with col1:
+            name = st.text_input("Nombre del Cliente")
+            phone = st.text_input("Teléfono")
+            address = st.text_area("Dirección Completa (Ej. Jr. Dos de Mayo 135, Pacasmayo)")
+        with col2:
+            desc = st.text_area("Descripción del Paquete")
+            weight = st.number_input("Peso (kg)", min_value=0.1)
+            date = st.date_input("Fecha Estimada de Entrega")
+
+        submitted = st.form_submit_button("Crear Entrega")
+        if submitted:
+            if name and address:
+                coords = get_coordinates(address)
+                if coords:
+                    data = {
+                        "tracking_number": f"TRK{int(datetime.now().timestamp())}",
+                        "customer_name": name,
+                        "customer_phone": phone,
+                        "customer_address": address,
+                        "customer_coordinates": coords,
+                        "package_description": desc,
+                        "package_weight": weight,
+                        "status": "pending",
+                        "estimated_delivery_time": date.isoformat()
+                    }
+                    created = sb.insert("deliveries", data)
+                    precompute_locations({delivery_key(d): (coords["lat"], coords["lng"]) for d in created})
+                    st.success("✅ Entrega creada con coordenadas reales.")
+                    st.rerun()
+                else:
+                    st.error("❌ No se pudo obtener coordenadas. Verifica la dirección.")
+            else:
+                st.warning("⚠️ Completa todos los campos obligatorios.")
+
+    # --- Importación masiva ---
+    with st.expander("📥 Importación masiva (CSV/Excel)"):
+        st.caption(
+            "Columnas: customer_name, customer_address (obligatorias), customer_phone, "
+            "package_description, package_weight, estimated_delivery_time."
+        )
+        uploaded = st.file_uploader("Archivo de entregas", type=["csv", "xlsx"])
+        batch_size = st.number_input("Filas por inserción", min_value=1, max_value=1000, value=100, step=50)
+        if uploaded is not None and st.button("Importar entregas"):
+            import_deliveries(sb, uploaded, int(batch_size))
+
+    # --- Tabla de entregas ---
+    st.subheader("📋 Lista de Entregas")
+    col1, col2 = st.columns(2)
+    with col1:
+        status_filter = st.selectbox("Filtrar por estado", ["Todos"] + DELIVERY_STATUSES)
+    with col2:
+        search = st.text_input("Buscar por cliente o tracking")
+
+    # El cursor (último tracking de cada página) se reinicia al cambiar los filtros
+    filters = (status_filter, search)
+    if st.session_state.get("deliveries_filters") != filters:
+        st.session_state["deliveries_filters"] = filters
+        st.session_state["deliveries_cursors"] = [None]
+    cursors = st.session_state["deliveries_cursors"]
+
+    rows, has_next = sb.query_deliveries(
+        DELIVERY_LIST_COLUMNS,
+        status=None if status_filter == "Todos" else status_filter,
+        search=search,
+        after=cursors[-1],
+    )
+    if not rows and len(cursors) == 1:
+        st.info("No hay entregas registradas todavía." if filters == ("Todos", "") else "Ninguna entrega coincide con el filtro.")
+        return
+
+    df = pd.DataFrame(rows, columns=DELIVERY_LIST_COLUMNS)
+    st.dataframe(df, use_container_width=True)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    if col1.button("⬅️ Anterior", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    col2.caption(f"Página {len(cursors)}")
+    if col3.button("Siguiente ➡️", disabled=not has_next):
+        cursors.append(rows[-1]["tracking_number"])
+        st.rerun()
+
+    # --- Acciones rápidas ---
+    st.subheader("⚙️ Acciones Rápidas")
+    if not df.empty:
+        selected = st.selectbox("Selecciona una entrega:", df["tracking_number"].tolist())
+        col1, col2, col3 = st.columns(3)
+        if col1.button("📋 Pendiente"):
+            sb.update("deliveries", {"status": "pending"}, "tracking_number", selected)
+            st.success("Estado cambiado a Pendiente.")
+            st.rerun()
+        if col2.button("🚚 En Progreso"):
+            sb.update("deliveries", {"status": "in_progress"}, "tracking_number", selected)
+            st.success("Estado cambiado a En Progreso.")
+            st.rerun()
+        if col3.button("✅ Entregada"):
+            sb.update("deliveries", {"status": "delivered"}, "tracking_number", selected)
+            st.success("Estado cambiado a Entregada.")
+            st.rerun()
+
+def import_deliveries(sb: SupabaseManager, uploaded, batch_size):
+    if uploaded.name.endswith(".xlsx"):
+        df = pd.read_excel(uploaded, dtype=str)
+    else:
+        df = pd.read_csv(uploaded, dtype=str)
+    records = df.where(pd.notna(df), None).to_dict("records")
+    if not records:
+        st.warning("⚠️ El archivo no tiene filas.")
+        return
+
+    geocoder = get_geocoder()
+    status = st.empty()
+    bar = st.progress(0.0)
+
+    def geo_progress(done, total):
+        bar.progress(done / total * 0.5)
+        status.text(f"Geocodificando direcciones únicas: {done}/{total}")
+
+    coords = geocode_many(
+        [r.get("customer_address") or "" for r in records],
+        lambda address, throttle: geocoder.geocode(address, raise_errors=True, throttle=throttle),
+        workers=int(st.secrets.get("GEOCODE_WORKERS", 8)),
+        rate=float(st.secrets.get("GEOCODE_RATE_PER_SECOND", 10)),
+        progress=geo_progress,
+    )
+    rows, failures = build_delivery_rows(records, coords, f"TRK{int(datetime.now().timestamp())}")
+
+    def insert_progress(done, total):
+        bar.progress(0.5 + done / total * 0.5)
+        status.text(f"Guardando entregas: {done}/{total}")
+
+    created, insert_failures = insert_in_batches(
+        lambda data: sb.insert("deliveries", data), rows, batch_size, progress=insert_progress
+    )
+    failures += insert_failures
+    precompute_locations({
+        delivery_key(d): (d["customer_coordinates"]["lat"], d["customer_coordinates"]["lng"])
+        for d in created if d.get("customer_coordinates")
+    })
+    bar.progress(1.0)
+    status.empty()
+
+    st.success(f"✅ {len(created)} de {len(records)} entregas importadas.")
+    if failures:
+        st.error(f"❌ {len(failures)} filas no se pudieron importar:")
+        st.dataframe(
+            pd.DataFrame(sorted(failures), columns=["Fila", "Motivo"]),
+            use_container_width=True, hide_index=True
+        )
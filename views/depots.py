@@ -0,0 +1,72 @@
+"""Página de gestión de almacenes."""
+import pandas as pd
+import streamlit as st
+
+from core import SupabaseManager, geocode_address, precompute_locations
+from keys import depot_key
+
+def show_depot_management(sb: SupabaseManager):
+    st.header("🏭 Gestión de Almacenes (Depots)")
+
+    # ---------- CREAR NUEVO ALMACÉN ----------
+    with st.expander("➕ Registrar nuevo almacén"):
+        with st.form("form_nuevo_almacen"):
+            col1, col2 = st.columns(2)
+            with col1:
+                name = st.text_input("Nombre del Almacén (Ej. Principal, Secundario)")
+                address = st.text_input("Dirección completa (Ej. Jr. Dos de Mayo 135, Pacasmayo)")
+            with col2:
+                is_default = st.checkbox("Marcar como predeterminado")
+            submitted = st.form_submit_button("Registrar")
+            if submitted:
+                if name and address:
+                    coords = geocode_address(address)
+                    if coords:
+                        data = {
+                            "name": name,
+                            "address": address,
+                            "coordinates": {"lat": coords["lat"], "lng": coords["lng"]},
+                            "is_default": is_default
+                        }
+                        # Si se marca como predeterminado, desmarcar otros
+                        if is_default:
+                            sb.update("depots", {"is_default": False}, "is_default", True)
+                        sb.insert("depots", data)
+                        precompute_locations({depot_key(coords): (coords["lat"], coords["lng"])})
+                        st.success("✅ Almacén registrado correctamente.")
+                        st.rerun()
+                    else:
+                        st.error("❌ No se pudo geocodificar la dirección.")
+                else:
+                    st.warning("⚠️ Completa todos los campos obligatorios.")
+
+    # ---------- LISTAR ALMACENES ----------
+    st.subheader("📋 Lista de Almacenes Registrados")
+    depots = sb.get("depots")
+    if not depots:
+        st.info("No hay almacenes registrados todavía.")
+        return
+
+    df = pd.DataFrame(depots)
+    st.dataframe(df[["name", "address", "is_default", "created_at"]], use_container_width=True)
+
+    # ---------- ACTUALIZAR ESTADO ----------
+    with st.expander("✏️ Actualizar almacén"):
+        depot_ids = {d["name"]: d["id"] for d in depots}
+        selected = st.selectbox("Seleccionar almacén", list(depot_ids.keys()))
+        new_default = st.checkbox("Marcar este almacén como predeterminado")
+        if st.button("Actualizar"):
+            if new_default:
+                sb.update("depots", {"is_default": False}, "is_default", True)
+            sb.update("depots", {"is_default": new_default}, "id", depot_ids[selected])
+            st.success("🔄 Almacén actualizado.")
+            st.rerun()
+
+    # ---------- ELIMINAR ----------
+    with st.expander("🗑️ Eliminar almacén"):
+        depot_ids = {d["name"]: d["id"] for d in depots}
+        selected_del = st.selectbox("Seleccionar almacén a eliminar", list(depot_ids.keys()))
+        if st.button("Eliminar definitivamente"):
+            sb.delete("depots", "id", depot_ids[selected_del])
+            st.warning(f"🚫 Almacén '{selected_del}' eliminado.")
+            st.rerun()
@@ -0,0 +1,161 @@
+"""Página de reportes: agregados diarios por periodo, PDF detallado y visor de rutas."""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from core import ROLLUP_FIELDS, ROUTE_SCALAR_COLUMNS, SupabaseManager, get_report_cache
+from reports import Column, Fingerprint, PDFReport, fingerprint, pdf_bytes, write_table
+from rollups import day_bounds, default_range, summarize_rollups
+from route_optimizer import expand_sequence, route_stops
+from tracing import span, traced
+from views.route_map import render_route_result
+
+ROLLUP_GROUPS = {"Día": "day", "Vehículo": "vehicle_id", "Almacén": "depot_id"}
+ROUTE_REPORT_COLUMNS = [
+    Column("Nombre de Ruta", 80, "route_name", max_chars=38),
+    Column("Distancia (km)", 40, "total_distance_km", fmt="{:.2f}".format, align="C"),
+    Column("Duración (min)", 40, "estimated_duration_minutes", align="C"),
+]
+DAILY_REPORT_COLUMNS = [
+    Column("Día", 30, "day", align="C"),
+    Column("Rutas", 20, "route_count", align="C"),
+    Column("Distancia (km)", 35, "total_distance_km", fmt="{:.2f}".format, align="C"),
+    Column("Prom. km", 30, "avg_distance_km", fmt="{:.2f}".format, align="C"),
+    Column("Prom. min", 30, "avg_duration_min", fmt="{:.1f}".format, align="C"),
+    Column("Entregas/ruta", 30, "deliveries_per_route", fmt="{:.1f}".format, align="C"),
+]
+
+# ---------------- REPORTES ----------------
+def generate_reports(sb: SupabaseManager):
+    st.header("📄 Reportes de Eficiencia de Rutas en Pacasmayo")
+
+    period = st.date_input("Periodo", value=default_range())
+    if not isinstance(period, (list, tuple)) or len(period) != 2:
+        st.info("Selecciona la fecha de inicio y la de fin.")
+        return
+    start, end = period
+    between = ("created_at", *day_bounds(start, end))
+
+    rollups = sb.get_route_rollups(start, end)
+    totals = summarize_rollups(rollups, by=None)
+    if not totals:
+        st.info("No hay rutas optimizadas registradas en este periodo.")
+        return
+    totals = totals[0]
+
+    # Métricas generales del periodo, a partir de los agregados diarios
+    total_routes = totals["route_count"]
+    total_distance = round(totals["total_distance_km"], 2)
+    avg_distance = round(totals["avg_distance_km"], 2)
+    avg_duration = round(totals["avg_duration_min"], 2)
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Total de Rutas", total_routes)
+    col2.metric("Distancia Total (km)", total_distance)
+    col3.metric("Distancia Promedio (km)", avg_distance)
+    col4.metric("Duración Promedio (min)", avg_duration)
+    col5.metric("Entregas por Ruta", round(totals["deliveries_per_route"], 1))
+
+    group_label = st.radio("Agrupar por", list(ROLLUP_GROUPS), horizontal=True)
+    breakdown = rollup_table(sb, rollups, ROLLUP_GROUPS[group_label], group_label)
+    if group_label == "Día":
+        with span("plotly.reportes.rutas_por_dia"):
+            st.plotly_chart(px.bar(breakdown, x="Día", y="Rutas", title="Rutas por día"), use_container_width=True)
+    st.dataframe(breakdown, use_container_width=True, hide_index=True)
+
+    routes = sb.get_columns("optimized_routes", ROUTE_SCALAR_COLUMNS, between=between)
+    with st.expander(f"📋 Rutas del periodo ({len(routes)})"):
+        st.dataframe(pd.DataFrame(routes, columns=ROUTE_SCALAR_COLUMNS)[
+            ["route_name", "total_distance_km", "estimated_duration_minutes"]
+        ])
+
+    version = fingerprint(routes, [c.key for c in ROUTE_REPORT_COLUMNS]) + fingerprint(rollups, ROLLUP_FIELDS)
+    pdf_data = get_report_cache().get(("rutas", start, end), version)
+    if pdf_data is None and st.button("📥 Generar PDF Detallado"):
+        summary = (
+            f"Periodo: {start:%d/%m/%Y} - {end:%d/%m/%Y}\n"
+            f"Rutas generadas: {total_routes}\n"
+            f"Distancia total: {total_distance} km\n"
+            f"Distancia promedio: {avg_distance} km\n"
+            f"Duración promedio: {avg_duration} minutos\n"
+            f"Entregas por ruta: {totals['deliveries_per_route']:.1f}"
+        )
+        daily = summarize_rollups(rollups, by="day")
+        pdf_data, written = build_route_report(sb, summary, daily, between)
+        # Se guarda bajo la huella de las filas que realmente se escribieron: si cambiaron
+        # después de cargar `routes`, la próxima vez no coincide y se vuelve a generar
+        get_report_cache().put(("rutas", start, end), written + fingerprint(rollups, ROLLUP_FIELDS), pdf_data)
+    if pdf_data:
+        st.download_button(
+            "⬇️ Descargar PDF Detallado",
+            pdf_data,
+            f"reporte_detallado_pacasmayo_{start}_{end}.pdf",
+            "application/pdf"
+        )
+
+    # ---------------- DETALLE DE UNA RUTA ----------------
+    st.subheader("🗺️ Ver una ruta")
+    by_name = {r["route_name"]: r for r in routes}
+    chosen = st.selectbox("Ruta:", [""] + list(by_name))
+    if chosen:
+        show_saved_route(sb, by_name[chosen])
+
+@traced("dataframe.rollup_table")
+def rollup_table(sb: SupabaseManager, rollups, by, label):
+    """Agregados del periodo agrupados por día, vehículo o almacén, con nombres legibles."""
+    names = {}
+    if by == "vehicle_id":
+        names = {str(v["id"]): v["license_plate"] for v in sb.get("vehicles")}
+    elif by == "depot_id":
+        names = {str(d["id"]): d["name"] for d in sb.get("depots")}
+    return pd.DataFrame([{
+        label: names.get(g[by], g[by]) or "Sin asignar",
+        "Rutas": g["route_count"],
+        "Distancia total (km)": round(g["total_distance_km"], 2),
+        "Distancia promedio (km)": round(g["avg_distance_km"], 2),
+        "Duración promedio (min)": round(g["avg_duration_min"], 1),
+        "Entregas por ruta": round(g["deliveries_per_route"], 1),
+    } for g in summarize_rollups(rollups, by=by)])
+
+@traced("pdf.routes")
+def build_route_report(sb: SupabaseManager, summary, daily, between):
+    """PDF del periodo y huella de las filas de rutas escritas en él, calculada en la misma pasada."""
+    pdf = PDFReport()
+    pdf.add_page()
+
+    # ---------------- ENCABEZADO ----------------
+    pdf.chapter("Resumen General", summary)
+
+    # ---------------- RESUMEN POR DÍA ----------------
+    pdf.chapter_title("Resumen por Día")
+    write_table(pdf, DAILY_REPORT_COLUMNS, [daily], centered=True)
+    pdf.ln(8)
+
+    # ---------------- TABLA CENTRADA ----------------
+    pdf.chapter_title("Detalle de Rutas")
+    columns = ROUTE_REPORT_COLUMNS
+    digest = Fingerprint([c.key for c in columns])
+    write_table(pdf, columns, digest.track(sb.iter_rows("optimized_routes", [c.key for c in columns], between=between)),
+                centered=True)
+
+    # ---------------- PIE DE PÁGINA ----------------
+    pdf.ln(10)
+    pdf.set_font('Arial', 'I', 9)
+    pdf.cell(0, 10, "Reporte generado automáticamente por el sistema de optimización de rutas Pacasmayo.", 0, 1, 'C')
+    return pdf_bytes(pdf), digest.hexdigest()
+
+def show_saved_route(sb: SupabaseManager, route):
+    """Trae la geometría de una ruta guardada recién cuando se abre."""
+    detail = sb.get_route_geometry(route["id"])
+    if not detail or not detail.get("optimized_sequence"):
+        st.warning("⚠️ Esta ruta no tiene geometría guardada.")
+        return
+    sequence = detail["optimized_sequence"]
+    depot, stops = route_stops(detail)
+    labels = sb.get_delivery_labels([i for i, _, _, _ in stops if i is not None])
+    render_route_result({
+        "route_id": route["id"],
+        "total_distance_km": route["total_distance_km"],
+        "estimated_duration_minutes": route["estimated_duration_minutes"],
+        "optimized_sequence": expand_sequence(sequence, labels),
+    }, depot)
@@ -0,0 +1,78 @@
+"""Mapa de una ruta optimizada, compartido por la optimización y los reportes."""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from geometry import GeometryCache
+from tracing import span
+
+
+@st.cache_resource
+def get_geometry_cache():
+    """Geometrías decodificadas y simplificadas, compartidas entre sesiones."""
+    return GeometryCache(max_entries=int(st.secrets.get("GEOMETRY_CACHE_ENTRIES", 256)))
+
+def decode_polyline(encoded_poly, zoom=None, route_id=None):
+    """Convierte una polilínea codificada de Google en columnas lat/lon (arreglos NumPy).
+
+    Con `zoom` se simplifica al detalle visible en el mapa, así viaja menos
+    geometría al navegador.
+    """
+    lat, lon = get_geometry_cache().get(encoded_poly, zoom=zoom, route_id=route_id)
+    return {"lat": lat, "lon": lon}
+
+
+def render_route_result(result, depot):
+    # --- Mostrar métricas ---
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("📏 Distancia total (km)", round(result["total_distance_km"], 2))
+    with col2:
+        st.metric("⏱️ Duración estimada (min)", result["estimated_duration_minutes"])
+
+    # --- Dibujar mapa ---
+    if "optimized_sequence" in result and "encodedPolyline" in result["optimized_sequence"]:
+        encoded_poly = result["optimized_sequence"]["encodedPolyline"]
+        with span("dataframe.route_map"):
+            coords = decode_polyline(encoded_poly, zoom=14, route_id=result.get("route_id"))
+            df_map = pd.DataFrame(coords)
+
+        with span("plotly.route_map"):
+            fig = px.line_mapbox(
+                df_map,
+                lat="lat", lon="lon",
+                hover_name=df_map.index.astype(str),
+                zoom=14,
+                center={"lat": df_map["lat"].mean(), "lon": df_map["lon"].mean()},
+                title="🗺️ Ruta Optimizada - Pacasmayo"
+            )
+
+            # --- Almacén (inicio/fin) ---
+            if depot:
+                fig.add_scattermapbox(
+                    lat=[depot["lat"]],
+                    lon=[depot["lng"]],
+                    mode="markers+text",
+                    marker=dict(size=18, color="blue"),
+                    text=["Almacén"],
+                    textposition="top right",
+                    name="Almacén"
+                )
+
+            # --- Entregas ordenadas ---
+            ordered = result["optimized_sequence"].get("ordered_waypoints", [])
+            if ordered:
+                fig.add_scattermapbox(
+                    lat=[w["lat"] for w in ordered],
+                    lon=[w["lng"] for w in ordered],
+                    mode="markers+text",
+                    marker=dict(size=12, color="orange"),
+                    text=[f'{i+1}. {w.get("label","Entrega")}' for i, w in enumerate(ordered)],
+                    textposition="top center",
+                    name="Entregas"
+                )
+
+            fig.update_layout(mapbox_style="open-street-map")
+            st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.warning("⚠️ No se recibió una polilínea válida.")
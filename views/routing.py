@@ -0,0 +1,479 @@
+"""Página de optimización de rutas: manual, flota, multi-almacén e inserción."""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from core import (
+    OPTIMIZATION_ENGINES, PACASMAYO_COORDS, PLANNING_MODES, ROUTE_SCALAR_COLUMNS, SELECTION_METHODS, WAYPOINT_LIMIT,
+    SupabaseManager, get_http_session, get_job_queue, get_matrix_store, get_road_graph, get_route_cache,
+)
+from jobs import FAILED, QUEUED, RUNNING, idempotency_key
+from keys import delivery_key, depot_key
+from route_cache import selection_key
+from route_optimizer import (
+    assign_to_nearest_depot, chunk_boundaries, compact_sequence, direct_leg, expand_sequence, insert_into_route,
+    optimize_route, plan_fleet, route_stops, split_by_sweep, stitch_results,
+)
+from spatial_index import DeliveryIndex
+from tracing import span, traced
+from views.route_map import decode_polyline, get_geometry_cache, render_route_result
+
+# ---------------- OPTIMIZACIÓN DE RUTAS ----------------
+def optimize_routes(sb: SupabaseManager):
+    st.header("🗺️ Optimización de Rutas con Almacén (Google Maps + n8n)")
+    
+    mode = st.radio("Modo de planificación", PLANNING_MODES, horizontal=True)
+
+    # --- Selección de entregas pendientes ---
+    deliveries = sb.get_synced("deliveries")
+    pending = [d for d in deliveries if d["status"] in ["pending", "in_progress"]]
+    prune_matrix_store(sb, pending)
+    if not pending:
+        st.info("📭 No hay entregas pendientes para optimizar.")
+        return
+
+    if mode == "Plan de flota (capacidad)":
+        plan_fleet_routes(sb, [d for d in pending if d["status"] == "pending"])
+        return
+    if mode == "Insertar en ruta existente":
+        insert_into_existing_route(sb, pending)
+        return
+    if mode == "Multi-almacén (más cercano)":
+        plan_multi_depot(sb, [d for d in pending if d["status"] == "pending"])
+        return
+
+    selected_depot = select_depot(sb)
+    if selected_depot is None:
+        return
+    depot = selected_depot["coordinates"]
+
+    by_label = {f"{d['tracking_number']} - {d['customer_name']}": d for d in pending}
+    suggested = suggest_selection(pending, depot)
+    selected = st.multiselect(
+        "Selecciona entregas:",
+        list(by_label),
+        default=[f"{d['tracking_number']} - {d['customer_name']}" for d in suggested]
+    )
+    if len(selected) < 2:
+        st.warning("Selecciona al menos dos entregas para optimizar una ruta.")
+        return
+
+    engine = st.radio("Motor de optimización", OPTIMIZATION_ENGINES, horizontal=True)
+
+    chosen = [by_label[label] for label in selected]
+    ids = [d["id"] for d in chosen]
+    key = idempotency_key(engine, sorted(ids), depot)
+
+    # --- Botón para optimizar ---
+    if st.button("🚀 Optimizar Ruta"):
+        route_cache = get_route_cache()
+        graph = get_road_graph()
+        route_key = selection_key(chosen, depot, namespace=f"{engine}:{graph.signature}" if graph else engine)
+        cached = route_cache.get(route_key)
+        if cached is not None:
+            # Misma selección ya optimizada: se reutiliza sin llamar a Google ni guardar otra fila
+            job_id = get_job_queue().add_result(key, {**cached, "warning": None, "cached": True})
+        else:
+            store = get_matrix_store()
+
+            def job(report):
+                result = optimize_selection(sb, engine, chosen, depot, store, report, depot_id=selected_depot["id"])
+                # Un respaldo local no queda bajo la clave de n8n: cuando n8n vuelva se le pregunta otra vez
+                if not result.get("fallback"):
+                    route_cache.put(route_key, chosen, result)
+                return result
+
+            job_id = get_job_queue().submit(key, job)
+        st.session_state["route_job"] = (key, job_id)
+
+    # Solo se muestra el trabajo de la selección actual
+    current = st.session_state.get("route_job")
+    if current and current[0] == key:
+        show_route_job(current[1], depot)
+
+
+def optimize_selection(sb: SupabaseManager, engine, chosen, depot, store, report, depot_id=None):
+    """Cuerpo del trabajo en segundo plano: corre sin acceso a la UI de Streamlit.
+
+    `depot_id` se guarda con la ruta para atribuirla a su almacén en los agregados.
+    """
+    warning = None
+    result = None
+    if engine != "Local":
+        report(0.1, "Esperando respuesta de n8n")
+        try:
+            result = run_n8n_chunked(sb, chosen, depot, report, depot_id)
+        except Exception as e:
+            if engine == "n8n (Google Maps)":
+                raise RuntimeError(f"Error al optimizar con n8n: {e}") from e
+            warning = f"n8n no respondió ({e}); se usó el optimizador local."
+    if result is None:
+        report(0.5, "Optimizando localmente")
+        result = run_local_optimization(sb, chosen, depot, store, depot_id)
+    result["warning"] = warning
+    result["fallback"] = warning is not None
+    return result
+
+
+def show_route_job(job_id, depot):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.session_state.pop("route_job", None)
+        return
+    if job["status"] in (QUEUED, RUNNING):
+        st.progress(job["progress"], text=f"⏳ {job['message']}…")
+        time.sleep(1)
+        st.rerun()
+    elif job["status"] == FAILED:
+        st.error(f"⚠️ {job['error']}")
+    else:
+        result = job["result"]
+        if result.get("warning"):
+            st.warning(f"⚠️ {result['warning']}")
+        if result.get("cached"):
+            st.success("✅ Ruta recuperada de una optimización anterior.")
+        else:
+            st.success("✅ Ruta optimizada correctamente.")
+        render_route_result(result, depot)
+
+
+def suggest_selection(pending, depot):
+    """Preselección por cercanía al almacén o por zonas, usando el índice espacial."""
+    method = st.radio("Preseleccionar entregas", SELECTION_METHODS, horizontal=True)
+    if method == "Ninguna":
+        return []
+
+    index = get_delivery_index()
+    index.sync(pending)
+    if method == "Radio desde el almacén":
+        if not depot:
+            st.warning("⚠️ El almacén no tiene coordenadas.")
+            return []
+        radius = st.slider("Radio (km)", 0.5, 10.0, 2.0, 0.5)
+        nearby = index.within(depot["lat"], depot["lng"], radius)
+        st.caption(f"{len(nearby)} entregas pendientes a menos de {radius} km.")
+        return nearby
+
+    zones = index.zones(int(st.secrets.get("N8N_WAYPOINT_LIMIT", WAYPOINT_LIMIT)))
+    if not zones:
+        return []
+    zone = st.selectbox(
+        "Zona:", range(len(zones)),
+        format_func=lambda i: f"Zona {i + 1} ({len(zones[i])} entregas)"
+    )
+    return zones[zone]
+
+
+def select_depot(sb: SupabaseManager):
+    # --- Dirección del almacén (origen y destino) ---
+    st.subheader("🏭 Selección de Almacén")
+
+    depots = sb.get("depots")
+    default_depot = next((d for d in depots if d["is_default"]), None)
+
+    if not depots:
+        st.warning("⚠️ No hay almacenes registrados. Agrega uno en 'Gestión de Almacenes'.")
+        return None
+
+    selected_name = st.selectbox(
+        "Selecciona el almacén de origen y destino:",
+        [d["name"] for d in depots],
+        index=depots.index(default_depot) if default_depot else 0
+    )
+
+    selected_depot = next(d for d in depots if d["name"] == selected_name)
+    st.info(f"📍 Usando almacén: **{selected_depot['name']}**, Dirección: {selected_depot['address']}")
+
+    if not selected_depot["coordinates"]:
+        st.warning("⚠️ No se pudo obtener coordenadas del almacén. Verifica la dirección.")
+    return selected_depot
+
+
+def plan_fleet_routes(sb: SupabaseManager, pending):
+    """Reparte todas las entregas pendientes entre los vehículos disponibles (CVRP)."""
+    vehicles = [v for v in sb.get("vehicles") if v.get("status") == "available"]
+    st.caption(f"{len(pending)} entregas pendientes · {len(vehicles)} vehículos disponibles")
+    if not vehicles:
+        st.warning("⚠️ No hay vehículos disponibles. Revisa 'Gestión de Vehículos'.")
+        return
+
+    selected_depot = select_depot(sb)
+    if selected_depot is None or not selected_depot["coordinates"]:
+        return
+    depot = selected_depot["coordinates"]
+
+    if not st.button("🚛 Planificar flota"):
+        return
+
+    located = [d for d in pending if d.get("customer_coordinates")]
+    plan = plan_fleet(located, vehicles, depot,
+                      time_budget=float(st.secrets.get("LOCAL_OPTIMIZER_SECONDS", 2)) * 2,
+                      matrix_store=get_matrix_store(), road_graph=get_road_graph())
+    if not plan["routes"]:
+        st.warning("⚠️ Ninguna entrega cabe en los vehículos disponibles.")
+        return
+
+    stamp = datetime.now().isoformat()
+    for r in plan["routes"]:
+        plate = r["vehicle"]["license_plate"]
+        sb.insert("optimized_routes", {
+            "route_name": f"Ruta Pacasmayo {plate} {stamp}",
+            "delivery_ids": r["delivery_ids"],
+            "optimized_sequence": {
+                **compact_sequence(r["optimized_sequence"], r["delivery_ids"]), "vehicle_id": r["vehicle"]["id"],
+                "depot_id": selected_depot["id"],
+            },
+            "total_distance_km": r["total_distance_km"],
+            "route_status": "planned",
+            "estimated_duration_minutes": r["estimated_duration_minutes"],
+        })
+
+    st.success(f"✅ {len(plan['routes'])} rutas planificadas y guardadas.")
+    st.dataframe(pd.DataFrame([{
+        "Vehículo": r["vehicle"]["license_plate"],
+        "Entregas": len(r["delivery_ids"]),
+        "Carga (kg)": round(r["load_kg"], 1),
+        "Capacidad (kg)": r["capacity_kg"],
+        "Distancia (km)": round(r["total_distance_km"], 2),
+        "Duración (min)": r["estimated_duration_minutes"],
+    } for r in plan["routes"]]), use_container_width=True, hide_index=True)
+
+    unassigned = plan["unassigned"] + [d for d in pending if not d.get("customer_coordinates")]
+    if unassigned:
+        st.warning(f"⚠️ {len(unassigned)} entregas quedaron sin asignar (capacidad o coordenadas).")
+
+    with span("plotly.plan_fleet"):
+        fig = px.line_mapbox(
+            pd.concat([
+                pd.DataFrame(decode_polyline(r["optimized_sequence"]["encodedPolyline"], zoom=13))
+                .assign(**{"Vehículo": r["vehicle"]["license_plate"]})
+                for r in plan["routes"]
+            ], ignore_index=True),
+            lat="lat", lon="lon", color="Vehículo", zoom=13,
+            center={"lat": depot["lat"], "lon": depot["lng"]},
+            title="🗺️ Plan de Flota - Pacasmayo"
+        )
+        fig.add_scattermapbox(
+            lat=[depot["lat"]], lon=[depot["lng"]], mode="markers",
+            marker=dict(size=18, color="blue"), name="Almacén"
+        )
+        fig.update_layout(mapbox_style="open-street-map")
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def plan_multi_depot(sb: SupabaseManager, pending):
+    """Asigna cada entrega a su almacén más cercano y optimiza una ruta por almacén en paralelo."""
+    depots = [d for d in sb.get("depots") if d.get("coordinates")]
+    if not depots:
+        st.warning("⚠️ No hay almacenes con coordenadas. Agrega uno en 'Gestión de Almacenes'.")
+        return
+
+    located = [d for d in pending if d.get("customer_coordinates")]
+    groups = assign_to_nearest_depot(located, depots)
+    st.caption(f"{len(located)} entregas pendientes repartidas entre {len(groups)} de {len(depots)} almacenes")
+    st.dataframe(pd.DataFrame([
+        {"Almacén": depots[j]["name"], "Entregas": len(members)} for j, members in sorted(groups.items())
+    ]), use_container_width=True, hide_index=True)
+
+    engine = st.radio("Motor de optimización", OPTIMIZATION_ENGINES, horizontal=True)
+    if not groups or not st.button("🏭 Optimizar todos los almacenes"):
+        return
+
+    store = get_matrix_store()
+    results, errors = {}, {}
+    with st.spinner("Optimizando rutas por almacén…"):
+        with ThreadPoolExecutor(max_workers=min(len(groups), 4)) as pool:
+            futures = {
+                pool.submit(optimize_selection, sb, engine, members, depots[j]["coordinates"], store, lambda *a: None,
+                            depots[j]["id"]): j
+                for j, members in groups.items()
+            }
+            for future in as_completed(futures):
+                j = futures[future]
+                try:
+                    results[j] = future.result()
+                except Exception as e:
+                    errors[j] = e
+
+    for j, e in errors.items():
+        st.error(f"⚠️ {depots[j]['name']}: {e}")
+    if not results:
+        return
+
+    st.success(f"✅ {len(results)} rutas optimizadas, una por almacén.")
+    st.dataframe(pd.DataFrame([{
+        "Almacén": depots[j]["name"],
+        "Entregas": len(groups[j]),
+        "Distancia (km)": round(r["total_distance_km"], 2),
+        "Duración (min)": r["estimated_duration_minutes"],
+    } for j, r in sorted(results.items())]), use_container_width=True, hide_index=True)
+    col1, col2 = st.columns(2)
+    col1.metric("📏 Distancia total (km)", round(sum(r["total_distance_km"] for r in results.values()), 2))
+    col2.metric("⏱️ Duración total (min)", sum(r["estimated_duration_minutes"] for r in results.values()))
+
+    with span("plotly.plan_multi_depot"):
+        fig = px.line_mapbox(
+            pd.concat([
+                pd.DataFrame(decode_polyline(r["optimized_sequence"]["encodedPolyline"], zoom=13))
+                .assign(**{"Almacén": depots[j]["name"]})
+                for j, r in sorted(results.items())
+            ], ignore_index=True),
+            lat="lat", lon="lon", color="Almacén", zoom=13,
+            center={"lat": PACASMAYO_COORDS["lat"], "lon": PACASMAYO_COORDS["lng"]},
+            title="🗺️ Rutas por Almacén - Pacasmayo"
+        )
+        fig.add_scattermapbox(
+            lat=[depots[j]["coordinates"]["lat"] for j in results],
+            lon=[depots[j]["coordinates"]["lng"] for j in results],
+            mode="markers+text", text=[depots[j]["name"] for j in results], textposition="top right",
+            marker=dict(size=18, color="blue"), name="Almacenes"
+        )
+        fig.update_layout(mapbox_style="open-street-map")
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def insert_into_existing_route(sb: SupabaseManager, pending):
+    """Agrega una entrega tardía a una ruta planificada por inserción más barata."""
+    routes = [
+        r for r in sb.get_columns("optimized_routes", ROUTE_SCALAR_COLUMNS) if r.get("route_status") == "planned"
+    ]
+    if not routes:
+        st.info("No hay rutas planificadas donde insertar entregas.")
+        return
+
+    route_names = {r["route_name"]: r for r in routes}
+    route = route_names[st.selectbox("Ruta planificada:", list(route_names))]
+    route = {**route, **(sb.get_route_geometry(route["id"]) or {})}
+    depot, stops = route_stops(route)
+    in_route = {str(i) for i, _, _, _ in stops}
+    candidates = {
+        f"{d['tracking_number']} - {d['customer_name']}": d
+        for d in pending
+        if str(d["id"]) not in in_route and d.get("customer_coordinates")
+    }
+    if not candidates:
+        st.info("No hay entregas pendientes fuera de esta ruta.")
+        return
+    delivery = candidates[st.selectbox("Entrega a insertar:", list(candidates))]
+    repair = st.checkbox("Reoptimizar localmente después de insertar (2-opt / Or-opt)")
+
+    if st.button("➕ Insertar en la ruta"):
+        fields = insert_into_route(route, delivery, repair=repair)
+        sb.update("optimized_routes", {
+            **fields, "optimized_sequence": compact_sequence(fields["optimized_sequence"], fields["delivery_ids"]),
+        }, "id", route["id"])
+        get_geometry_cache().invalidate(route["id"])
+        st.success(
+            f"✅ Entrega insertada. La ruta pasó de {route['total_distance_km']:.2f} km "
+            f"a {fields['total_distance_km']:.2f} km."
+        )
+        labels = sb.get_delivery_labels(fields["delivery_ids"])
+        render_route_result(
+            {**fields, "optimized_sequence": expand_sequence(fields["optimized_sequence"], labels)}, depot
+        )
+
+
+@traced("n8n.webhook")
+def run_n8n_optimization(ids, depot, origin=None, destination=None, save=True, depot_id=None):
+    """Optimiza vía el webhook de n8n (Google computeRoutes); n8n guarda la ruta si `save`.
+
+    `origin`/`destination` ({lat, lng}) reemplazan al almacén como extremos del tramo.
+    """
+    payload = {"deliveries": ids, "save": save}
+    if depot:
+        payload["depot"] = depot
+    if depot_id is not None:
+        payload["depot_id"] = depot_id
+    if origin:
+        payload["origin"] = origin
+    if destination:
+        payload["destination"] = destination
+    res = get_http_session().post(st.secrets["N8N_WEBHOOK_URL"], json=payload, timeout=45)
+    if res.status_code != 200:
+        raise RuntimeError(res.text)
+    return res.json()
+
+
+def run_n8n_chunked(sb: SupabaseManager, chosen, depot, report, depot_id=None):
+    """Divide selecciones mayores al límite de waypoints de Google y las resuelve en paralelo.
+
+    Los tramos se encadenan: cada uno termina en una entrega fija (la más
+    cercana al tramo siguiente) y el siguiente sale desde ella; solo el primero
+    sale del almacén y solo el último vuelve. n8n no guarda los tramos: la
+    ruta unida se guarda aquí como una sola fila.
+    """
+    chunks = split_by_sweep(chosen, depot, int(st.secrets.get("N8N_WAYPOINT_LIMIT", WAYPOINT_LIMIT)))
+    if len(chunks) == 1:
+        return run_n8n_optimization([d["id"] for d in chosen], depot, depot_id=depot_id)
+
+    boundaries = chunk_boundaries(chunks)
+    starts = [depot] + [b["customer_coordinates"] for b in boundaries[:-1]]
+    results = [None] * len(chunks)
+    workers = min(len(chunks), int(st.secrets.get("N8N_PARALLEL_REQUESTS", 4)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for i, (chunk, start, end) in enumerate(zip(chunks, starts, boundaries)):
+            ids = [d["id"] for d in chunk if d is not end]
+            stop = end["customer_coordinates"] if end else depot
+            if not ids:
+                # El tramo solo tiene su entrega final: no hay nada que pedirle a n8n
+                results[i] = direct_leg(start, stop, depot)
+                continue
+            futures[pool.submit(run_n8n_optimization, ids, depot, start, stop, False)] = i
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            report(0.1 + 0.8 * done / len(futures), f"Tramos optimizados: {done}/{len(futures)}")
+
+    # La entrega final de cada tramo es su destino, no un waypoint: se agrega al final
+    for result, end in zip(results, boundaries):
+        if end:
+            coords = end["customer_coordinates"]
+            result.setdefault("delivery_ids", []).append(end["id"])
+            result["optimized_sequence"].setdefault("ordered_waypoints", []).append(
+                {"lat": coords["lat"], "lng": coords["lng"], "label": end.get("customer_name") or "Entrega"}
+            )
+    return save_route(sb, stitch_results(results), depot_id)
+
+
+def run_local_optimization(sb: SupabaseManager, chosen, depot, store, depot_id=None):
+    """Optimiza en el propio proceso y guarda la ruta igual que el flujo de n8n."""
+    result = optimize_route(chosen, depot, time_budget=float(st.secrets.get("LOCAL_OPTIMIZER_SECONDS", 2)),
+                            matrix_store=store, road_graph=get_road_graph())
+    return save_route(sb, result, depot_id)
+
+
+def save_route(sb: SupabaseManager, result, depot_id=None):
+    """Guarda una ruta optimizada como una fila de optimized_routes y anota su id en `result`."""
+    sequence = compact_sequence(result["optimized_sequence"], result["delivery_ids"])
+    if depot_id is not None:
+        sequence = {**sequence, "depot_id": depot_id}
+    saved = sb.insert("optimized_routes", {
+        "route_name": f"Ruta Pacasmayo {datetime.now().isoformat()}",
+        "delivery_ids": result["delivery_ids"],
+        "optimized_sequence": sequence,
+        "total_distance_km": result["total_distance_km"],
+        "route_status": "planned",
+        "estimated_duration_minutes": result["estimated_duration_minutes"],
+    })
+    if saved:
+        result["route_id"] = saved[0].get("id")
+    return result
+
+
+# ---------------- RECURSOS POR PROCESO ----------------
+@st.cache_resource
+def get_delivery_index():
+    """Índice espacial de entregas pendientes, compartido y sincronizado por diferencias."""
+    return DeliveryIndex(origin_lat=PACASMAYO_COORDS["lat"])
+
+def prune_matrix_store(sb: SupabaseManager, pending):
+    """Compacta en segundo plano el almacén de matrices cuando acumula entregas que ya no están pendientes."""
+    active = {delivery_key(d) for d in pending if d.get("customer_coordinates")}
+    active |= {depot_key(d["coordinates"]) for d in sb.get("depots") if d.get("coordinates")}
+    store = get_matrix_store()
+    if store.needs_compaction(active):
+        get_job_queue().submit("matrix-store-retain", lambda report: store.retain(active))
@@ -0,0 +1,103 @@
+"""Página de gestión de vehículos y su reporte PDF."""
+import pandas as pd
+import streamlit as st
+
+from core import SupabaseManager, get_report_cache
+from reports import Column, PDFReport, fingerprint, pdf_bytes, write_table
+from tracing import traced
+
+# Columnas de los reportes: se formatean fila a fila, sin pasar por pandas
+VEHICLE_REPORT_COLUMNS = [
+    Column("Placa", 40, "license_plate"),
+    Column("Tipo de Vehículo", 45, "vehicle_type", max_chars=22),
+    Column("Capacidad (kg)", 45, "capacity_kg", fmt="{:.1f}".format, align="C"),
+    Column("Estado", 35, "status", align="C"),
+    Column("Fecha", 30, "created_at", fmt=lambda v: str(v)[:10], align="C"),
+]
+
+
+
+def show_vehicle_management(sb: SupabaseManager):
+    st.header("🚛 Gestión de Vehículos (CLAER)")
+
+    # ---------------- CREAR ----------------
+    with st.expander("➕ Registrar nuevo vehículo"):
+        with st.form("form_nuevo_vehiculo"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                license_plate = st.text_input("Placa del vehículo")
+            with col2:
+                vehicle_type = st.selectbox("Tipo de vehículo", ["Camión Pequeño", "Camión Mediano", "Camión Grande", "Motocicleta"])
+            with col3:
+                capacity_kg = st.number_input("Capacidad (kg)", min_value=0.0, step=50.0)
+            submitted = st.form_submit_button("Registrar")
+            if submitted:
+                if license_plate:
+                    data = {
+                        "license_plate": license_plate.strip().upper(),
+                        "vehicle_type": vehicle_type,
+                        "capacity_kg": capacity_kg
+                    }
+                    sb.insert("vehicles", data)
+                    st.success(f"✅ Vehículo {license_plate} registrado correctamente.")
+                    st.rerun()
+                else:
+                    st.warning("⚠️ Debes ingresar una placa válida.")
+
+    # ---------------- LEER ----------------
+    st.subheader("📋 Lista de Vehículos")
+    vehicles = sb.get("vehicles")
+    if not vehicles:
+        st.info("No hay vehículos registrados todavía.")
+        return
+
+    df = pd.DataFrame(vehicles)
+    st.dataframe(df[["license_plate", "vehicle_type", "capacity_kg", "status", "created_at"]], use_container_width=True)
+
+    # ---------------- ACTUALIZAR ----------------
+    with st.expander("✏️ Actualizar información de un vehículo"):
+        veh_ids = {v["license_plate"]: v["id"] for v in vehicles}
+        selected = st.selectbox("Seleccionar vehículo", list(veh_ids.keys()))
+        new_status = st.selectbox("Nuevo estado", ["available", "in_use", "maintenance"])
+        if st.button("Actualizar Estado"):
+            sb.update("vehicles", {"status": new_status}, "id", veh_ids[selected])
+            st.success(f"🔄 Estado de {selected} actualizado a '{new_status}'.")
+            st.rerun()
+
+    # ---------------- ELIMINAR ----------------
+    with st.expander("🗑️ Eliminar vehículo"):
+        veh_ids = {v["license_plate"]: v["id"] for v in vehicles}
+        selected_del = st.selectbox("Seleccionar vehículo a eliminar", list(veh_ids.keys()))
+        if st.button("Eliminar definitivamente"):
+            sb.delete("vehicles", "id", veh_ids[selected_del])
+            st.warning(f"🚫 Vehículo {selected_del} eliminado del registro.")
+            st.rerun()
+
+    # ---------------- REPORTE ----------------
+    st.subheader("📄 Reporte de Vehículos en PDF")
+
+    version = fingerprint(vehicles, [c.key for c in VEHICLE_REPORT_COLUMNS])
+    pdf_data = get_report_cache().get("vehiculos", version)
+    if pdf_data is None and st.button("📥 Generar PDF"):
+        pdf_data = get_report_cache().put("vehiculos", version, build_vehicle_report(sb))
+    if pdf_data:
+        st.download_button("⬇️ Descargar PDF", pdf_data, "reporte_vehiculos.pdf", "application/pdf")
+
+@traced("pdf.vehicles")
+def build_vehicle_report(sb: SupabaseManager):
+    pdf = PDFReport()
+    pdf.add_page()
+
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "REPORTE DE VEHÍCULOS - PACASMAYO", 0, 1, "C")
+    pdf.ln(5)
+
+    columns = VEHICLE_REPORT_COLUMNS
+    total = write_table(pdf, columns, sb.iter_rows("vehicles", [c.key for c in columns]))
+
+    # Espaciado y resumen
+    pdf.ln(8)
+    pdf.set_font("Arial", "I", 9)
+    pdf.cell(0, 8, f"Total de vehículos registrados: {total}", 0, 1, "L")
+    pdf.cell(0, 8, "Reporte generado automáticamente por el sistema de rutas Pacasmayo.", 0, 1, "C")
+    return pdf_bytes(pdf)